@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import argparse
+import json
+import platform
+import random
+import time
+
+import classtime
+import snapshot
+import synthetic
+
+from algorithm import Algorithm
+from classparser import ClassParser
+from classtime import ClassTime
+from meetingtable import MeetingTable
+from vectoralgorithm import VectorAlgorithm
+
+# The minimum number of seconds each measurement runs for.
+MIN_TIME = 0.5
+
+# The number of times each measurement is repeated (the best is kept).
+REPEAT = 3
+
+# The size of the generated problems.
+COURSES = 8
+LECTURES = 3
+SECTIONS = {"DI": 4, "LA": 3}
+
+# The number of courses on the generated page for the parser benchmarks.
+PARSE_COURSES = 200
+
+# A saved Schedule of Classes page to parse instead of a generated one.
+pagePath = None
+
+# The genetic algorithm parameters used for the evolve benchmarks.
+CAPACITY = 64
+CROSSOVER = 0.02
+MUTATE = 0.01
+ELITISM = 0.1
+
+# How much slower than the baseline a result may be before it is reported.
+TOLERANCE = 0.1
+
+def measure(function, work=1):
+    """
+    Measures how many units of work per second a function does. The function
+    is called repeatedly for at least MIN_TIME seconds, REPEAT times, and the
+    best rate is returned.
+
+    :param function: the function to measure, which takes no arguments
+    :param work: the units of work done by each call
+    :returns: the number of units of work per second
+    """
+    best = 0.0
+
+    for i in range(REPEAT):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+
+        while elapsed < MIN_TIME:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+
+        best = max(best, calls * work / elapsed)
+
+    return best
+
+def benchClassTimeFromString(cached=True):
+    """
+    Measures how fast meeting time strings are turned into ClassTime objects.
+
+    :param cached: whether or not strings seen in earlier runs are reused
+    :returns: a tuple of the number of strings per second and the unit
+    """
+    times = [days + " " + times for days, times in
+             (synthetic.generateTimes(random.Random(i), synthetic.DAYS, 50)
+              for i in range(1000))]
+
+    def run():
+        # Without the cache, only repeated strings within a run are reused.
+        if not cached:
+            classtime.classTimes.clear()
+
+        for text in times:
+            ClassTime.fromString(text)
+
+    return measure(run, len(times)), "strings/s"
+
+def benchClassTimeConflicts():
+    """
+    Measures how fast ClassTime objects are checked for conflicts with each
+    other.
+
+    :returns: a tuple of the number of comparisons per second and the unit
+    """
+    generator = random.Random(0)
+    times = [ClassTime.fromString(" ".join(
+                 synthetic.generateTimes(generator, synthetic.DAYS, 50)))
+             for i in range(100)]
+
+    def run():
+        for time in times:
+            for time2 in times:
+                time.conflictsWith(time2)
+
+    return measure(run, len(times) * len(times)), "comparisons/s"
+
+def benchConflictMatrix():
+    """
+    Measures how fast the conflict matrix of every meeting of a generated
+    schedule is built.
+
+    :returns: a tuple of the number of comparisons per second and the unit
+    """
+    schedule = synthetic.generateSchedule(100, LECTURES, SECTIONS, seed=0)
+    table = MeetingTable(schedule)
+
+    return (measure(table.getConflictMatrix, len(table) * len(table)),
+            "comparisons/s")
+
+def benchFitness():
+    """
+    Measures how fast the fitness of individuals is calculated once every
+    score they need is in the fitness table.
+
+    :returns: a tuple of the number of individuals per second and the unit
+    """
+    schedule = synthetic.generateSchedule(COURSES, LECTURES, SECTIONS, seed=0)
+    algorithm = Algorithm(schedule)
+    generator = random.Random(0)
+    individuals = [tuple(generator.randrange(len(algorithm.chromosomes[code]))
+                         for code in algorithm.table.courses)
+                   for i in range(1000)]
+
+    # Look up every score once so only the evaluation is measured.
+    for individual in individuals:
+        algorithm.getFitness(individual)
+
+    def run():
+        for individual in individuals:
+            algorithm.getFitness(individual)
+
+    return measure(run, len(individuals)), "individuals/s"
+
+def benchEvolve(engine):
+    """
+    Measures how fast a population of a generated schedule is evolved.
+
+    :param engine: the Algorithm class or subclass that evolves the population
+    :returns: a tuple of the number of generations per second and the unit
+    """
+    schedule = synthetic.generateSchedule(COURSES, LECTURES, SECTIONS, seed=0)
+    random.seed(0)
+    algorithm = engine(schedule)
+    algorithm.initiate(CAPACITY, CROSSOVER, MUTATE, ELITISM)
+
+    return measure(algorithm.evolve), "generations/s"
+
+def getPage():
+    """
+    Returns the page parsed by the parser benchmarks, which is the saved page
+    given on the command line or a generated one.
+
+    :returns: a tuple of the page as bytes and the number of rows in it
+    """
+    if pagePath:
+        with open(pagePath, "rb") as source:
+            page = source.read()
+
+        parser = ClassParser()
+        parser.load(page)
+
+        return page, len(parser.elements)
+
+    page = synthetic.generateHTML(PARSE_COURSES, LECTURES, SECTIONS, seed=0)
+
+    return (page.encode("utf-8"),
+            PARSE_COURSES * LECTURES * (2 + sum(SECTIONS.values())))
+
+def benchParse():
+    """
+    Measures how fast a whole Schedule of Classes page is parsed.
+
+    :returns: a tuple of the number of rows per second and the unit
+    """
+    page, rows = getPage()
+
+    def run():
+        parser = ClassParser()
+        parser.load(page)
+        parser.parse()
+
+    return measure(run, rows), "rows/s"
+
+def benchParseStream():
+    """
+    Measures how fast a Schedule of Classes page is parsed as it arrives in
+    chunks.
+
+    :returns: a tuple of the number of rows per second and the unit
+    """
+    page, rows = getPage()
+
+    def run():
+        chunks = (page[i:i + 65536] for i in range(0, len(page), 65536))
+
+        for course in ClassParser().parseStream(chunks):
+            pass
+
+    return measure(run, rows), "rows/s"
+
+def benchSnapshot():
+    """
+    Measures how fast the schedule data of a term is loaded from a snapshot.
+
+    :returns: a tuple of the number of courses per second and the unit
+    """
+    schedule = synthetic.generateSchedule(200, LECTURES, SECTIONS, seed=0)
+    data = snapshot.dumps(schedule)
+
+    return measure(lambda: snapshot.loads(data), len(schedule)), "courses/s"
+
+# Every benchmark by name.
+BENCHMARKS = [
+    ("classtime.fromString", benchClassTimeFromString),
+    ("classtime.fromString.cold", lambda: benchClassTimeFromString(False)),
+    ("classtime.conflictsWith", benchClassTimeConflicts),
+    ("meetingtable.getConflictMatrix", benchConflictMatrix),
+    ("algorithm.getFitness", benchFitness),
+    ("algorithm.evolve", lambda: benchEvolve(Algorithm)),
+    ("vectoralgorithm.evolve", lambda: benchEvolve(VectorAlgorithm)),
+    ("classparser.parse", benchParse),
+    ("classparser.parseStream", benchParseStream),
+    ("snapshot.loads", benchSnapshot)
+]
+
+def compare(results, baseline):
+    """
+    Prints how each result compares with the baseline results.
+
+    :param results: the results of this run
+    :param baseline: the results of the baseline run
+    :returns: True if no result is slower than the baseline beyond the
+    tolerance, False otherwise
+    """
+    passed = True
+
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        ratio = result["rate"] / baseline["results"][name]["rate"]
+        status = ""
+
+        if ratio < 1.0 - TOLERANCE:
+            status = " (slower)"
+            passed = False
+
+        print("{0:<28}{1:>8.2f}x baseline{2}".format(name, ratio, status))
+
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the speed of the "
+                                     "parser, ClassTime and the algorithm.")
+    parser.add_argument("--output", help="where to save the JSON results")
+    parser.add_argument("--baseline", help="JSON results to compare with")
+    parser.add_argument("--filter", default="",
+                        help="only run benchmarks containing this text")
+    parser.add_argument("--page", help="a saved Schedule of Classes page "
+                        "for the parser benchmarks")
+    arguments = parser.parse_args()
+
+    global pagePath
+    pagePath = arguments.page
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {}
+    }
+
+    for name, benchmark in BENCHMARKS:
+        if arguments.filter not in name:
+            continue
+
+        rate, unit = benchmark()
+        results["results"][name] = {"rate": rate, "unit": unit}
+
+        print("{0:<32}{1:>14.1f} {2}".format(name, rate, unit))
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline:
+            if not compare(results, json.load(baseline)):
+                return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
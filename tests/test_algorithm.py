@@ -0,0 +1,774 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import itertools
+import json
+import pickle
+import random
+import unittest
+
+import synthetic
+
+from algorithm import Algorithm
+from algorithm import SELECTION_ROULETTE
+from algorithm import SELECTION_SUS
+from algorithm import SELECTION_TOURNAMENT
+from algorithm import STOP_EVALUATIONS
+from algorithm import STOP_GENERATIONS
+from algorithm import STOP_PLATEAU
+from algorithm import STOP_TARGET
+from algorithm import STOP_TIME
+from batch import BatchSolver
+from batch import createSolver
+from batch import validatePreferences
+from chromosome import Chromosome
+from exactsolver import ExactSolver
+from exactsolver import STRATEGY_EXACT
+from exactsolver import STRATEGY_GENETIC
+from exactsolver import getSearchSpace
+from exactsolver import selectStrategy
+from classtime import ClassTime
+from fitnesstable import FitnessTable
+from fitnesstable import MAX_GAP
+from fitnesstable import TIME_EARLIEST
+from fitnesstable import TIME_LATEST
+from fitnesstable import TIME_LUNCH
+from individual import getGeneType
+from islands import IslandModel
+from ranking import Ranking
+from runstats import RunStats
+from runstats import COUNTER_COMPARISONS
+from runstats import COUNTER_EVALUATIONS
+from runstats import COUNTER_GENERATIONS
+from runstats import PHASE_FITNESS
+from runstats import PHASE_SELECTION
+from runstats import PHASE_TABLE
+from vectoralgorithm import VectorAlgorithm
+
+def makeMeeting(time):
+    return {
+        "sectionID": "000000",
+        "time": ClassTime.fromString(time),
+        "building": "CENTR",
+        "room": "101",
+        "instructor": "Staff"
+    }
+
+def makeSchedule():
+    return {
+        "CSE 12": [
+            {
+                "LE": makeMeeting("MWF 10:00a-10:50a"),
+                "DI": [makeMeeting("M 3:00p-3:50p"),
+                       makeMeeting("Tu 8:00a-8:50a")],
+                "FI": {"date": "12/10/2016",
+                       "time": ClassTime.fromString("S 11:30a-2:29p"),
+                       "building": "CENTR", "room": "101"}
+            },
+            {
+                "LE": makeMeeting("TuTh 12:30p-1:50p"),
+                "DI": [makeMeeting("W 6:00p-6:50p")],
+                "LA": [makeMeeting("F 1:00p-2:50p"),
+                       makeMeeting("Th 9:00a-10:50a")],
+                "FI": {"date": "12/07/2016",
+                       "time": ClassTime.fromString("W 8:00a-10:59a"),
+                       "building": "CENTR", "room": "101"}
+            }
+        ],
+        "CSE 15L": [
+            {
+                "LE": makeMeeting("M 2:00p-2:50p"),
+                "LA": [makeMeeting("Tu 10:00a-11:50a"),
+                       makeMeeting("W 5:00p-6:50p"),
+                       makeMeeting("F 10:00a-11:50a")]
+            }
+        ],
+        "DOC 1": [
+            {
+                "LE": makeMeeting("TuTh 9:30a-10:50a"),
+                "DI": [makeMeeting("M 9:00a-9:50a"),
+                       makeMeeting("W 12:00p-12:50p")],
+                "FI": {"date": "12/06/2016",
+                       "time": ClassTime.fromString("Tu 11:30a-2:29p"),
+                       "building": "CENTR", "room": "101"}
+            },
+            {
+                "LE": makeMeeting("MWF 8:00a-8:50a")
+            }
+        ]
+    }
+
+def referenceFitness(schedule, individual):
+    """
+    The original, unoptimized fitness calculation used to check the
+    precomputed fitness tables.
+    """
+    fitness = 0
+
+    for course, meetings in individual.items():
+        meetingInfo = schedule[course][meetings["LE"]]
+        final = meetingInfo["FI"]["time"] if "FI" in meetingInfo else None
+
+        for meetingType, meeting in meetings.items():
+            item = meetingInfo[meetingType]
+
+            if meetingType != "LE":
+                item = item[meeting]
+
+            for course2, meetings2 in individual.items():
+                for meetingType2, meeting2 in meetings2.items():
+                    meetingInfo2 = schedule[course2][meetings2["LE"]]
+                    item2 = meetingInfo2[meetingType2]
+
+                    if meetingType2 != "LE":
+                        item2 = item2[meeting2]
+
+                    if not item["time"].conflictsWith(item2["time"]):
+                        fitness += 1
+
+                    if final is not None and "FI" in meetingInfo2:
+                        final2 = meetingInfo2["FI"]["time"]
+
+                        if not final.conflictsWith(final2):
+                            fitness += 1
+
+                            if not final.isOnDay(final2.days):
+                                fitness += 1
+
+                    if not item["time"].isOnDay(item2["time"].days):
+                        fitness += 1
+
+                        if (abs(item["time"].startTime
+                                - item2["time"].startTime) <= MAX_GAP):
+                            fitness += 1
+
+            if item["time"].isTimeAfter(TIME_EARLIEST):
+                fitness += 1
+
+            if item["time"].isTimeBefore(TIME_LATEST):
+                fitness += 1
+
+            if not item["time"].conflictsWith(TIME_LUNCH):
+                fitness += 1
+
+        if final is not None:
+            if final.isTimeAfter(TIME_EARLIEST):
+                fitness += 1
+
+            if final.isTimeBefore(TIME_LATEST):
+                fitness += 1
+
+    return fitness
+
+class AlgorithmTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+
+        self.schedule = makeSchedule()
+        self.algorithm = Algorithm(self.schedule)
+
+    def testChromosomes(self):
+        chromosomes = self.algorithm.chromosomes
+
+        self.assertEqual(len(chromosomes["CSE 12"]), 2 + 1 * 2)
+        self.assertEqual(len(chromosomes["CSE 15L"]), 3)
+        self.assertEqual(len(chromosomes["DOC 1"]), 2 + 1)
+
+    def testToDict(self):
+        self.assertEqual(self.algorithm.table.courses,
+                         ["CSE 12", "CSE 15L", "DOC 1"])
+        self.assertEqual(self.algorithm.toDict([3, 1, 2]), {
+            "CSE 12": {"LE": 1, "DI": 0, "LA": 1},
+            "CSE 15L": {"LE": 0, "LA": 1},
+            "DOC 1": {"LE": 1}
+        })
+
+    def testGetFitness(self):
+        sizes = [len(self.algorithm.chromosomes[code])
+                 for code in self.algorithm.table.courses]
+
+        for genes in itertools.product(*[range(size) for size in sizes]):
+            self.assertEqual(self.algorithm.getFitness(genes),
+                             referenceFitness(self.schedule,
+                                              self.algorithm.toDict(genes)))
+
+    def testIndividual(self):
+        individual = self.algorithm.createIndividual([3, 1, 2])
+        copy = pickle.loads(pickle.dumps(individual))
+
+        self.assertEqual(list(copy), [3, 1, 2])
+        self.assertEqual(copy.fitness, individual.fitness)
+        self.assertEqual(copy.contributions, individual.contributions)
+
+        copy = individual.copy()
+        self.algorithm.setGene(copy, 0, 0)
+
+        self.assertEqual(list(individual), [3, 1, 2])
+        self.assertEqual(list(copy), [0, 1, 2])
+        self.assertEqual(copy.fitness, self.algorithm.getFitness((0, 1, 2)))
+
+    def testLargeChromosome(self):
+        # A single lecture with 400 x 240 sections has more genes than fit in
+        # two bytes.
+        schedule = synthetic.generateSchedule(2, 1, {"DI": 400, "LA": 240},
+                                              seed=0)
+        algorithm = Algorithm(schedule)
+
+        self.assertEqual(len(algorithm.chromosomes[list(schedule)[0]]),
+                         96000)
+        self.assertEqual(algorithm.geneType, "I")
+
+        algorithm.initiate(4, 0.5, 0.5, 0.25)
+        algorithm.evolve()
+
+        individual = algorithm.createIndividual([95999, 65536])
+        copy = pickle.loads(pickle.dumps(individual.copy()))
+
+        self.assertEqual(list(copy), [95999, 65536])
+        self.assertEqual(copy.typecode, "I")
+        self.assertRaises(ValueError, getGeneType, (1 << 64) + 1)
+
+    def testIncrementalFitness(self):
+        self.algorithm.initiate(16, 0.5, 0.2, 0.1)
+
+        for i in range(8):
+            self.algorithm.evolve()
+
+            for individual in self.algorithm.population:
+                self.assertEqual(individual.fitness,
+                                 referenceFitness(self.schedule,
+                                                  self.algorithm.toDict(
+                                                      individual)))
+                self.assertEqual(list(individual.contributions),
+                                 self.algorithm.table.getContributions(
+                                     individual))
+
+    def testSelection(self):
+        self.algorithm.initiate(4, 0.02, 0.01, 0.1)
+        self.algorithm.fitness = [0, 1, 0, 3]
+        self.algorithm.cumulative = [0, 1, 1, 4]
+        self.algorithm.fitnessSum = 4.0
+        population = self.algorithm.population
+
+        for i in range(32):
+            self.assertIn(self.algorithm.selectRoulette(),
+                          [population[1], population[3]])
+
+        selected = self.algorithm.selectUniversal(8)
+
+        self.assertEqual(sum(1 for x in selected if x is population[1]), 2)
+        self.assertEqual(sum(1 for x in selected if x is population[3]), 6)
+
+        self.algorithm.tournamentSize = 64
+        self.algorithm.selection = SELECTION_TOURNAMENT
+
+        self.assertIs(self.algorithm.selectParents(1)[0], population[3])
+
+    def testEvolveSelection(self):
+        for selection in (SELECTION_ROULETTE, SELECTION_SUS,
+                          SELECTION_TOURNAMENT):
+            self.algorithm.initiate(16, 0.5, 0.1, 0.1, selection)
+
+            for i in range(4):
+                self.algorithm.evolve()
+
+            self.assertEqual(len(self.algorithm.population), 16)
+            self.assertEqual(self.algorithm.cumulative[-1],
+                             self.algorithm.getTotalFitness())
+
+    def testRun(self):
+        self.algorithm.initiate(16, 0.02, 0.01, 0.1)
+        fittest = self.algorithm.run(8)
+
+        self.assertEqual(self.algorithm.generation, 8)
+        self.assertEqual(self.algorithm.stopReason, STOP_GENERATIONS)
+        self.assertEqual(self.algorithm.evaluations, 16 * 9)
+        self.assertGreaterEqual(fittest.fitness,
+                                self.algorithm.getHighestFitness())
+
+        self.algorithm.run(1000, plateau=4)
+
+        self.assertEqual(self.algorithm.stopReason, STOP_PLATEAU)
+        self.assertLess(self.algorithm.generation, 1000)
+
+        fittest = self.algorithm.run(8, target=0)
+
+        self.assertEqual(self.algorithm.generation, 0)
+        self.assertEqual(self.algorithm.stopReason, STOP_TARGET)
+        self.assertEqual(fittest.fitness, self.algorithm.getHighestFitness())
+
+        self.algorithm.run(8, maxEvaluations=self.algorithm.evaluations + 32)
+
+        self.assertEqual(self.algorithm.generation, 2)
+        self.assertEqual(self.algorithm.stopReason, STOP_EVALUATIONS)
+
+        self.algorithm.run(8, timeBudget=0)
+
+        self.assertEqual(self.algorithm.generation, 0)
+        self.assertEqual(self.algorithm.stopReason, STOP_TIME)
+
+    def testTopIndividuals(self):
+        self.algorithm.initiate(16, 0.5, 0.5, 0.1)
+        self.assertEqual(self.algorithm.getTopIndividuals(), [])
+
+        fittest = self.algorithm.run(16, top=5)
+        ranked = self.algorithm.getTopIndividuals()
+        keys = [tuple(individual) for individual, _ in ranked]
+
+        self.assertEqual(len(ranked), 5)
+        self.assertEqual(len(set(keys)), 5)
+        self.assertEqual(ranked[0][1], fittest.fitness)
+        self.assertEqual([fitness for _, fitness in ranked],
+                         sorted((fitness for _, fitness in ranked),
+                                reverse=True))
+
+        for individual, fitness in ranked:
+            self.assertEqual(fitness, self.algorithm.table.getFitness(
+                                          individual))
+
+    def testRanking(self):
+        ranking = Ranking(2)
+        ranking.add((0,), 5, "a")
+        ranking.add((0,), 5, "a")
+        ranking.add((1,), 3, "b")
+
+        self.assertFalse(ranking.accepts(3))
+        self.assertTrue(ranking.add((2,), 7, "c"))
+        self.assertFalse(ranking.add((3,), 5, "d"))
+        self.assertEqual(ranking.getRanked(), [("c", 7), ("a", 5)])
+        self.assertNotIn((1,), ranking)
+
+    def testComparisons(self):
+        calls = []
+        methods = ("conflictsWith", "isOnDay", "isTimeAfter", "isTimeBefore")
+        originals = {name: getattr(ClassTime, name) for name in methods}
+
+        def count(name):
+            def method(self, *args):
+                calls.append(name)
+
+                return originals[name](self, *args)
+
+            return method
+
+        # Count every call to the ClassTime comparison methods while the
+        # table scores every gene and checks every gene for conflicts.
+        try:
+            for name in methods:
+                setattr(ClassTime, name, count(name))
+
+            table = Algorithm(makeSchedule()).table
+            built = len(calls), table.comparisons
+
+            for i in range(len(table.courses)):
+                table.getUnaryScores(i)
+
+                for gene in range(len(table.chromosomes[i])):
+                    table.hasConflict(i, gene, i, gene)
+
+                for j in range(i + 1, len(table.courses)):
+                    table.getPairScores(i, j)
+        finally:
+            for name in methods:
+                setattr(ClassTime, name, originals[name])
+
+        self.assertEqual(built[1], built[0])
+        self.assertGreater(len(calls), built[0])
+        self.assertEqual(table.comparisons, len(calls))
+
+    def testSharedSlots(self):
+        schedule = {
+            "CSE 12": [
+                {
+                    "LE": makeMeeting("MWF 10:00a-10:50a"),
+                    "DI": [makeMeeting("M 3:00p-3:50p"),
+                           makeMeeting("MWF 10:00a-10:50a")],
+                    "LA": [makeMeeting("M 3:00p-3:50p"),
+                           makeMeeting("Th 9:00a-10:50a")]
+                }
+            ]
+        }
+        algorithm = Algorithm(schedule)
+        table = algorithm.table
+
+        # Meetings at the same time share a slot, but still conflict.
+        self.assertEqual(len(table.slots[0]), 3)
+
+        for gene in range(len(table.chromosomes[0])):
+            individual = algorithm.toDict([gene])
+
+            self.assertEqual(algorithm.getFitness([gene]),
+                             referenceFitness(schedule, individual))
+            self.assertEqual(table.hasConflict(0, gene, 0, gene),
+                             hasConflict(schedule, individual))
+
+    def testRunStats(self):
+        stats = RunStats(profile=True)
+        algorithm = Algorithm(makeSchedule(), stats=stats)
+        algorithm.initiate(16, 0.02, 0.01, 0.1)
+        algorithm.run(8)
+
+        self.assertIn(PHASE_TABLE, stats.timings)
+        self.assertEqual(stats.calls[PHASE_SELECTION], 8)
+        self.assertEqual(stats.calls[PHASE_FITNESS], 8)
+        self.assertEqual(stats.counters[COUNTER_EVALUATIONS], 16 * 9)
+        self.assertEqual(stats.counters[COUNTER_GENERATIONS], 8)
+        self.assertGreater(stats.counters[COUNTER_COMPARISONS], 0)
+        self.assertEqual([entry[0] for entry in stats.trace], list(range(9)))
+        self.assertEqual(stats.trace[-1][1], algorithm.getHighestFitness())
+        self.assertIn("evolve", stats.getProfile())
+        self.assertEqual(json.loads(json.dumps(stats.toDict()))["counters"],
+                         stats.counters)
+
+        # Nothing is recorded without a stats object.
+        self.algorithm.initiate(16, 0.02, 0.01, 0.1)
+        self.algorithm.run(2)
+
+        self.assertIsNone(self.algorithm.stats)
+
+    def testEvolve(self):
+        self.algorithm.initiate(16, 0.02, 0.01, 0.1)
+
+        for i in range(8):
+            self.algorithm.evolve()
+
+        self.assertEqual(len(self.algorithm.population), 16)
+        self.assertEqual(self.algorithm.getHighestFitness(),
+                         max(self.algorithm.fitness))
+        self.assertEqual(self.algorithm.getTotalFitness(),
+                         sum(self.algorithm.fitness))
+
+class ChromosomeTest(unittest.TestCase):
+    def testGenes(self):
+        lectures = makeSchedule()["CSE 12"]
+        chromosome = Chromosome(lectures)
+        expected = []
+
+        for index, lecture in enumerate(lectures):
+            types = [meetingType for meetingType in lecture
+                     if meetingType != "LE" and meetingType != "FI"]
+
+            for sections in itertools.product(*[range(len(lecture[t]))
+                                                for t in types]):
+                expected.append((index,) + sections)
+
+        self.assertEqual(len(chromosome), len(expected))
+        self.assertEqual([chromosome[i] for i in range(len(chromosome))],
+                         expected)
+
+        for i in range(len(chromosome)):
+            self.assertEqual(chromosome.getIndex(chromosome[i]), i)
+
+        self.assertRaises(IndexError, chromosome.__getitem__, len(expected))
+
+    def testLargeGeneSpace(self):
+        lecture = {
+            "LE": makeMeeting("MWF 10:00a-10:50a"),
+            "DI": [makeMeeting("M 3:00p-3:50p")] * 20,
+            "LA": [makeMeeting("Tu 8:00a-8:50a")] * 12,
+            "ST": [makeMeeting("W 1:00p-1:50p")] * 10
+        }
+        chromosome = Chromosome([lecture] * 8)
+
+        self.assertEqual(len(chromosome), 8 * 20 * 12 * 10)
+        self.assertEqual(chromosome[len(chromosome) - 1], (7, 19, 11, 9))
+        self.assertEqual(chromosome.getGene(2401),
+                         {"LE": 1, "DI": 0, "LA": 0, "ST": 1})
+
+def hasConflict(schedule, individual):
+    times = []
+
+    for course, meetings in individual.items():
+        lecture = schedule[course][meetings["LE"]]
+
+        for meetingType, meeting in meetings.items():
+            item = lecture[meetingType]
+
+            if meetingType != "LE":
+                item = item[meeting]
+
+            times.append(item["time"])
+
+    for i in range(len(times)):
+        for j in range(i + 1, len(times)):
+            if times[i].conflictsWith(times[j]):
+                return True
+
+    return False
+
+class ExactSolverTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = makeSchedule()
+        self.algorithm = Algorithm(self.schedule)
+        self.space = list(itertools.product(
+            *[range(len(self.algorithm.chromosomes[code]))
+              for code in self.algorithm.table.courses]))
+
+    def testSolve(self):
+        solver = ExactSolver(self.algorithm.table, True)
+        genes = solver.solve()
+
+        self.assertEqual(solver.fitness,
+                         max(self.algorithm.getFitness(genes)
+                             for genes in self.space))
+        self.assertEqual(self.algorithm.getFitness(genes), solver.fitness)
+
+    def testSolveWithoutConflicts(self):
+        solver = ExactSolver(self.algorithm.table)
+        genes = solver.solve()
+        best = max(self.algorithm.getFitness(genes) for genes in self.space
+                   if not hasConflict(self.schedule,
+                                      self.algorithm.toDict(genes)))
+
+        self.assertFalse(hasConflict(self.schedule,
+                                     self.algorithm.toDict(genes)))
+        self.assertEqual(solver.fitness, best)
+        self.assertEqual(self.algorithm.getFitness(genes), best)
+
+    def testRanked(self):
+        solver = ExactSolver(self.algorithm.table, True, results=3)
+        genes = solver.solve()
+        ranked = sorted((self.algorithm.getFitness(genes)
+                         for genes in self.space), reverse=True)[:3]
+
+        self.assertEqual([fitness for genes, fitness in solver.getRanked()],
+                         ranked)
+        self.assertEqual(solver.getRanked()[0], (genes, solver.fitness))
+        self.assertEqual(len(set(tuple(genes) for genes, fitness
+                                 in solver.getRanked())), 3)
+
+    def testSelectStrategy(self):
+        table = self.algorithm.table
+
+        self.assertEqual(getSearchSpace(table), len(self.space))
+        self.assertEqual(selectStrategy(table), STRATEGY_EXACT)
+        self.assertEqual(selectStrategy(table, len(self.space) - 1),
+                         STRATEGY_GENETIC)
+
+class BatchSolverTest(unittest.TestCase):
+    def testSubTable(self):
+        schedule = makeSchedule()
+        table = Algorithm(schedule).table
+        courses = ["DOC 1", "CSE 12"]
+        algorithm = Algorithm({code: schedule[code] for code in courses},
+                              table=table.getSubTable(courses))
+
+        self.assertEqual(algorithm.table.courses,
+                         [code for code in table.courses if code in courses])
+
+        for genes in itertools.product(*(range(len(algorithm.chromosomes[code]))
+                                         for code in algorithm.table.courses)):
+            self.assertEqual(algorithm.getFitness(genes),
+                             referenceFitness(schedule,
+                                              algorithm.toDict(genes)))
+
+    def testAddCourses(self):
+        schedule = makeSchedule()
+        chromosomes = {code: Chromosome(lectures)
+                       for code, lectures in schedule.items()}
+        codes = list(schedule)
+        table = FitnessTable(schedule, {code: chromosomes[code]
+                                        for code in codes[:1]})
+        table.getUnaryScores(0)
+        subTable = table.getSubTable(codes[:1])
+        table.addCourses(schedule, {code: chromosomes[code]
+                                    for code in codes[1:]})
+
+        # The new courses go after the old ones, and older sub-tables keep
+        # their courses.
+        self.assertEqual(table.courses, codes)
+        self.assertEqual(subTable.courses, codes[:1])
+
+        algorithm = Algorithm(schedule, table=table)
+
+        for genes in itertools.product(*(range(len(chromosomes[code]))
+                                         for code in codes)):
+            self.assertEqual(algorithm.getFitness(genes),
+                             referenceFitness(schedule,
+                                              algorithm.toDict(genes)))
+
+    def testCreateSolver(self):
+        schedule = makeSchedule()
+        algorithm, solver = createSolver(schedule, 2)
+
+        self.assertEqual(solver.results, 2)
+        self.assertIs(solver.table, algorithm.table)
+
+        # An existing table is shared, and large problems are left to the
+        # genetic algorithm.
+        self.assertIs(createSolver(schedule, 2, algorithm.table)[0].table,
+                      algorithm.table)
+        self.assertIsNone(createSolver(synthetic.generateSchedule(8, seed=0),
+                                       2)[1])
+
+    def testValidatePreferences(self):
+        validatePreferences(None)
+        validatePreferences({"capacity": 8, "mutateRate": 0.5,
+                             "plateau": None, "selection": "sus",
+                             "seed": 1})
+
+        for preferences in ([], {"unknown": 1}, {"capacity": "8"},
+                            {"capacity": 0}, {"generations": True},
+                            {"mutateRate": "0.1"}, {"elitism": 2},
+                            {"crossoverRate": float("nan")},
+                            {"plateau": 1.5}, {"selection": "best"},
+                            {"seed": "0"}):
+            self.assertRaises(ValueError, validatePreferences, preferences)
+
+    def testSolve(self):
+        with BatchSolver(2) as solver:
+            solver.schedules["FA16"] = makeSchedule()
+            requests = [("FA16", ["CSE 12", "CSE 15L"], None),
+                        ("fa16", ["cse 12", "DOC 1"], {"results": 2})]
+            results = solver.solve(requests)
+            pool = solver.pool
+
+            # Courses retrieved after the workers started are sent along with
+            # the requests that need them, to the same workers.
+            solver.schedules["WI17"] = makeSchedule()
+            requests.append(("WI17", ["CSE 15L", "DOC 1"], None))
+            results = solver.solve(requests)
+
+            self.assertIs(solver.pool, pool)
+
+        self.assertIsNone(solver.pool)
+
+        # Requests without courses are turned away before reaching a worker.
+        with BatchSolver(1) as solver:
+            self.assertRaises(ValueError, solver.solve, [("SP17", [], None)])
+            self.assertIsNone(solver.pool)
+
+        for (term, courses, preferences), result in zip(requests, results):
+            schedule, fitness = result[0]
+
+            self.assertEqual(set(schedule),
+                             set(course.upper() for course in courses))
+            self.assertEqual(fitness, referenceFitness(makeSchedule(),
+                                                       schedule))
+
+class IslandModelTest(unittest.TestCase):
+    def testRun(self):
+        schedule = makeSchedule()
+        model = IslandModel(schedule, 2, interval=3, migrants=2, seed=0)
+        finished = []
+        fittest = model.run(8, 8, 0.02, 0.01, 0.25, finished.append)
+
+        self.assertEqual(finished, [3, 6, 8])
+        self.assertEqual(len(fittest), len(schedule))
+        self.assertEqual(model.fitness,
+                         referenceFitness(schedule,
+                                          Algorithm(schedule).toDict(fittest)))
+
+    def testStats(self):
+        stats = RunStats()
+        model = IslandModel(makeSchedule(), 2, interval=3, seed=0,
+                            stats=stats)
+        model.run(8, 8, 0.02, 0.01, 0.25)
+
+        # One entry for each migration, and the initial populations are
+        # counted along with every generation of every island.
+        self.assertEqual([entry[0] for entry in stats.trace], [3, 6, 8])
+        self.assertEqual(stats.trace[-1][1], model.fitness)
+        self.assertEqual(stats.counters[COUNTER_GENERATIONS], 8)
+        self.assertGreaterEqual(stats.counters[COUNTER_EVALUATIONS],
+                                2 * 8 * 9)
+
+    def testTopIndividuals(self):
+        model = IslandModel(makeSchedule(), 2, interval=3, seed=0, results=3)
+        fittest = model.run(8, 8, 0.02, 0.01, 0.25)
+        ranked = model.getTopIndividuals()
+
+        self.assertLessEqual(len(ranked), 3)
+        self.assertEqual(list(ranked[0][0]), list(fittest))
+        self.assertEqual(ranked[0][1], model.fitness)
+        self.assertEqual([fitness for individual, fitness in ranked],
+                         sorted((fitness for individual, fitness in ranked),
+                                reverse=True))
+
+class VectorAlgorithmTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = makeSchedule()
+        self.algorithm = VectorAlgorithm(self.schedule, 0)
+
+    def testSharedTable(self):
+        table = self.algorithm.table
+        algorithm = VectorAlgorithm(self.schedule, 0, table=table)
+
+        self.assertIs(algorithm.table, table)
+
+        for i in range(len(table.courses)):
+            self.assertEqual(list(algorithm.unary[i]),
+                             list(self.algorithm.unary[i]))
+
+    def testGetPopulationFitness(self):
+        self.algorithm.initiate(32, 0.02, 0.01, 0.1)
+
+        for genes, fitness in zip(self.algorithm.population,
+                                  self.algorithm.fitness):
+            individual = self.algorithm.toDict(genes)
+
+            self.assertEqual(fitness,
+                             referenceFitness(self.schedule, individual))
+            self.assertEqual(self.algorithm.getIndividual(genes).fitness,
+                             fitness)
+
+    def testEmptySelection(self):
+        for selection in (SELECTION_ROULETTE, SELECTION_SUS,
+                          SELECTION_TOURNAMENT):
+            # Nothing is picked when the elites fill the whole population.
+            self.algorithm.initiate(4, 0.5, 0.1, 1.0, selection)
+            self.assertEqual(len(self.algorithm.select(0)), 0)
+            self.algorithm.evolve()
+            self.assertEqual(len(self.algorithm.population), 4)
+
+            self.algorithm.initiate(0, 0.5, 0.1, 0.25, selection)
+            self.assertEqual(self.algorithm.fitnessSum, 0)
+            self.algorithm.evolve()
+            self.assertEqual(len(self.algorithm.population), 0)
+
+    def testSelection(self):
+        for selection in (SELECTION_ROULETTE, SELECTION_SUS,
+                          SELECTION_TOURNAMENT):
+            self.algorithm.initiate(32, 0.5, 0.1, 0.25, selection)
+
+            for i in range(4):
+                self.algorithm.evolve()
+
+            self.assertEqual(self.algorithm.population.shape, (32, 3))
+
+    def testEvolve(self):
+        self.algorithm.initiate(32, 0.5, 0.1, 0.25)
+        highest = self.algorithm.getHighestFitness()
+
+        for i in range(8):
+            self.algorithm.evolve()
+
+            # Elitism means the best individual is never lost.
+            self.assertGreaterEqual(self.algorithm.getHighestFitness(),
+                                    highest)
+            highest = self.algorithm.getHighestFitness()
+
+        self.assertEqual(self.algorithm.population.shape, (32, 3))
+        self.assertTrue((self.algorithm.population
+                         < self.algorithm.geneCounts).all())
+        self.assertEqual(self.algorithm.getFitness(
+                             self.algorithm.getFittest()), highest)
+
+    def testTopIndividuals(self):
+        self.algorithm.initiate(32, 0.5, 0.1, 0.25)
+        self.algorithm.run(8, top=4)
+        ranked = self.algorithm.getTopIndividuals()
+
+        self.assertEqual(len(set(tuple(individual)
+                                 for individual, _ in ranked)), 4)
+        self.assertEqual(ranked[0][1], self.algorithm.getHighestFitness())
+
+        for individual, fitness in ranked:
+            self.assertEqual(individual.fitness, fitness)
+
+if __name__ == "__main__":
+    unittest.main()
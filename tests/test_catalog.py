@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import tempfile
+import unittest
+
+import synthetic
+
+from catalog import Catalog
+from classtime import ClassTime
+from synthetic import describe
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.catalog = Catalog(os.path.join(self.directory.name,
+                                            "catalog.sqlite3"))
+        self.schedule = synthetic.generateSchedule(8, 3, {"DI": 2, "LA": 2},
+                                                   seed=0)
+
+    def tearDown(self):
+        self.catalog.close()
+        self.directory.cleanup()
+
+    def testRoundTrip(self):
+        self.catalog.store("FA16", self.schedule)
+        courses = list(reversed(list(self.schedule)))
+        result = self.catalog.getCourses("fa16", courses + ["MISSING 1"])
+
+        # Courses come back in the order they were asked for, with the
+        # meeting types of each lecture in their original order.
+        self.assertEqual(list(result), courses)
+        self.assertEqual(describe(result),
+                         describe({course: self.schedule[course]
+                                   for course in courses}))
+
+        for course in courses:
+            for lecture, original in zip(result[course],
+                                         self.schedule[course]):
+                self.assertEqual(list(lecture), list(original))
+
+        self.assertEqual(self.catalog.getCourses("WI17", courses), {})
+        self.assertEqual(self.catalog.getTerms(), ["FA16"])
+
+    def testReplace(self):
+        course = list(self.schedule)[0]
+        self.catalog.store("FA16", self.schedule)
+        self.catalog.store("FA16", {course: self.schedule[course][:1]})
+
+        result = self.catalog.getCourses("FA16", list(self.schedule))
+
+        self.assertEqual(len(result[course]), 1)
+        self.assertEqual(len(result), len(self.schedule))
+
+        # Replacing a department also removes its courses that are gone.
+        department = course.split()[0]
+        self.catalog.store("FA16", {course: self.schedule[course]},
+                           [department.lower()])
+        result = self.catalog.getCourses("FA16", list(self.schedule))
+
+        self.assertEqual(sorted(result),
+                         sorted(code for code in self.schedule
+                                if code == course or
+                                code.split()[0] != department))
+        self.assertEqual(len(result[course]), len(self.schedule[course]))
+
+    def testMissingValues(self):
+        schedule = {
+            "CSE 11": [{
+                "LE": {"sectionID": "A00",
+                       "time": ClassTime.fromString("MWF 10:00a-10:50a"),
+                       "building": "CENTR", "room": "101",
+                       "instructor": "Staff"},
+                "DI": [{"sectionID": "A01", "time": None, "building": "TBA",
+                        "room": "TBA", "instructor": ""}],
+                "FI": {"date": "12/05/2016", "time": None, "building": "TBA",
+                       "room": "TBA"}
+            }],
+            "CSE 12": []
+        }
+        self.catalog.store("FA16", schedule)
+
+        self.assertEqual(describe(self.catalog.getCourses("FA16",
+                                                          list(schedule))),
+                         describe(schedule))
+
+    def testSearch(self):
+        schedule = {
+            "CSE 11": [{"LE": {"sectionID": "A00",
+                               "time": ClassTime.fromString(
+                                   "TuTh 9:30a-10:50a"),
+                               "building": "CENTR", "room": "101",
+                               "instructor": "Smith, A"}}],
+            "CSE 12": [{"LE": {"sectionID": "A00",
+                               "time": ClassTime.fromString(
+                                   "MWF 2:00p-2:50p"),
+                               "building": "CENTR", "room": "101",
+                               "instructor": "Jones, B"}}]
+        }
+        self.catalog.store("FA16", schedule)
+
+        self.assertEqual(self.catalog.search("FA16"), ["CSE 11", "CSE 12"])
+        self.assertEqual(self.catalog.search("FA16", instructor="Jones, B"),
+                         ["CSE 12"])
+        self.assertEqual(self.catalog.search("FA16", days="TuTh"),
+                         ["CSE 11"])
+        self.assertEqual(self.catalog.search("FA16", startAfter=12 * 60),
+                         ["CSE 12"])
+        self.assertEqual(self.catalog.search("FA16", days="MWF",
+                                             startBefore=12 * 60), [])
+
+if __name__ == "__main__":
+    unittest.main()
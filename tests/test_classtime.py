@@ -5,6 +5,7 @@ import os
 
 sys.path.insert(0, os.path.abspath(__file__ + "/../.."))
 
+import threading
 import unittest
 
 from tritonscheduler.classtime import ClassTime
@@ -127,6 +128,31 @@ class ClassTimeTest(unittest.TestCase):
         self.assertTrue(time.isOnDay("Tu"))
         self.assertTrue(time.isOnDay("Th"))
 
+    def testDayMask(self):
+        time = ClassTime.fromString("MWF 12:00a-12:00p")
+
+        self.assertEqual(time.dayMask, 1 | 4 | 16)
+        self.assertTrue(time.isOnDay(4))
+        self.assertFalse(time.isOnDay(2 | 8))
+        self.assertTrue(time.isOnDay("TuW"))
+
+        time = ClassTime.fromString("SSu 12:00a-12:00p")
+
+        self.assertEqual(time.dayMask, 32 | 64)
+        self.assertTrue(time.isOnDay("Su"))
+        self.assertFalse(time.isOnDay("M"))
+
+        # Times from strings are shared, so they cannot be changed.
+        self.assertRaises(AttributeError, setattr, time, "days", "TuTh")
+
+        time = ClassTime()
+        time.setTimes("12:00a", "12:00p")
+        time.days = "TuTh"
+
+        self.assertEqual(time.days, "TuTh")
+        self.assertEqual(time.dayMask, 2 | 8)
+        self.assertEqual(time.toString(), "TuTh 12:00a-12:00p")
+
     def testConflictsWith(self):
         time = ClassTime.fromString("MWF 3:00p-3:50p")
         time2 = ClassTime.fromString("MWF 3:00p-3:50p")
@@ -259,5 +285,71 @@ class ClassTimeTest(unittest.TestCase):
         self.assertEqual(time.startTime, time2.startTime)
         self.assertEqual(time.finishTime, time2.finishTime)
 
+    def testFromValues(self):
+        time = ClassTime.fromString("TuTh 9:30a-10:50a")
+        time2 = ClassTime.fromValues(time.days, time.start, time.finish,
+                                     time.startTime, time.finishTime)
+
+        self.assertEqual(time.days, time2.days)
+        self.assertEqual(time.start, time2.start)
+        self.assertEqual(time.finish, time2.finish)
+        self.assertEqual(time.startTime, time2.startTime)
+        self.assertEqual(time.finishTime, time2.finishTime)
+        self.assertEqual(time.dayMask, time2.dayMask)
+        self.assertTrue(time.conflictsWith(time2))
+
+    def testFromStringCache(self):
+        time = ClassTime.fromString("MWF 10:00a-10:50a")
+
+        self.assertIs(ClassTime.fromString("MWF 10:00a-10:50a"), time)
+        self.assertTrue(time.frozen)
+        self.assertRaises(AttributeError, time.setStart, "11:00a")
+        self.assertIsNone(ClassTime.fromString("TBA"))
+        self.assertIsNone(ClassTime.fromString("TBA"))
+
+    def testEquality(self):
+        time = ClassTime.fromString("MWF 10:00a-10:50a")
+        time2 = ClassTime()
+        time2.days = "MWF"
+        time2.setTimes("10:00a", "10:50a")
+        time3 = ClassTime.fromString("MW 10:00a-10:50a")
+
+        self.assertEqual(time, time2)
+        self.assertNotEqual(time, time3)
+        self.assertNotEqual(time, "MWF 10:00a-10:50a")
+        self.assertRaises(TypeError, hash, time2)
+
+        time2.freeze()
+
+        self.assertEqual(hash(time), hash(time2))
+        self.assertEqual(len(set([time, time2, time3])), 2)
+
+    def testFromStringThreads(self):
+        # More strings than the cache holds, so threads evict each other's
+        # entries while they use them.
+        dates = [days + " " + str(hour) + ":" + str(minute).zfill(2) +
+                 "a-11:00p" for days in ("M", "Tu", "W", "Th", "F", "S",
+                                        "MWF") for hour in range(1, 13)
+                 for minute in range(60)]
+        errors = []
+
+        def parse():
+            try:
+                for i in range(3):
+                    for date in dates:
+                        ClassTime.fromString(date)
+            except Exception as exception:
+                errors.append(exception)
+
+        threads = [threading.Thread(target=parse) for i in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
 if __name__ == "__main__":
     unittest.main() 
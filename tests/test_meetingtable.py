@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import unittest
+
+import synthetic
+
+from classtime import ClassTime
+from meetingtable import MeetingTable
+from meetingtable import SECTION_LECTURE
+
+class MeetingTableTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = synthetic.generateSchedule(6, 3, {"DI": 3, "LA": 2},
+                                                   seed=0)
+        self.table = MeetingTable(self.schedule)
+
+    def testRows(self):
+        # Each lecture has a lecture meeting and five sections.
+        self.assertEqual(len(self.table), 6 * 3 * 6)
+
+        course = self.table.courses[2]
+        rows = self.table.getRows(course, "DI", 1)
+        sections = self.schedule[course][1]["DI"]
+
+        self.assertEqual(len(rows), len(sections))
+
+        for row, section in zip(rows, sections):
+            self.assertIs(self.table.meetings[row], section)
+            self.assertEqual(self.table.startTime[row],
+                             section["time"].startTime)
+
+        row = self.table.getRows(course, "LE", 1)[0]
+
+        self.assertEqual(self.table.section[row], SECTION_LECTURE)
+        self.assertIs(self.table.meetings[row],
+                      self.schedule[course][1]["LE"])
+
+    def testConflicts(self):
+        times = [meeting["time"] for meeting in self.table.meetings]
+        time = ClassTime.fromString("TuTh 11:00a-12:20p")
+
+        self.assertEqual(list(self.table.getConflicts(time)),
+                         [time.conflictsWith(time2) for time2 in times])
+        self.assertEqual(list(self.table.getRowConflicts(5)),
+                         [times[5].conflictsWith(time2) for time2 in times])
+
+        matrix = self.table.getConflictMatrix()
+
+        self.assertEqual(matrix.shape, (len(times), len(times)))
+        self.assertEqual(matrix.tolist(),
+                         [[time.conflictsWith(time2) for time2 in times]
+                          for time in times])
+
+        lectures = self.table.getRows(meetingType="LE")
+        sections = self.table.getRows(meetingType="DI")
+
+        self.assertEqual(self.table.getConflictMatrix(lectures,
+                                                      sections).tolist(),
+                         [[times[i].conflictsWith(times[j]) for j in sections]
+                          for i in lectures])
+
+    def testMissingTimes(self):
+        schedule = {
+            "CSE 11": [{
+                "LE": {"sectionID": "A00",
+                       "time": ClassTime.fromString("MWF 10:00a-10:50a"),
+                       "building": "CENTR", "room": "101",
+                       "instructor": "Staff"},
+                "DI": [{"sectionID": "A01", "time": None, "building": "TBA",
+                        "room": "TBA", "instructor": ""}],
+                "FI": {"date": "12/05/2016",
+                       "time": ClassTime.fromString("M 8:00a-10:59a"),
+                       "building": "TBA", "room": "TBA"}
+            }]
+        }
+        table = MeetingTable(schedule)
+
+        self.assertEqual(len(table), 1)
+        self.assertEqual(len(MeetingTable({})), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,86 @@
 import sys
 import os
 
-sys.path.insert(0, os.path.abspath(__file__ + "/../.."))
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
 
+import hashlib
+import requests
+import tempfile
+import threading
 import unittest
 
-from tritonscheduler.schedule import Schedule
-from tritonscheduler.schedule import ScheduleError
+import synthetic
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+from catalog import Catalog
+from catalog import ingest
+from classparser import ClassParser
+from classparser import ClassParserError
+from connection import Connection
+from coursecache import CourseCache
+from schedule import Schedule
+from schedule import ScheduleError
+from synthetic import describe
+
+# The generated courses served by the stand-in Schedule of Classes.
+COURSES = synthetic.generateCourses(5, 2, {"DI": 2}, seed=0)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves generated courses like the Schedule of Classes, only including the
+    courses in the query of the printable page.
+    """
+    requests = []
+    notModified = 0
+    failures = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        StandInHandler.requests.append(self.path)
+        body = b""
+
+        if url.path == "/print" and StandInHandler.failures > 0:
+            StandInHandler.failures -= 1
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+            return
+
+        if url.path == "/print":
+            query = parse_qs(url.query)
+
+            if "selectedSubjects" in query:
+                wanted = query["selectedSubjects"]
+                courses = [course for course in COURSES
+                           if course[0] in wanted]
+            else:
+                wanted = query["courses"][0].split("\r\n")
+                courses = [course for course in COURSES
+                           if course[0] + " " + course[1] in wanted]
+
+            body = synthetic.formatHTML(courses).encode("utf-8")
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+        if self.headers.get("If-None-Match") == etag:
+            StandInHandler.notModified += 1
+            self.send_response(304)
+            self.end_headers()
+
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
 
 class ScheduleTest(unittest.TestCase):
     def setUp(self):
@@ -56,6 +130,13 @@ class ScheduleTest(unittest.TestCase):
                          "ClassesFacultyResult.htm?tabNum=tabs-crs&selected" \
                          "Term=FA16&courses=CSE+30%0D%0ACSE+12")
 
+        self.assertEqual(self.schedule.getScheduleURL(True, ["CSE", "MATH"],
+                                                      True),
+                         "https://act.ucsd.edu/scheduleOfClasses/scheduleOf" \
+                         "ClassesFacultyResultPrint.htm?tabNum=tabs-sub&" \
+                         "selectedTerm=FA16&selectedSubjects=CSE&" \
+                         "selectedSubjects=MATH")
+
     def testRetrieve(self):
         self.schedule.courses = None
         self.schedule.term = None
@@ -83,5 +164,242 @@ class ScheduleTest(unittest.TestCase):
         self.assertEqual(len(result["CSE 12"][0]["DI"]), 1)
         self.assertEqual(len(result["CSE 12"][1]["DI"]), 1)
 
+class ShardedRetrieveTest(unittest.TestCase):
+    def setUp(self):
+        StandInHandler.requests = []
+        StandInHandler.notModified = 0
+        StandInHandler.failures = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+        self.connection = Connection(2)
+        self.schedule = self.createSchedule(self.connection)
+
+    def createSchedule(self, connection, cache=None):
+        base = "http://127.0.0.1:" + str(self.server.server_address[1])
+        schedule = Schedule(base + "/result?tabNum=tabs-crs",
+                            base + "/print?tabNum=tabs-crs", 2, 3, connection,
+                            cache)
+        schedule.term = "FA16"
+
+        return schedule
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def testShards(self):
+        self.schedule.courses = ["A", "B", "A", "C", "D", "E"]
+
+        self.assertEqual(self.schedule.getShards(),
+                         [["A", "B"], ["C", "D"], ["E"]])
+
+    def testRetrieve(self):
+        expected = synthetic.generateSchedule(5, 2, {"DI": 2}, seed=0)
+        self.schedule.courses = sorted(expected) + ["MISSING 1"]
+
+        result = self.schedule.retrieve()
+
+        # Three shards sharing a single priming request.
+        self.assertEqual(len(StandInHandler.requests), 4)
+        self.assertEqual(len([path for path in StandInHandler.requests
+                              if path.startswith("/result")]), 1)
+        self.assertEqual(describe(result), describe(expected))
+
+        # Shards without any of their courses are only an error if no shard
+        # has any.
+        self.schedule.courses = ["MISSING 1", "MISSING 2", "MISSING 3"]
+
+        self.assertRaises(ClassParserError, self.schedule.retrieve)
+
+    def testPriming(self):
+        self.schedule.courses = ["DAA 1"]
+        self.schedule.retrieve()
+        self.schedule.retrieve()
+
+        # The priming cookies are reused until they expire.
+        self.assertEqual(len(StandInHandler.requests), 3)
+
+        connection = Connection(primeTTL=0)
+        schedule = self.createSchedule(connection)
+        schedule.courses = ["DAA 1"]
+        schedule.retrieve()
+        schedule.retrieve()
+        connection.close()
+
+        self.assertEqual(len(StandInHandler.requests), 7)
+
+    def testRetry(self):
+        self.schedule.courses = ["DAA 1"]
+        StandInHandler.failures = 1
+        result = self.schedule.retrieve()
+
+        # A failed request primes again and is tried once more.
+        self.assertEqual(list(result), ["DAA 1"])
+        self.assertEqual([path.split("?")[0]
+                          for path in StandInHandler.requests],
+                         ["/result", "/print", "/result", "/print"])
+
+        StandInHandler.failures = 2
+
+        self.assertRaises(requests.HTTPError, self.schedule.retrieve)
+        self.assertEqual(len(StandInHandler.requests), 7)
+
+    def testCache(self):
+        expected = describe(synthetic.generateSchedule(5, 2, {"DI": 2},
+                                                       seed=0))
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = CourseCache(directory, 60)
+            schedule = self.createSchedule(self.connection, cache)
+            schedule.courses = ["DAA 1", "DAB 2", "MISSING 1"]
+            result = schedule.retrieve()
+
+            self.assertEqual(describe(result),
+                             {course: expected[course]
+                              for course in ("DAA 1", "DAB 2")})
+            self.assertEqual(len(StandInHandler.requests), 3)
+
+            # The shard of the missing course had nothing to parse, so it is
+            # not cached as missing.
+            self.assertIsNone(cache.get("FA16", "MISSING 1"))
+
+            # Only the courses that are not cached are loaded.
+            schedule.courses = ["DAB 2", "DAC 3", "MISSING 1"]
+            result = schedule.retrieve()
+
+            self.assertEqual(set(result), set(["DAB 2", "DAC 3"]))
+            self.assertEqual(len(StandInHandler.requests), 4)
+
+            # Its shard was parsed this time, so it is cached as missing.
+            self.assertIsNone(cache.get("FA16", "MISSING 1")["lectures"])
+
+            # Stale courses are loaded on their own, then revalidated.
+            cache.ttl = 0
+            schedule.courses = ["DAA 1", "DAB 2"]
+            schedule.retrieve()
+
+            self.assertEqual(len(StandInHandler.requests), 6)
+            self.assertEqual(StandInHandler.notModified, 0)
+
+            result = schedule.retrieve()
+
+            self.assertEqual(describe(result),
+                             {course: expected[course]
+                              for course in ("DAA 1", "DAB 2")})
+            self.assertEqual(StandInHandler.notModified, 2)
+
+            # Stale courses are used if they cannot be revalidated.
+            StandInHandler.failures = 4
+            result = schedule.retrieve()
+
+            self.assertEqual(describe(result),
+                             {course: expected[course]
+                              for course in ("DAA 1", "DAB 2")})
+            self.assertEqual(StandInHandler.failures, 0)
+
+            # Entries that cannot be loaded are not cached.
+            with open(cache.getPath("FA16", "DAA 1"), "wb") as target:
+                target.write(b"cmissing\nThing\n.")
+
+            self.assertIsNone(cache.get("FA16", "DAA 1"))
+
+    def testIngest(self):
+        expected = describe(synthetic.generateSchedule(5, 2, {"DI": 2},
+                                                       seed=0))
+
+        with tempfile.TemporaryDirectory() as directory:
+            catalog = Catalog(os.path.join(directory, "catalog.sqlite3"))
+            count = ingest(catalog, "fa16", ["DAA", "DAB", "DAC"],
+                           self.schedule)
+
+            self.assertEqual(count, 3)
+            self.assertEqual(catalog.getDepartments(), ["DAA", "DAB", "DAC"])
+
+            # Courses are read from the catalog without any more requests.
+            requests = len(StandInHandler.requests)
+            schedule = self.createSchedule(self.connection)
+            schedule.catalog = catalog
+            schedule.courses = ["DAA 1", "DAC 3", "DAD 4"]
+            result = schedule.retrieve()
+
+            self.assertEqual(describe(result),
+                             {course: expected[course]
+                              for course in ("DAA 1", "DAC 3")})
+            self.assertEqual(len(StandInHandler.requests), requests)
+
+            schedule.courses = ["DAD 4"]
+            self.assertRaises(ClassParserError, schedule.retrieve)
+
+            # Ingesting a department again removes its dropped courses.
+            catalog.store("FA16", {"DAA 9": synthetic.generateSchedule(
+                1, 1, {"DI": 1}, seed=0)["DAA 1"]})
+            ingest(catalog, "FA16", ["DAA"], self.schedule)
+
+            self.assertEqual(list(catalog.getCourses("FA16",
+                                                     ["DAA 1", "DAA 9"])),
+                             ["DAA 1"])
+
+            catalog.close()
+
+class ClassParserTest(unittest.TestCase):
+    def testMarkup(self):
+        page = ('<html><body><table>'
+                '<tr><td><h2>Computer Science (<b>CSE</b> )</h2></td></tr>'
+                '<tr><td class="crsheader"></td>'
+                '<td class="crsheader"><span> 12 </span></td>'
+                '<td class="crsheader">Data Structures</td>'
+                '<td class="crsheader">4</td></tr>'
+                '<tr class="sectxt"><td></td><td></td><td>LE</td>'
+                '<td>A00</td><td>TuTh</td><td>9:30a-10:50a</td>'
+                '<td> CENTR </td><td>101</td>'
+                '<td><a href="#">Smith,&nbsp;Ann</a></td></tr>'
+                '<tr class="nonenrtxt"><td></td><td>12345</td><td>DI</td>'
+                '<td>A01</td><td>M</td><td>4:00p-4:50p</td><td>WLH</td>'
+                '<td>2001</td><td></td></tr>'
+                '</table></body></html>')
+        parser = ClassParser()
+        parser.load(page)
+        schedule = parser.parse()
+
+        self.assertEqual(list(schedule), ["CSE 12"])
+
+        lecture = schedule["CSE 12"][0]
+
+        self.assertEqual(lecture["LE"]["building"], "CENTR")
+        self.assertEqual(lecture["LE"]["instructor"], "Smith,\xa0Ann")
+        self.assertEqual(str(lecture["LE"]["time"]), "TuTh 9:30a-10:50a")
+        self.assertEqual(lecture["DI"][0]["sectionID"], "12345")
+        self.assertEqual(lecture["DI"][0]["instructor"], "")
+        self.assertEqual(describe(dict(ClassParser().parseStream(
+            [page.encode("utf-8")]))), describe(schedule))
+
+        parser.load("")
+        self.assertRaises(ClassParserError, parser.parse)
+
+class ClassParserStreamTest(unittest.TestCase):
+    def testParseStream(self):
+        page = synthetic.generateHTML(8, 2, {"DI": 2, "LA": 1},
+                                      seed=0).encode()
+        parser = ClassParser()
+        parser.load(page)
+        expected = parser.parse()
+
+        # Courses come out one at a time however the page is split up.
+        for size in (7, 1024, len(page)):
+            chunks = (page[i:i + size] for i in range(0, len(page), size))
+            courses = list(ClassParser().parseStream(chunks))
+
+            self.assertEqual([course for course, lectures in courses],
+                             list(expected))
+            self.assertEqual(describe(dict(courses)), describe(expected))
+
+        self.assertRaises(ClassParserError, list,
+                          ClassParser().parseStream([b"<html></html>"]))
+        self.assertRaises(ClassParserError, ClassParser().parse)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import asyncio
+import json
+import tempfile
+import unittest
+
+import synthetic
+
+from service import ScheduleService
+
+# The term the generated schedule data is stored under.
+TERM = "FA16"
+
+async def sendRequest(port, method, path, body=b""):
+    """
+    Sends an HTTP request to the service and reads the whole response.
+
+    :returns: a tuple of the status code and the decoded body
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((method + " " + path + " HTTP/1.1\r\nHost: localhost\r\n"
+                  + "Content-Length: " + str(len(body)) + "\r\n\r\n")
+                 .encode("latin-1") + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+
+    if b"Transfer-Encoding: chunked" not in head:
+        return status, content
+
+    # Join the chunks of a chunked response.
+    body = b""
+
+    while True:
+        size, _, content = content.partition(b"\r\n")
+        size = int(size, 16)
+
+        if size == 0:
+            return status, body
+
+        body += content[:size]
+        content = content[size + 2:]
+
+class ScheduleServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = synthetic.generateSchedule(6, 3, {"DI": 4, "LA": 3},
+                                                   seed=0)
+        self.courses = sorted(self.schedule)
+
+    def runService(self, test):
+        async def run():
+            service = ScheduleService(2, chunk=4)
+            service.schedules[TERM] = self.schedule
+            port = await service.start("127.0.0.1", 0)
+
+            try:
+                await test(service, port)
+            finally:
+                await service.stop()
+
+        asyncio.run(run())
+
+    def testSchedule(self):
+        async def test(service, port):
+            request = {"term": "fa16", "courses": self.courses,
+                       "preferences": {"generations": 10, "results": 2,
+                                       "seed": 0}}
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             json.dumps(request).encode())
+            messages = [json.loads(line) for line in body.splitlines()]
+
+            self.assertEqual(status, 200)
+            self.assertEqual([message["generation"]
+                              for message in messages[:-1]], [4, 8, 10])
+            self.assertEqual(messages[-1]["type"], "result")
+            self.assertEqual(len(messages[-1]["schedules"]), 2)
+            self.assertEqual(set(messages[-1]["schedules"][0]["schedule"]),
+                             set(self.courses))
+
+            # Small problems are solved exactly in a single step.
+            request = {"term": TERM, "courses": self.courses[:2]}
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             json.dumps(request).encode())
+            messages = [json.loads(line) for line in body.splitlines()]
+
+            self.assertEqual(status, 200)
+            self.assertEqual([message["type"] for message in messages],
+                             ["progress", "result"])
+
+        self.runService(test)
+
+    def testBadRequests(self):
+        async def test(service, port):
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             b"{")
+            self.assertEqual(status, 400)
+
+            request = {"term": "XX16", "courses": self.courses}
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             json.dumps(request).encode())
+            self.assertEqual(status, 400)
+
+            request = {"term": TERM, "courses": self.courses,
+                       "preferences": {"unknown": 1}}
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             json.dumps(request).encode())
+            self.assertEqual(status, 400)
+
+            request = {"term": TERM, "courses": self.courses,
+                       "preferences": {"capacity": "64"}}
+            status, body = await sendRequest(port, "POST", "/schedule",
+                                             json.dumps(request).encode())
+            self.assertEqual(status, 400)
+
+            status, body = await sendRequest(port, "GET", "/missing")
+            self.assertEqual(status, 404)
+
+            status, body = await sendRequest(port, "GET", "/health")
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(body)["terms"][TERM],
+                             len(self.courses))
+
+        self.runService(test)
+
+    def testCancel(self):
+        async def test(service, port):
+            request = {"term": TERM, "courses": self.courses,
+                       "preferences": {"generations": 100000,
+                                       "plateau": None}}
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps(request).encode()
+            writer.write(b"POST /schedule HTTP/1.1\r\nContent-Length: "
+                         + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await reader.readuntil(b"progress")
+            writer.close()
+
+            # The request stops being solved once the client is gone.
+            await asyncio.wait_for(service.queue.join(), 10)
+
+        self.runService(test)
+
+    def testSnapshots(self):
+        async def run(directory):
+            service = ScheduleService(1, snapshots=directory)
+            service.schedules[TERM] = self.schedule
+            await service.start("127.0.0.1", 0)
+            await service.stop()
+
+            # The schedule data is loaded back when the service starts again.
+            service = ScheduleService(1, snapshots=directory)
+            await service.start("127.0.0.1", 0)
+            await service.stop()
+
+            self.assertEqual(sorted(service.schedules[TERM]), self.courses)
+
+            # A corrupt snapshot is skipped instead of stopping the service.
+            with open(os.path.join(directory, "WI17.snapshot"), "wb") as output:
+                output.write(b"TSCH" + bytes(30))
+
+            service = ScheduleService(1, snapshots=directory)
+            await service.start("127.0.0.1", 0)
+            await service.stop()
+
+            self.assertEqual(sorted(service.schedules), [TERM])
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(directory))
+
+if __name__ == "__main__":
+    unittest.main()
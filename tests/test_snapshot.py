@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(__file__ + "/../../tritonscheduler"))
+
+import struct
+import tempfile
+import unittest
+
+import snapshot
+import synthetic
+
+from classtime import ClassTime
+from snapshot import SnapshotError
+from synthetic import describe
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.schedule = synthetic.generateSchedule(20, 3, {"DI": 4, "LA": 3},
+                                                   seed=0)
+
+    def testRoundTrip(self):
+        schedule = snapshot.loads(snapshot.dumps(self.schedule))
+
+        self.assertEqual(describe(schedule), describe(self.schedule))
+
+        # The order of the courses and meeting types decides the order of the
+        # genes, so it has to be kept.
+        self.assertEqual(list(schedule), list(self.schedule))
+
+        for course, lectures in schedule.items():
+            for lecture, original in zip(lectures, self.schedule[course]):
+                self.assertEqual(list(lecture), list(original))
+
+        # The times are ClassTime objects that can still be compared.
+        time = schedule[list(schedule)[0]][0]["LE"]["time"]
+        original = self.schedule[list(schedule)[0]][0]["LE"]["time"]
+
+        self.assertIsInstance(time, ClassTime)
+        self.assertEqual(time.startTime, original.startTime)
+        self.assertEqual(time.finishTime, original.finishTime)
+        self.assertEqual(time.dayMask, original.dayMask)
+
+    def testMissingValues(self):
+        time = ClassTime.fromString("MWF 10:00a-10:50a")
+        schedule = {
+            "CSE 11": [{
+                "LE": {"sectionID": None, "time": time, "building": None,
+                       "room": None, "instructor": "Staff"},
+                "DI": [{"sectionID": "A01", "time": None, "building": "TBA",
+                        "room": "TBA", "instructor": None}],
+                "FI": {"date": "12/05/2016", "time": None, "building": None,
+                       "room": None}
+            }],
+            "CSE 12": []
+        }
+        loaded = snapshot.loads(snapshot.dumps(schedule))
+
+        self.assertEqual(describe(loaded), describe(schedule))
+        self.assertIsNone(loaded["CSE 11"][0]["DI"][0]["time"])
+
+    def testSharedValues(self):
+        time = ClassTime.fromString("TuTh 2:00p-3:20p")
+        schedule = {
+            "CSE 11": [{"LE": {"sectionID": "A00", "time": time,
+                               "building": "CENTR", "room": "101",
+                               "instructor": "Staff"}}],
+            "CSE 12": [{"LE": {"sectionID": "A00",
+                               "time": ClassTime.fromString(str(time)),
+                               "building": "CENTR", "room": "101",
+                               "instructor": "Staff"}}]
+        }
+        loaded = snapshot.loads(snapshot.dumps(schedule))
+
+        self.assertIs(loaded["CSE 11"][0]["LE"]["time"],
+                      loaded["CSE 12"][0]["LE"]["time"])
+        self.assertIs(loaded["CSE 11"][0]["LE"]["building"],
+                      loaded["CSE 12"][0]["LE"]["building"])
+
+    def testInvalid(self):
+        data = snapshot.dumps(self.schedule)
+
+        self.assertRaises(SnapshotError, snapshot.loads, b"")
+        self.assertRaises(SnapshotError, snapshot.loads, b"XXXX" + data[4:])
+        self.assertRaises(SnapshotError, snapshot.loads, data[:-4])
+
+        version = struct.pack("<H", snapshot.SNAPSHOT_VERSION + 1)
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:4] + version + data[6:])
+
+        # Corrupt bodies of the right size.
+        header = snapshot.HEADER
+        magic, version, stringCount, blobSize, intCount = \
+            header.unpack_from(data)
+        blob = header.size + stringCount * 4
+        body = blob + blobSize
+
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:blob] + b"\xff" + data[blob + 1:])
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:body] + struct.pack("<i", 1 << 20)
+                          + data[body + 4:])
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:body + 4] + struct.pack("<i", 1 << 20)
+                          + data[body + 8:])
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:-4] + struct.pack("<i", 1 << 20))
+
+        # Negative indices other than NONE and negative counts.
+        timeCount = struct.unpack_from("<i", data, body)[0]
+        courses = body + 4 + timeCount * 5 * 4
+
+        for value in (-3, snapshot.NONE):
+            self.assertRaises(SnapshotError, snapshot.loads,
+                              data[:courses + 4] + struct.pack("<i", value)
+                              + data[courses + 8:])
+
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:courses] + struct.pack("<i", -1)
+                          + data[courses + 4:])
+        self.assertRaises(SnapshotError, snapshot.loads,
+                          data[:courses + 8] + struct.pack("<i", -1)
+                          + data[courses + 12:])
+
+    def testFile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "FA16.snapshot")
+            snapshot.save(self.schedule, path)
+
+            self.assertEqual(describe(snapshot.load(path)),
+                             describe(self.schedule))
+            self.assertEqual(os.listdir(directory), ["FA16.snapshot"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,40 @@
 #!/usr/bin/env python
 
-import itertools
+import time
 
-from random import uniform
+from bisect import bisect_right
+from itertools import accumulate
 from random import randint
-from classtime import ClassTime
-
-# Restrictions on class times.
-TIME_EARLIEST = ClassTime.fromString("MTuWThFS 12:00a-8:00a")
-TIME_LATEST = ClassTime.fromString("MTuWThFS 4:30p-11:50p")
-TIME_LUNCH = ClassTime.fromString("MTuWThFS 12:00p-1:00p")
-
-# Maximum time (in minutes) between any two classes.
-MAX_GAP = 60 * 3
+from random import shuffle
+from random import uniform
+from chromosome import Chromosome
+from fitnesstable import FitnessTable
+from individual import Individual
+from individual import getGeneType
+from ranking import Ranking
+from runstats import PHASE_TABLE
+from runstats import PHASE_SELECTION
+from runstats import PHASE_CROSSOVER
+from runstats import PHASE_MUTATION
+from runstats import PHASE_FITNESS
+from runstats import COUNTER_EVALUATIONS
+from runstats import COUNTER_COMPARISONS
+from runstats import COUNTER_GENERATIONS
+
+# The strategies for selecting parents.
+SELECTION_ROULETTE = "roulette"
+SELECTION_SUS = "sus"
+SELECTION_TOURNAMENT = "tournament"
+
+# The default number of individuals competing in a tournament selection.
+TOURNAMENT_SIZE = 3
+
+# The reasons for a run of the algorithm to stop.
+STOP_GENERATIONS = "generations"
+STOP_PLATEAU = "plateau"
+STOP_TARGET = "target"
+STOP_EVALUATIONS = "evaluations"
+STOP_TIME = "time"
 
 class Algorithm(object):
     """
@@ -21,171 +43,168 @@ class Algorithm(object):
 
     :ivar chromosomes: a set of potential lecture/section combinations
     :ivar schedule: the schedule data that is used as genetic information
+    :ivar table: the precomputed fitness values for the chromosomes
+    :ivar geneType: the array type code that holds every gene index
+    :ivar stats: the RunStats object that records instrumentation, or None
     :ivar capacity: the maximum number of individuals in a population
     :ivar crossoverRate: the probability of crossover occuring
     :ivar mutateRate: the probability of an mutation occuring
     :ivar elitism: what percent of the fittest individuals is carried over
+    :ivar selection: the strategy for selecting parents
+    :ivar tournamentSize: the number of individuals competing in a tournament
     :ivar population: the set of all individuals
     :ivar fitness: the set of all fitness variables for the population
+    :ivar cumulative: the running totals of the fitness variables
     :ivar fitnessSum: the total fitness value of the population
+    :ivar evaluations: the number of individuals scored since initiation
+    :ivar generation: the number of generations evolved by the last run
+    :ivar stopReason: why the last run stopped
+    :ivar ranking: the fittest distinct individuals seen by the last run, or
+    None if they were not remembered
     """
 
-    def __init__(self, schedule):
+    def __init__(self, schedule, stats=None, table=None):
         """
         Constructor for the Algorithm class. The constructor turns the Schedule
         output into chromosomes for individuals.
 
         :param self: the Algorithm object
         :param schedule: schedule data that will be used as genetic information
+        :param stats: the RunStats object to record instrumentation in, or
+        None to not record anything
+        :param table: an already built FitnessTable for the courses of the
+        schedule, which is shared instead of building a new one
         """
         self.chromosomes = {}
         self.schedule = schedule
+        self.stats = stats
+        self.ranking = None
+        self.evaluations = 0
+        self.generation = 0
+
+        if table is not None:
+            self.chromosomes = dict(zip(table.courses, table.chromosomes))
+            self.table = table
+            self.geneType = getGeneType(max(map(len, table.chromosomes),
+                                            default=0))
+
+            return
+
+        clock = self.startTiming()
 
         # Get all the possible alleles, which would be a specific lecture and
-        # section(s) for a course.
+        # section(s) for a course. Treat each course as a chromosome.
         for code, courseList in schedule.items():
-            # Treat each course as a chromosome.
-            self.chromosomes[code] = []
-
-            # Find all the genes for the "chromosome".
-            for index in range(len(courseList)):
-                course = courseList[index]
-                indices = {}
-
-                # Find set of all sections for the lecture.
-                for meetingType, meeting in course.items():
-                    if meetingType == "LE" or meetingType == "FI":
-                        continue
-
-                    indices[meetingType] = [i for i in range(len(meeting))]
-                
-                # Create a gene with one possibility for each section for the
-                # lecture and add it to the chromosome.
-                if len(indices) > 0:
-                    # Find the Cartesian Product of the different types of
-                    # sections to get all forms of the gene.
-                    product = [dict(zip(indices.keys(), x))
-                               for x in itertools.product(*indices.values())]
-                
-                    # Encode the lecture index into the gene.
-                    for gene in product:
-                        gene["LE"] = index
-                        self.chromosomes[code].append(gene)
-                else:
-                    self.chromosomes[code].append({"LE": index})
+            self.chromosomes[code] = Chromosome(courseList)
+
+        # Large courses need wider gene indices, which raises a ValueError
+        # before any work is done if a course has too many genes.
+        self.geneType = getGeneType(max(map(len, self.chromosomes.values()),
+                                        default=0))
+
+        # Score every gene once so fitness calculations are just lookups.
+        self.table = FitnessTable(schedule, self.chromosomes)
+        self.addTiming(PHASE_TABLE, clock)
 
-    # TODO: Refactor this.
     def getFitness(self, individual):
         """
         Calculates the fitness of an individual by adding points for certain
-        factors. This includes: having no conflicts.
+        factors. This includes: having no conflicts. The points for each gene
+        and pair of genes are precomputed by the fitness table.
 
         :param self: the Algorithm object
         :param individual: the individual to calculate the fitness for
         :returns: the fitness value of the individual
         """
-        # The fitness value for the given individual.
-        fitness = 0
-
-        # Schedule data that was set in initiate().
-        schedule = self.schedule
-
-        # Sum the fitness for each section.
-        for course, meetings in individual.items():
-            index = meetings["LE"]
-            meetingInfo = schedule[course][index]
-            final = None
-
-            if "FI" in meetingInfo:
-                final = meetingInfo["FI"]["time"]
-
-            for meetingType, meeting in meetings.items():
-                item = meetingInfo[meetingType]
-
-                if meetingType != "LE":
-                    item = item[meeting]
-
-                # Check for no conflicts.
-                for course2, meetings2 in individual.items():
-                    for meetingType2, meeting2 in meetings2.items():
-                        index2 = meetings2["LE"]
-
-                        meetingInfo2 = schedule[course2][index2]
-                        item2 = meetingInfo2[meetingType2]
-
-                        if meetingType2 != "LE":
-                            item2 = item2[meeting2]
+        # Individuals created by the algorithm already know their fitness.
+        if isinstance(individual, Individual):
+            return individual.fitness
 
-                        # Check for no time conflicts.
-                        if not item["time"].conflictsWith(item2["time"]):
-                            fitness += 1
+        return self.table.getFitness(individual)
 
-                        # Check for no finals conflicts.
-                        if final is not None and "FI" in meetingInfo2:
-                            final2 = meetingInfo2["FI"]["time"]
-
-                            if not final.conflictsWith(final2):
-                                fitness += 1
-
-                                # Try to avoid multiple finals on one day.
-                                if not final.isOnDay(final2.days):
-                                    fitness += 1
+    def getKey(self, individual):
+        """
+        Returns a hashable key for an individual, which is the index of the
+        gene used for each course. Individuals with the same genes have the
+        same key.
 
-                        # Try to limit the number of classes per day.
-                        if not item["time"].isOnDay(item2["time"].days):
-                            fitness += 1
+        :param self: the Algorithm object
+        :param individual: the individual to find the key for
+        :returns: a tuple of gene indices
+        """
+        return tuple(individual)
 
-                            # Check for large gaps throughout the day.
-                            if (abs(item["time"].startTime
-                                    - item2["time"].startTime) <= MAX_GAP):
-                                fitness += 1
+    def createIndividual(self, genes):
+        """
+        Creates an individual that uses the given genes and knows its fitness.
 
-                # Check for too early class.
-                if item["time"].isTimeAfter(TIME_EARLIEST):
-                    fitness += 1
+        :param self: the Algorithm object
+        :param genes: the index of the gene used for each course
+        :returns: the new Individual object
+        """
+        return Individual(genes, self.table.getFitness(genes),
+                          self.table.getContributions(genes), self.geneType)
 
-                # Check for too late class.
-                if item["time"].isTimeBefore(TIME_LATEST):
-                    fitness += 1
+    def setGene(self, individual, course, gene):
+        """
+        Changes the gene used for a course of an individual and updates its
+        fitness from the change.
 
-                # Check for lunch break.
-                if not item["time"].conflictsWith(TIME_LUNCH):
-                    fitness += 1
+        :param self: the Algorithm object
+        :param individual: the Individual object to change
+        :param course: the index of the course in the fitness table
+        :param gene: the index of the new gene for the course
+        """
+        if individual[course] == gene:
+            return
 
-            if final is not None:
-                # Check for finals being too early.
-                if final.isTimeAfter(TIME_EARLIEST):
-                    fitness += 1
+        individual.fitness += self.table.changeGene(individual,
+                                                    individual.contributions,
+                                                    course, gene)
 
-                # Check for finals being too late.
-                if final.isTimeBefore(TIME_LATEST):
-                    fitness += 1
+    def toDict(self, individual):
+        """
+        Converts an individual into a dictionary of course code to gene, where
+        each gene is a dictionary of meeting type to lecture or section index.
 
-        return fitness
+        :param self: the Algorithm object
+        :param individual: the index of the gene used for each course
+        :returns: the individual as a dictionary
+        """
+        return {code: self.chromosomes[code].getGene(gene)
+                for code, gene in zip(self.table.courses, individual)}
 
-    def initiate(self, size, crossoverRate, mutateRate, elitism):
+    def initiate(self, size, crossoverRate, mutateRate, elitism,
+                 selection=SELECTION_ROULETTE, tournamentSize=TOURNAMENT_SIZE):
         """
         Creates an initial, random population so the genetic algorithm has a
         base to start from.
 
         :param self: the Algorithm object
         :param size: the population size
+        :param crossoverRate: the probability of crossover occuring
+        :param mutateRate: the probability of an mutation occuring
+        :param elitism: what percent of the fittest individuals is carried over
+        :param selection: the strategy for selecting parents, which is one of
+        SELECTION_ROULETTE, SELECTION_SUS or SELECTION_TOURNAMENT
+        :param tournamentSize: the number of individuals competing in a
+        tournament selection
         """
         self.capacity = size
         self.crossoverRate = crossoverRate
         self.mutateRate = mutateRate
         self.elitism = elitism
+        self.selection = selection
+        self.tournamentSize = tournamentSize
+        self.evaluations = 0
         self.population = []
 
         # Keep adding random individuals until the population is full.
         while len(self.population) < self.capacity:
-            individual = {}
+            genes = [self.chromosomes[locus].sample()
+                     for locus in self.table.courses]
 
-            for locus, genes in self.chromosomes.items():
-                index = randint(0, len(genes) - 1)
-                individual[locus] = self.chromosomes[locus][index]
-
-            self.population.append(individual)
+            self.population.append(self.createIndividual(genes))
 
         # Get fitness information for the current generation.
         self.calculateFitness()
@@ -198,20 +217,20 @@ class Algorithm(object):
 
         :param self: the Algorithm object
         """
-        # Sort the population by fitness.
-        self.population = sorted(self.population, key=lambda x:
-                                 self.getFitness(x))
+        # Score each individual once, then sort the population by fitness.
+        self.evaluations += len(self.population)
+        scored = sorted(((self.getFitness(individual), i, individual)
+                         for i, individual in enumerate(self.population)),
+                        key=lambda x: (x[0], x[1]))
 
         # Calculate the fitnesses of the population.
-        self.fitness = [0] * len(self.population)
-        self.fitnessSum = 0
-        
-        for i in range(len(self.population)):
-            self.fitness[i] = self.getFitness(self.population[i])
-            self.fitnessSum += self.fitness[i]
-        
-        # Get the total fitness for a fitness proportionate selection.
-        self.fitnessSum = float(self.fitnessSum)
+        self.population = [individual for _, _, individual in scored]
+        self.fitness = [fitness for fitness, _, _ in scored]
+
+        # Get the running and total fitness for a fitness proportionate
+        # selection.
+        self.cumulative = list(accumulate(self.fitness))
+        self.fitnessSum = float(self.cumulative[-1] if self.cumulative else 0)
 
     def evolve(self):
         """
@@ -220,55 +239,326 @@ class Algorithm(object):
         """
         # The next generation population.
         nextGeneration = []
-
-        # Select parents using fitness proportionate selection.
-        def select():
-            previousProb = 0.0
-
-            for i in range(len(self.population)):
-                chance = previousProb + float(self.fitness[i]) / self.fitnessSum
-                previousProb = chance
-
-                if uniform(0.0, 1.0) <= chance:
-                    return self.population[i]
-
+        clock = self.startTiming()
 
         # Keep the most fit individual for the next generation.
         for i in range(int(self.capacity * self.elitism)):
             nextGeneration.append(self.population[-(i + 1)])
 
         # Fill the next generation with offspring of selected parents.
-        while len(nextGeneration) < self.capacity:
-            parent1 = select()
-            parent2 = select()
+        parents = self.selectParents(2 * (self.capacity - len(nextGeneration)))
+        clock = self.addTiming(PHASE_SELECTION, clock)
+
+        for i in range(0, len(parents), 2):
+            nextGeneration.append(self.crossover(parents[i], parents[i + 1]))
 
-            nextGeneration.append(self.crossover(parent1, parent2))
+        clock = self.addTiming(PHASE_CROSSOVER, clock)
 
         # Add some diversity to the next generation with random mutation.
         for individual in self.population:
             self.mutate(individual)
 
+        clock = self.addTiming(PHASE_MUTATION, clock)
+
         # Make the next generation become the current generation.
         self.population = nextGeneration
 
         # Get fitness information for the current generation.
         self.calculateFitness()
-            
+        self.addTiming(PHASE_FITNESS, clock)
+
+    def startTiming(self):
+        """
+        Returns the current time if instrumentation is being recorded.
+
+        :param self: the Algorithm object
+        :returns: the current time in seconds, or None if there is no stats
+        object
+        """
+        if self.stats is None:
+            return None
+
+        return time.perf_counter()
+
+    def addTiming(self, phase, clock):
+        """
+        Records the time spent in a phase since the given time if
+        instrumentation is being recorded.
+
+        :param self: the Algorithm object
+        :param phase: the name of the phase
+        :param clock: the time returned by startTiming or addTiming
+        :returns: the current time in seconds, or None if there is no stats
+        object
+        """
+        if self.stats is None:
+            return None
+
+        now = time.perf_counter()
+        self.stats.addTime(phase, now - clock)
+
+        return now
+
+    def recordStats(self):
+        """
+        Records the fitness of the current generation in the stats object.
+
+        :param self: the Algorithm object
+        """
+        population = len(self.population)
+        mean = self.getTotalFitness() / population if population else 0.0
+
+        self.stats.record(self.generation, self.getHighestFitness(), mean)
+
+    def updateCounters(self):
+        """
+        Copies the counters of the algorithm and its fitness table into the
+        stats object.
+
+        :param self: the Algorithm object
+        """
+        stats = self.stats
+
+        stats.setCounter(COUNTER_EVALUATIONS, self.evaluations)
+        stats.setCounter(COUNTER_COMPARISONS, self.table.comparisons)
+        stats.setCounter(COUNTER_GENERATIONS, self.generation)
+
+    def run(self, generations, plateau=None, target=None,
+            maxEvaluations=None, timeBudget=None, progress=None, top=None):
+        """
+        Evolves the population until a stop criterion is met, keeping track of
+        the most fit individual seen in any generation. The population must
+        have been created with initiate first.
+
+        :param self: the Algorithm object
+        :param generations: the maximum number of generations to evolve
+        :param plateau: stop after this many generations without improvement
+        :param target: stop once an individual reaches this fitness value
+        :param maxEvaluations: stop once this many individuals were scored
+        :param timeBudget: stop once this many seconds have passed
+        :param progress: called with the number of finished generations
+        :param top: how many of the fittest distinct individuals seen during
+        the run to remember for getTopIndividuals (None to not remember any)
+        :returns: the most fit individual seen during the run
+        """
+        start = time.perf_counter()
+        fittest = self.getFittest().copy()
+        highest = self.getHighestFitness()
+        stale = 0
+
+        self.generation = 0
+        self.stopReason = STOP_GENERATIONS
+        stats = self.stats
+        ranking = None
+
+        if top is not None:
+            ranking = self.ranking = Ranking(top)
+            self.updateRanking()
+
+        if stats is not None:
+            stats.start()
+            self.recordStats()
+
+        while self.generation < generations:
+            if target is not None and highest >= target:
+                self.stopReason = STOP_TARGET
+            elif maxEvaluations is not None and (self.evaluations
+                                                 >= maxEvaluations):
+                self.stopReason = STOP_EVALUATIONS
+            elif timeBudget is not None and (time.perf_counter() - start
+                                             >= timeBudget):
+                self.stopReason = STOP_TIME
+            elif plateau is not None and stale >= plateau:
+                self.stopReason = STOP_PLATEAU
+            else:
+                self.evolve()
+                self.generation += 1
+
+                # Remember the most fit individual in case it is lost later.
+                if self.getHighestFitness() > highest:
+                    fittest = self.getFittest().copy()
+                    highest = self.getHighestFitness()
+                    stale = 0
+                else:
+                    stale += 1
+
+                if ranking is not None:
+                    self.updateRanking()
+
+                if stats is not None:
+                    self.recordStats()
+
+                if progress is not None:
+                    progress(self.generation)
+
+                continue
+
+            break
+
+        if stats is not None:
+            stats.stop()
+            self.updateCounters()
+
+        return fittest
+
+    def updateRanking(self):
+        """
+        Offers the individuals of the current population to the ranking,
+        from most to least fit, until one is not fit enough to be remembered.
+
+        :param self: the Algorithm object
+        """
+        ranking = self.ranking
+
+        for i in range(len(self.population) - 1, -1, -1):
+            fitness = self.fitness[i]
+
+            # The population is sorted, so no later individual can be ranked.
+            if not ranking.accepts(fitness):
+                break
+
+            key = self.getKey(self.population[i])
+
+            # Individuals may change later, so remember a copy.
+            if key not in ranking:
+                ranking.add(key, int(fitness),
+                            self.copyIndividual(self.population[i]))
+
+    def copyIndividual(self, individual):
+        """
+        Returns a copy of an individual of the population that is not changed
+        by later generations.
+
+        :param self: the Algorithm object
+        :param individual: the individual to copy
+        :returns: the new Individual object
+        """
+        return individual.copy()
+
+    def getTopIndividuals(self):
+        """
+        Returns the fittest distinct individuals seen during the last run,
+        from most to least fit.
+
+        :param self: the Algorithm object
+        :returns: a list of (individual, fitness) tuples, which is empty if
+        the last run did not remember any individuals
+        """
+        if self.ranking is None:
+            return []
+
+        return self.ranking.getRanked()
+
+    def selectParents(self, count):
+        """
+        Selects individuals of the current population to become parents using
+        the selection strategy.
+
+        :param self: the Algorithm object
+        :param count: the number of parents to select
+        :returns: a list of the selected individuals
+        """
+        if self.selection == SELECTION_TOURNAMENT:
+            return [self.selectTournament() for i in range(count)]
+
+        if self.selection == SELECTION_SUS:
+            return self.selectUniversal(count)
+
+        return [self.selectRoulette() for i in range(count)]
+
+    def selectRoulette(self):
+        """
+        Selects an individual with a probability proportional to its fitness
+        (fitness proportionate selection) by bisecting the running totals of
+        the fitness values.
+
+        :param self: the Algorithm object
+        :returns: the selected individual
+        """
+        if self.fitnessSum <= 0:
+            return self.population[randint(0, len(self.population) - 1)]
+
+        index = bisect_right(self.cumulative, uniform(0.0, self.fitnessSum))
+
+        return self.population[min(index, len(self.population) - 1)]
+
+    def selectUniversal(self, count):
+        """
+        Selects individuals with stochastic universal sampling, which uses a
+        single random offset and evenly spaced pointers over the running totals
+        of the fitness values. This gives every individual a number of picks
+        close to its expected value.
+
+        :param self: the Algorithm object
+        :param count: the number of individuals to select
+        :returns: a list of the selected individuals, in random order
+        """
+        if count <= 0:
+            return []
+
+        if self.fitnessSum <= 0:
+            return [self.population[randint(0, len(self.population) - 1)]
+                    for i in range(count)]
+
+        step = self.fitnessSum / count
+        pointer = uniform(0.0, step)
+        index = 0
+        selected = []
+
+        for i in range(count):
+            while (index < len(self.population) - 1 and
+                   self.cumulative[index] <= pointer):
+                index += 1
+
+            selected.append(self.population[index])
+            pointer += step
+
+        # Shuffle the parents so the pairs are not ordered by fitness.
+        shuffle(selected)
+
+        return selected
+
+    def selectTournament(self):
+        """
+        Selects the fittest of a few random individuals (tournament
+        selection).
+
+        :param self: the Algorithm object
+        :returns: the selected individual
+        """
+        # The population is sorted by fitness, so the highest index wins.
+        last = len(self.population) - 1
+        index = max(randint(0, last) for i in range(self.tournamentSize))
+
+        return self.population[index]
+
+    def immigrate(self, individuals):
+        """
+        Replaces the least fit individuals of the population with individuals
+        from another population, then updates the fitness information.
+
+        :param self: the Algorithm object
+        :param individuals: the individuals that join the population
+        """
+        count = min(len(individuals), len(self.population))
+        self.population = list(individuals[:count]) + self.population[count:]
+
+        # Get fitness information for the new population.
+        self.calculateFitness()
+
     def crossover(self, parent1, parent2):
         """
         After selection occurs, parents will be chosen from remaining population
         and children will be created by crossing the genes at certain points.
         """
-        # The new child individual.
-        child = {}
+        # The new child individual starts as a copy of the first parent.
+        child = parent1.copy()
 
-        # Copy genes from either the first parent or second parent.
-        # Shallow copy is used here since the values are just numbers.
-        for chromosome in parent1:
+        # Take genes from the second parent, only updating the fitness for
+        # the genes that changed.
+        for i in range(len(child)):
             if uniform(0.0, 1.0) <= self.crossoverRate:
-                child[chromosome] = parent2[chromosome].copy()
-            else:
-                child[chromosome] = parent1[chromosome].copy()
+                self.setGene(child, i, parent2[i])
 
         return child
 
@@ -278,10 +568,10 @@ class Algorithm(object):
         provide some additional genetic diversity.
         """
         # Pick random genes within the individual to mutate.
-        for chromosome, gene in individual.items():
+        for i in range(len(individual)):
             if uniform(0.0, 1.0) <= self.mutateRate:
-                pool = self.chromosomes[chromosome]
-                individual[chromosome] = pool[randint(0, len(pool) - 1)]
+                pool = self.chromosomes[self.table.courses[i]]
+                self.setGene(individual, i, pool.sample())
 
     def getHighestFitness(self):
         """
@@ -299,8 +589,24 @@ class Algorithm(object):
         """
         return self.fitnessSum or 0
 
-    def printFittest(self):
-        fittest = self.population[len(self.population) - 1]
+    def getFittest(self):
+        """
+        Returns the most fit individual in the population.
+        """
+        return self.population[len(self.population) - 1]
+
+    def printFittest(self, fittest=None):
+        """
+        Prints the meeting times of the most fit individual, or of the given
+        individual.
+
+        :param self: the Algorithm object
+        :param fittest: the individual to print instead of the most fit one
+        """
+        if fittest is None:
+            fittest = self.getFittest()
+
+        fittest = self.toDict(fittest)
 
         # Print the times for each meeting in each course.
         for courseCode, info in fittest.items():
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from algorithm import Algorithm
+from algorithm import SELECTION_ROULETTE
+from algorithm import SELECTION_SUS
+from algorithm import SELECTION_TOURNAMENT
+from chromosome import Chromosome
+from exactsolver import ExactSolver
+from exactsolver import STRATEGY_EXACT
+from exactsolver import selectStrategy
+from fitnesstable import FitnessTable
+from schedule import Schedule
+
+# The preferences used for anything a request does not specify.
+PREFERENCES = {
+    "capacity": 64,
+    "crossoverRate": 0.02,
+    "mutateRate": 0.01,
+    "elitism": 0.1,
+    "generations": 256,
+    "plateau": 64,
+    "selection": SELECTION_ROULETTE,
+    "results": 3,
+    "seed": None
+}
+
+# The preferences that are whole numbers of at least one, and the ones that
+# are rates between zero and one.
+COUNT_PREFERENCES = ("capacity", "generations", "results")
+RATE_PREFERENCES = ("crossoverRate", "mutateRate", "elitism")
+
+# The selection methods a request can ask for.
+SELECTIONS = (SELECTION_ROULETTE, SELECTION_SUS, SELECTION_TOURNAMENT)
+
+# The schedule data of each term used by the current worker process.
+workerSchedules = {}
+
+# The fitness table of all of the courses of each term, built when first
+# needed by the current worker process.
+workerTables = {}
+
+def isInteger(value):
+    """
+    Returns whether or not a value is an integer, which a boolean is not.
+
+    :param value: the value to check
+    :returns: True if the value is an integer, False otherwise
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def validatePreferences(preferences):
+    """
+    Checks the preferences of a request, so values of the wrong type are
+    turned away before they reach the Algorithm.
+
+    :param preferences: a dictionary of preferences that override the
+    default PREFERENCES, or None
+    :raises: ValueError
+    """
+    if preferences is None:
+        return
+
+    if not isinstance(preferences, dict) or \
+       not set(preferences) <= set(PREFERENCES):
+        raise ValueError("invalid preferences provided")
+
+    for name, value in preferences.items():
+        if name in COUNT_PREFERENCES:
+            valid = isInteger(value) and value >= 1
+        elif name in RATE_PREFERENCES:
+            valid = ((isInteger(value) or isinstance(value, float)) and
+                     0 <= value <= 1)
+        elif name == "plateau":
+            valid = value is None or (isInteger(value) and value >= 1)
+        elif name == "selection":
+            valid = value in SELECTIONS
+        else:
+            valid = value is None or isInteger(value)
+
+        if not valid:
+            raise ValueError("invalid preference " + name + " provided")
+
+def initWorker(schedules):
+    """
+    Sets up a worker process with the schedule data of every term, so it is
+    only sent to each process once.
+
+    :param schedules: a dictionary of term to schedule data
+    """
+    global workerSchedules, workerTables
+
+    workerSchedules = schedules
+    workerTables = {}
+
+def addCourses(term, schedule):
+    """
+    Adds the schedule data of courses of a term to the current worker
+    process. If the term already has a fitness table, the new courses are
+    added to it, so the scores that were already found are kept.
+
+    :param term: the term code
+    :param schedule: the schedule data of some courses of the term
+    """
+    known = workerSchedules.setdefault(term, {})
+    added = {code: lectures for code, lectures in schedule.items()
+             if code not in known}
+
+    if not added:
+        return
+
+    known.update(added)
+    table = workerTables.get(term)
+
+    if table is not None:
+        table.addCourses(added, {code: Chromosome(lectures)
+                                 for code, lectures in added.items()})
+
+def getTermSchedule(term):
+    """
+    Returns the schedule data of every course of a term that the current
+    worker process has.
+
+    :param term: the term code
+    :returns: the schedule data of the term
+    """
+    return workerSchedules[term]
+
+def getTermTable(term):
+    """
+    Returns the fitness table of all of the courses of a term in the current
+    worker process, building it the first time it is needed. Every request of
+    the term shares this table, so the scores of courses and pairs of courses
+    that several requests have in common are only calculated once.
+
+    :param term: the term code
+    :returns: the FitnessTable object
+    """
+    table = workerTables.get(term)
+
+    if table is None:
+        schedule = workerSchedules[term]
+        chromosomes = {code: Chromosome(lectures)
+                       for code, lectures in schedule.items()}
+        table = workerTables[term] = FitnessTable(schedule, chromosomes)
+
+    return table
+
+def createSolver(schedule, results, table=None, stats=None):
+    """
+    Creates the Algorithm for some schedule data, along with an ExactSolver
+    if the search space is small enough to be searched exactly.
+
+    :param schedule: the schedule data used as genetic information
+    :param results: the number of the fittest distinct schedules to find
+    :param table: an already built FitnessTable for the courses of the
+    schedule, or None to build one
+    :param stats: the RunStats object to record instrumentation in, or None
+    :returns: an (algorithm, solver) tuple, where the solver is None if the
+    genetic algorithm should be used instead
+    """
+    algorithm = Algorithm(schedule, stats, table)
+
+    # Search small problems exactly instead of using the genetic algorithm.
+    if selectStrategy(algorithm.table) == STRATEGY_EXACT:
+        return algorithm, ExactSolver(algorithm.table, results=results)
+
+    return algorithm, None
+
+def getTermSolver(term, courses, results):
+    """
+    Creates the Algorithm and, for small problems, the ExactSolver for some
+    courses of a term in the current worker process. They share the fitness
+    table of the term.
+
+    :param term: the term code
+    :param courses: the course codes to schedule
+    :param results: the number of the fittest distinct schedules to find
+    :returns: an (algorithm, solver) tuple, where the solver is None if the
+    genetic algorithm should be used instead
+    """
+    schedule = getTermSchedule(term)
+    table = getTermTable(term).getSubTable(courses)
+
+    return createSolver({code: schedule[code] for code in table.courses},
+                        results, table)
+
+def solveRequest(term, courses, preferences, schedule=None):
+    """
+    Finds the best schedules for a single request in a worker process.
+
+    :param term: the term code
+    :param courses: the course codes of the request
+    :param preferences: a dictionary of preferences that override the
+    default PREFERENCES
+    :param schedule: the schedule data of the courses of the request that
+    the worker process was not started with, or None
+    :returns: a list of (schedule, fitness) tuples from most to least fit,
+    where each schedule is a dictionary of course code to gene dictionary
+    """
+    if schedule:
+        addCourses(term, schedule)
+
+    options = dict(PREFERENCES)
+    options.update(preferences or {})
+
+    algorithm, solver = getTermSolver(term, courses, options["results"])
+
+    if solver is not None:
+        if solver.solve() is None:
+            return []
+
+        return [(algorithm.toDict(genes), fitness)
+                for genes, fitness in solver.getRanked()]
+
+    if options["seed"] is not None:
+        random.seed(options["seed"])
+
+    algorithm.initiate(options["capacity"], options["crossoverRate"],
+                       options["mutateRate"], options["elitism"],
+                       options["selection"])
+    algorithm.run(options["generations"], options["plateau"],
+                  top=options["results"])
+
+    return [(algorithm.toDict(individual), fitness)
+            for individual, fitness in algorithm.getTopIndividuals()]
+
+class BatchSolver(object):
+    """
+    The BatchSolver class solves many schedule requests at once. The courses
+    of every request of a term are retrieved together once, and each worker
+    process shares the chromosomes and fitness scores of a term between all
+    of the requests it solves, so the work grows with the number of distinct
+    courses rather than with the number of requests.
+
+    A request is a (term, courses, preferences) tuple, where the preferences
+    are a dictionary that overrides the default PREFERENCES, or None.
+
+    The worker processes are started the first time requests are solved and
+    are kept until the BatchSolver is closed, which happens at the end of a
+    with statement that uses it.
+
+    :ivar workers: the number of worker processes
+    :ivar schedules: the schedule data of each term that has been retrieved
+    :ivar pool: the pool of worker processes, or None if it is not started
+    :ivar pooled: the course codes of each term that the worker processes
+    were started with
+    """
+
+    def __init__(self, workers=None):
+        """
+        Constructor for the BatchSolver class.
+
+        :param self: the BatchSolver object
+        :param workers: the number of worker processes, defaults to the CPU
+        count
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.schedules = {}
+        self.pool = None
+        self.pooled = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes. They are started again if more requests
+        are solved.
+
+        :param self: the BatchSolver object
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.pooled = {}
+
+    def getPool(self):
+        """
+        Returns the pool of worker processes, starting it with the schedule
+        data retrieved so far if it is not started.
+
+        :param self: the BatchSolver object
+        :returns: the ProcessPoolExecutor object
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers,
+                                            initializer=initWorker,
+                                            initargs=(self.schedules,))
+            self.pooled = {term: set(schedule)
+                           for term, schedule in self.schedules.items()}
+
+        return self.pool
+
+    def retrieve(self, requests):
+        """
+        Retrieves the schedule data for the union of the courses of every
+        request, with one retrieval per term. Courses that were already
+        retrieved are not retrieved again.
+
+        :param self: the BatchSolver object
+        :param requests: the list of requests
+        :raises: ScheduleError, ClassParserError
+        """
+        terms = {}
+
+        for term, courses, preferences in requests:
+            known = self.schedules.get(term.upper(), {})
+            terms.setdefault(term.upper(), set()).update(
+                course.upper() for course in courses
+                if course.upper() not in known)
+
+        for term, courses in terms.items():
+            if not courses:
+                continue
+
+            schedule = Schedule()
+            schedule.term = term
+            schedule.courses = sorted(courses)
+
+            self.schedules.setdefault(term, {}).update(schedule.retrieve())
+
+    def solve(self, requests):
+        """
+        Finds the best schedules for every request, retrieving any schedule
+        data that is missing first.
+
+        :param self: the BatchSolver object
+        :param requests: the list of requests
+        :raises: ScheduleError, ClassParserError, ValueError
+        :returns: a list with the result of each request in the same order,
+        which is a list of (schedule, fitness) tuples from most to least fit,
+        or None if a course of the request was not found
+        """
+        for term, courses, preferences in requests:
+            if not courses:
+                raise ValueError("invalid course list provided")
+
+            validatePreferences(preferences)
+
+        self.retrieve(requests)
+
+        results = [None] * len(requests)
+        tasks = []
+
+        for i in range(len(requests)):
+            term, courses, preferences = requests[i]
+            term = term.upper()
+            courses = [course.upper() for course in courses]
+            schedule = self.schedules.get(term, {})
+
+            if all(course in schedule for course in courses):
+                tasks.append((i, term, courses, preferences))
+
+        if not tasks:
+            return results
+
+        pool = self.getPool()
+        futures = []
+
+        for i, term, courses, preferences in tasks:
+            # Only send the courses that were retrieved after the workers
+            # were started.
+            pooled = self.pooled.get(term, ())
+            added = {course: self.schedules[term][course]
+                     for course in courses if course not in pooled}
+            futures.append((i, pool.submit(solveRequest, term, courses,
+                                           preferences, added)))
+
+        for i, future in futures:
+            results[i] = future.result()
+
+        return results
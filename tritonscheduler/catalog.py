@@ -0,0 +1,442 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import sqlite3
+import threading
+
+from classtime import ClassTime
+from schedule import Schedule
+
+# The default path of the catalog database.
+CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".tritonscheduler",
+                            "catalog.sqlite3")
+
+# The tables and indexes of the catalog. A course has lectures, a lecture has
+# sections (including its lecture meeting) and at most one final, and a
+# section meets at the time in its meeting if it has a time. Sections and
+# finals share the positions within a lecture, which keep the order of the
+# meeting types.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL,
+    code TEXT NOT NULL,
+    department TEXT NOT NULL,
+    UNIQUE (term, code)
+);
+CREATE TABLE IF NOT EXISTS lectures (
+    id INTEGER PRIMARY KEY,
+    course INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    lecture INTEGER NOT NULL REFERENCES lectures (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    sectionID TEXT,
+    building TEXT,
+    room TEXT,
+    instructor TEXT
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    section INTEGER PRIMARY KEY REFERENCES sections (id) ON DELETE CASCADE,
+    days TEXT NOT NULL,
+    start TEXT NOT NULL,
+    finish TEXT NOT NULL,
+    startTime INTEGER NOT NULL,
+    finishTime INTEGER NOT NULL,
+    dayMask INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS finals (
+    lecture INTEGER PRIMARY KEY REFERENCES lectures (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    date TEXT,
+    building TEXT,
+    room TEXT,
+    days TEXT,
+    start TEXT,
+    finish TEXT,
+    startTime INTEGER,
+    finishTime INTEGER,
+    dayMask INTEGER
+);
+CREATE INDEX IF NOT EXISTS coursesCode ON courses (code);
+CREATE INDEX IF NOT EXISTS coursesDepartment ON courses (term, department);
+CREATE INDEX IF NOT EXISTS lecturesCourse ON lectures (course);
+CREATE INDEX IF NOT EXISTS sectionsLecture ON sections (lecture);
+CREATE INDEX IF NOT EXISTS sectionsInstructor ON sections (instructor);
+CREATE INDEX IF NOT EXISTS meetingsDayMask ON meetings (dayMask);
+CREATE INDEX IF NOT EXISTS meetingsStartTime ON meetings (startTime);
+"""
+
+# The queries for reading the courses of a term back. Each is completed with
+# placeholders for the course codes.
+QUERY_COURSES = "SELECT id, code FROM courses WHERE term = ? AND code IN ({0})"
+QUERY_SECTIONS = """
+SELECT lectures.course, lectures.id, sections.position, sections.type,
+       sections.sectionID, sections.building, sections.room,
+       sections.instructor, meetings.days, meetings.start, meetings.finish,
+       meetings.startTime, meetings.finishTime
+FROM courses
+JOIN lectures ON lectures.course = courses.id
+JOIN sections ON sections.lecture = lectures.id
+LEFT JOIN meetings ON meetings.section = sections.id
+WHERE courses.term = ? AND courses.code IN ({0})
+"""
+QUERY_FINALS = """
+SELECT lectures.course, lectures.id, finals.position, finals.date,
+       finals.building, finals.room, finals.days, finals.start, finals.finish,
+       finals.startTime, finals.finishTime
+FROM courses
+JOIN lectures ON lectures.course = courses.id
+JOIN finals ON finals.lecture = lectures.id
+WHERE courses.term = ? AND courses.code IN ({0})
+"""
+
+# The most course codes bound to a single query.
+MAX_PARAMETERS = 500
+
+class Catalog(object):
+    """
+    The Catalog class is a local SQLite store of the schedule data of whole
+    terms. Terms are ingested ahead of time, after which courses can be read
+    back in the format of ClassParser.parse without loading the Schedule of
+    Classes. Each thread uses its own database connection.
+
+    :ivar path: the path of the database file
+    :ivar local: the database connection of each thread
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        """
+        Constructor for the Catalog class. The tables are created if they do
+        not exist yet.
+
+        :param self: the Catalog object
+        :param path: the path of the database file
+        """
+        self.path = path
+        self.local = threading.local()
+
+        directory = os.path.dirname(path)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.getDatabase().executescript(SCHEMA)
+
+    def getDatabase(self):
+        """
+        Returns the database connection of the current thread, opening it the
+        first time it is needed.
+
+        :param self: the Catalog object
+        :returns: the sqlite3.Connection object
+        """
+        database = getattr(self.local, "database", None)
+
+        if database is None:
+            database = self.local.database = sqlite3.connect(self.path)
+            database.execute("PRAGMA foreign_keys = ON")
+            database.execute("PRAGMA journal_mode = WAL")
+
+        return database
+
+    def close(self):
+        """
+        Closes the database connection of the current thread.
+
+        :param self: the Catalog object
+        """
+        database = getattr(self.local, "database", None)
+
+        if database is not None:
+            database.close()
+            self.local.database = None
+
+    def store(self, term, schedule, departments=()):
+        """
+        Stores the courses of a term, replacing any earlier copy of them.
+
+        :param self: the Catalog object
+        :param term: the term code
+        :param schedule: a dictionary with the course name as the key and list
+        of lectures as the value
+        :param departments: the departments whose stored courses of the term
+        are all replaced, so courses that are no longer offered are removed
+        """
+        term = term.upper()
+        database = self.getDatabase()
+
+        with database:
+            for department in departments:
+                database.execute("DELETE FROM courses WHERE term = ? AND "
+                                 "department = ?", (term, department.upper()))
+
+            for course, lectures in schedule.items():
+                database.execute("DELETE FROM courses WHERE term = ? AND "
+                                 "code = ?", (term, course))
+                courseID = database.execute(
+                    "INSERT INTO courses (term, code, department) "
+                    "VALUES (?, ?, ?)",
+                    (term, course, course.split()[0])).lastrowid
+
+                for lecturePosition, lecture in enumerate(lectures):
+                    lectureID = database.execute(
+                        "INSERT INTO lectures (course, position) "
+                        "VALUES (?, ?)", (courseID, lecturePosition)).lastrowid
+
+                    self.storeLecture(database, lectureID, lecture)
+
+    @staticmethod
+    def storeLecture(database, lectureID, lecture):
+        """
+        Stores the sections and final of a lecture.
+
+        :param database: the sqlite3.Connection object
+        :param lectureID: the row ID of the lecture
+        :param lecture: a dictionary with the meeting type as the key
+        """
+        position = 0
+
+        for meetingType, value in lecture.items():
+            if meetingType == "FI":
+                time = value["time"]
+                database.execute(
+                    "INSERT INTO finals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                    "?)", (lectureID, position, value["date"],
+                           value["building"], value["room"])
+                    + Catalog.getTimeValues(time))
+                position += 1
+
+                continue
+
+            for section in ([value] if meetingType == "LE" else value):
+                sectionID = database.execute(
+                    "INSERT INTO sections (lecture, position, type, "
+                    "sectionID, building, room, instructor) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (lectureID, position, meetingType, section["sectionID"],
+                     section["building"], section["room"],
+                     section["instructor"])).lastrowid
+                position += 1
+
+                if section["time"] is not None:
+                    database.execute(
+                        "INSERT INTO meetings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (sectionID,) + Catalog.getTimeValues(section["time"]))
+
+    @staticmethod
+    def getTimeValues(time):
+        """
+        Returns the columns that store a ClassTime.
+
+        :param time: the ClassTime object, or None
+        :returns: a tuple of the days, start, finish, start time, finish time
+        and day mask
+        """
+        if time is None:
+            return (None,) * 6
+
+        return (time.days, time.start, time.finish, time.startTime,
+                time.finishTime, time.dayMask)
+
+    @staticmethod
+    def getTime(days, start, finish, startTime, finishTime):
+        """
+        Creates the ClassTime stored in the given columns.
+
+        :returns: the ClassTime object, or None if there is no time
+        """
+        if days is None:
+            return None
+
+        return ClassTime.fromValues(days, start, finish, startTime, finishTime)
+
+    def getDepartments(self):
+        """
+        Returns every department that has been stored for any term.
+
+        :param self: the Catalog object
+        :returns: a sorted list of department codes
+        """
+        return [row[0] for row in self.getDatabase().execute(
+            "SELECT DISTINCT department FROM courses ORDER BY department")]
+
+    def getTerms(self):
+        """
+        Returns every term that has been stored.
+
+        :param self: the Catalog object
+        :returns: a sorted list of term codes
+        """
+        return [row[0] for row in self.getDatabase().execute(
+            "SELECT DISTINCT term FROM courses ORDER BY term")]
+
+    def getCourses(self, term, courses):
+        """
+        Reads courses of a term back from the catalog.
+
+        :param self: the Catalog object
+        :param term: the term code
+        :param courses: the course codes
+        :returns: a dictionary with the course name as the key and list of
+        lectures as the value, in the order of the given courses and without
+        the courses that are not stored
+        """
+        term = term.upper()
+        courses = list(dict.fromkeys(course.upper() for course in courses))
+        database = self.getDatabase()
+        codes = {}
+        entries = {}
+
+        for i in range(0, len(courses), MAX_PARAMETERS):
+            chunk = courses[i:i + MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            parameters = [term] + chunk
+
+            for courseID, code in database.execute(
+                    QUERY_COURSES.format(placeholders), parameters):
+                codes[code] = courseID
+                entries[courseID] = {}
+
+            # Collect the sections and finals of each lecture by position.
+            for row in database.execute(QUERY_SECTIONS.format(placeholders),
+                                        parameters):
+                meeting = {
+                    "sectionID": row[4],
+                    "time": Catalog.getTime(*row[8:13]),
+                    "building": row[5],
+                    "room": row[6],
+                    "instructor": row[7]
+                }
+                entries[row[0]].setdefault(row[1], []).append(
+                    (row[2], row[3], meeting))
+
+            for row in database.execute(QUERY_FINALS.format(placeholders),
+                                        parameters):
+                final = {
+                    "date": row[3],
+                    "time": Catalog.getTime(*row[6:11]),
+                    "building": row[4],
+                    "room": row[5]
+                }
+                entries[row[0]].setdefault(row[1], []).append(
+                    (row[2], "FI", final))
+
+        schedule = {}
+
+        for course in courses:
+            if course not in codes:
+                continue
+
+            lectures = schedule[course] = []
+
+            # Lecture row IDs are in the order the lectures were stored.
+            for lectureID, parts in sorted(entries[codes[course]].items()):
+                lecture = {}
+
+                for position, meetingType, value in sorted(
+                        parts, key=lambda part: part[0]):
+                    if meetingType in ("LE", "FI"):
+                        lecture[meetingType] = value
+                    else:
+                        lecture.setdefault(meetingType, []).append(value)
+
+                lectures.append(lecture)
+
+        return schedule
+
+    def search(self, term, instructor=None, days=None, startAfter=None,
+               startBefore=None):
+        """
+        Finds the courses of a term with a section that matches every given
+        condition.
+
+        :param self: the Catalog object
+        :param term: the term code
+        :param instructor: the exact name of an instructor
+        :param days: the exact days a section meets on, such as "TuTh"
+        :param startAfter: the earliest start time in minutes
+        :param startBefore: the latest start time in minutes
+        :returns: a sorted list of course codes
+        """
+        conditions = ["courses.term = ?"]
+        parameters = [term.upper()]
+
+        if instructor is not None:
+            conditions.append("sections.instructor = ?")
+            parameters.append(instructor)
+
+        if days is not None:
+            conditions.append("meetings.dayMask = ?")
+            parameters.append(ClassTime.toDayMask(days))
+
+        if startAfter is not None:
+            conditions.append("meetings.startTime >= ?")
+            parameters.append(startAfter)
+
+        if startBefore is not None:
+            conditions.append("meetings.startTime <= ?")
+            parameters.append(startBefore)
+
+        query = ("SELECT DISTINCT courses.code FROM courses "
+                 "JOIN lectures ON lectures.course = courses.id "
+                 "JOIN sections ON sections.lecture = lectures.id "
+                 "LEFT JOIN meetings ON meetings.section = sections.id "
+                 "WHERE " + " AND ".join(conditions)
+                 + " ORDER BY courses.code")
+
+        return [row[0] for row in self.getDatabase().execute(query,
+                                                             parameters)]
+
+def ingest(catalog, term, departments, schedule=None):
+    """
+    Loads every course of the given departments for a term from the Schedule
+    of Classes and stores them in the catalog. The courses of a department
+    that were stored before are replaced, unless its page could not be
+    parsed.
+
+    :param catalog: the Catalog object
+    :param term: the term code
+    :param departments: the department codes, such as "CSE"
+    :param schedule: the Schedule object used to load the courses
+    :raises: ScheduleError, ClassParserError, requests.RequestException
+    :returns: the number of courses stored
+    """
+    schedule = schedule or Schedule()
+    schedule.term = term.upper()
+    parsed = []
+    found = schedule.retrieveShards([department.upper()
+                                     for department in departments], True,
+                                    parsed)
+    catalog.store(term, found, parsed)
+
+    return len(found)
+
+def main():
+    """
+    Ingests the departments given on the command line, or every department
+    already in the catalog, for a term.
+    """
+    parser = argparse.ArgumentParser(
+        description="Stores whole departments of a term in a local catalog.")
+    parser.add_argument("term")
+    parser.add_argument("departments", nargs="*")
+    parser.add_argument("--path", default=CATALOG_PATH)
+    arguments = parser.parse_args()
+
+    catalog = Catalog(arguments.path)
+    departments = arguments.departments or catalog.getDepartments()
+
+    if not departments:
+        parser.error("no departments given and none are in the catalog yet")
+
+    count = ingest(catalog, arguments.term, departments)
+
+    print("Stored " + str(count) + " courses of " + arguments.term.upper())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+from bisect import bisect_right
+from random import randint
+
+# The meeting types of sections that have been seen, indexed by their ids.
+meetingTypes = []
+
+# The ids of the meeting types of sections that have been seen.
+meetingTypeIds = {}
+
+def getMeetingTypeId(meetingType):
+    """
+    Returns the small integer id for a meeting type such as DI or LA, giving
+    the meeting type a new id if it has not been seen before.
+
+    :param meetingType: the meeting type
+    :returns: the id of the meeting type
+    """
+    typeId = meetingTypeIds.get(meetingType)
+
+    if typeId is None:
+        typeId = len(meetingTypes)
+        meetingTypes.append(meetingType)
+        meetingTypeIds[meetingType] = typeId
+
+    return typeId
+
+class Chromosome(object):
+    """
+    The Chromosome class represents all the possible genes of a course, where
+    a gene is a specific lecture and one section of each type for that
+    lecture. Each gene is a tuple of the lecture index followed by a section
+    index for each of the lecture's section types.
+
+    The genes are never stored. Instead, each lecture keeps the number of
+    sections of each type, and a gene index is decoded as a mixed-radix number
+    on demand, in the same order as the Cartesian product of the sections.
+
+    :ivar sectionTypes: for each lecture, the ids of its section types
+    :ivar radices: for each lecture, the number of sections of each type
+    :ivar offsets: the index of the first gene of each lecture, followed by
+    the total number of genes
+    """
+
+    def __init__(self, lectures):
+        """
+        Constructor for the Chromosome class. The constructor counts the
+        sections of each type for each lecture of a course.
+
+        :param self: the Chromosome object
+        :param lectures: the list of lectures of the course from the schedule
+        """
+        self.sectionTypes = []
+        self.radices = []
+        self.offsets = [0]
+
+        for lecture in lectures:
+            types = [meetingType for meetingType in lecture
+                     if meetingType != "LE" and meetingType != "FI"]
+            radices = tuple(len(lecture[meetingType]) for meetingType in types)
+            count = 1
+
+            for radix in radices:
+                count *= radix
+
+            self.sectionTypes.append(tuple(getMeetingTypeId(meetingType)
+                                           for meetingType in types))
+            self.radices.append(radices)
+            self.offsets.append(self.offsets[-1] + count)
+
+    def getIndex(self, gene):
+        """
+        Encodes a gene tuple into its gene index.
+
+        :param self: the Chromosome object
+        :param gene: the lecture index followed by the index of each section
+        :returns: the index of the gene
+        """
+        lecture = gene[0]
+        index = 0
+
+        for radix, section in zip(self.radices[lecture], gene[1:]):
+            index = index * radix + section
+
+        return self.offsets[lecture] + index
+
+    def getMeetings(self, index):
+        """
+        Returns the meetings used by a gene as a list of meeting types and the
+        index of the lecture or section of that type.
+
+        :param self: the Chromosome object
+        :param index: the index of the gene
+        :returns: a list of (meeting type, index) pairs, starting with LE
+        """
+        gene = self[index]
+        lecture = gene[0]
+        meetings = [("LE", lecture)]
+
+        for typeId, section in zip(self.sectionTypes[lecture], gene[1:]):
+            meetings.append((meetingTypes[typeId], section))
+
+        return meetings
+
+    def getGene(self, index):
+        """
+        Returns a gene as a dictionary of meeting type to the index of the
+        lecture or section, such as {"LE": 0, "DI": 2}.
+
+        :param self: the Chromosome object
+        :param index: the index of the gene
+        :returns: the gene as a dictionary
+        """
+        return dict(self.getMeetings(index))
+
+    def sample(self):
+        """
+        Returns the index of a uniformly random gene.
+
+        :param self: the Chromosome object
+        :returns: the index of the gene
+        """
+        return randint(0, len(self) - 1)
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, index):
+        if index < 0 or index >= self.offsets[-1]:
+            raise IndexError("gene index out of range")
+
+        # Find the lecture, then the section of each type from the last type
+        # (which changes fastest) to the first.
+        lecture = bisect_right(self.offsets, index) - 1
+        rest = index - self.offsets[lecture]
+        sections = []
+
+        for radix in reversed(self.radices[lecture]):
+            rest, section = divmod(rest, radix)
+            sections.append(section)
+
+        sections.append(lecture)
+        sections.reverse()
+
+        return tuple(sections)
@@ -1,17 +1,27 @@
 #/usr/bin/env python
 
-from lxml import html
+from lxml import etree
 from classtime import ClassTime
 
 import re
+import sys
 
-# The XPath query for finding parts of a course.
-QUERY_RESULT = '//tr[@class="sectxt" or @class="nonenrtxt"]|//h2|' \
-               '//tr[.//td[@class="crsheader"]]'
+# The XPath query for finding the course header inside of a row.
+QUERY_HEADER = './/td[@class="crsheader"]'
+
+# The classes of the rows that hold a course meeting.
+CLASS_MEETINGS = ("sectxt", "nonenrtxt")
+
+# The tags of the elements that hold parts of a course.
+TAGS_RESULT = ("tr", "h2")
 
 # The XPath query for finding the course code without the number.
 REGEX_CODE = "\(([A-Z][A-Z][A-Z]*[A-Z]*)\s+\)"
 
+# The compiled versions of the above query and pattern.
+headerQuery = etree.XPath(QUERY_HEADER)
+codePattern = re.compile(REGEX_CODE)
+
 # Column number for certain parts of a course.
 INDEX_ID = 1
 INDEX_TYPE = 2
@@ -34,14 +44,48 @@ class ClassParserError(Exception):
     """
     pass
 
+def isResult(element):
+    """
+    Checks whether or not an h2 or tr element holds part of a course: a
+    department header, a course header or a course meeting.
+
+    :param element: the HTML element
+    :returns: True if the element holds part of a course, False otherwise
+    """
+    return (element.tag == "h2" or element.get("class") in CLASS_MEETINGS or
+            bool(headerQuery(element)))
+
+def getText(element):
+    """
+    Returns the stripped text inside of an element. Most cells only hold
+    text, which is read directly instead of walking the cell.
+
+    :param element: the HTML element
+    :returns: the text as a string
+    """
+    if len(element):
+        return "".join(element.itertext()).strip()
+
+    return (element.text or "").strip()
+
 class ClassParser(object):
     """
     The ClassParser class scrapes data from the UCSD Schedule of Classes and
-    turns the found data into a usable format.
+    turns the found data into a usable format. Data can either be loaded and
+    parsed as a whole, or parsed as a stream of chunks while it is still being
+    downloaded.
 
     :ivar elements: important HTML elements for scraping data
     """
 
+    def __init__(self):
+        """
+        Constructor for the ClassParser class.
+
+        :param self: the parser object
+        """
+        self.elements = []
+
     def load(self, data):
         """
         Creates a tree from the HTML contents from the given HTML data for use
@@ -50,8 +94,15 @@ class ClassParser(object):
         :param self: the parser object
         :param data: the HTML data from the Schedule of Classes
         """
-        tree = html.fromstring(data)
-        self.elements = tree.xpath(QUERY_RESULT)
+        tree = etree.fromstring(data, etree.HTMLParser())
+
+        # Walking the tree once is much faster than an XPath union, which
+        # merges the node sets of each part of the union.
+        if tree is None:
+            self.elements = []
+        else:
+            self.elements = [element for element in tree.iter(TAGS_RESULT)
+                             if isResult(element)]
 
     def parse(self):
         """
@@ -62,45 +113,125 @@ class ClassParser(object):
         :raises: ClassParserError
         :returns: the list of lectures and sections found
         """
+        if not self.elements:
+            raise ClassParserError("no data loaded for parsing")
+
         schedule = {}
+
+        for course, lectures in self.parseElements(self.elements):
+            schedule.setdefault(course, []).extend(lectures)
+
+        return schedule
+
+    def parseStream(self, chunks):
+        """
+        Parses HTML data from the Schedule of Classes as it arrives in chunks,
+        such as from requests.Response.iter_content. Each course is yielded
+        as soon as the rows after it are seen, and rows are freed once they
+        are parsed, so only a small part of the page is in memory at once.
+
+        :param self: the parser object
+        :param chunks: an iterable of chunks of the HTML data
+        :raises: ClassParserError
+        :returns: a generator of (course name, list of lectures) tuples
+        """
+        found = False
+
+        for course in self.parseElements(self.readElements(chunks)):
+            found = True
+
+            yield course
+
+        if not found:
+            raise ClassParserError("no data loaded for parsing")
+
+    def readElements(self, chunks):
+        """
+        Feeds chunks of HTML data to an incremental parser and yields the
+        elements that hold parts of a course as soon as they are complete.
+        Every element before a yielded one is removed from the tree once it
+        has been used.
+
+        :param self: the parser object
+        :param chunks: an iterable of chunks of the HTML data
+        :returns: a generator of the important HTML elements
+        """
+        parser = etree.HTMLPullParser(events=("end",), tag=TAGS_RESULT)
+
+        def readEvents():
+            for action, element in parser.read_events():
+                if isResult(element):
+                    yield element
+
+                # Free the element and everything before it, since they were
+                # already parsed.
+                element.clear()
+
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+        for chunk in chunks:
+            parser.feed(chunk)
+
+            yield from readEvents()
+
+        parser.close()
+
+        yield from readEvents()
+
+    def parseElements(self, elements):
+        """
+        Finds the lectures, sections, and final times in the important HTML
+        elements, in the order they appear. Each course is yielded once the
+        element after its last row is seen, or once there are no elements
+        left.
+
+        :param self: the parser object
+        :param elements: an iterable of the important HTML elements
+        :returns: a generator of (course name, list of lectures) tuples
+        """
         course = None
+        lectures = []
         courseInfo = None
         courseCode = ""
-        courseNum = 0
-
-        if not self.elements:
-            raise ClassParserError("no data loaded for parsing")
+        intern = sys.intern
 
-        for element in self.elements:
+        for element in elements:
             if element.tag == "h2":
-                match = re.search(REGEX_CODE, element.text_content())
+                match = codePattern.search("".join(element.itertext()))
 
                 # Change the current course if a header for it was encountered.
                 if match:
                     courseCode = match.group(1)
             elif (element.tag == "tr" and len(element) == LEN_HEADER and
                   courseCode):
-                if (course and course in schedule and courseInfo is not None and
-                    len(courseInfo) > 0):
-                    schedule[course].append(courseInfo)
+                if courseInfo:
+                    lectures.append(courseInfo)
 
                 # Set the course number if it was found in the course header.
-                course = (courseCode + " " + element[1].text_content().strip())
+                newCourse = courseCode + " " + getText(element[1])
 
-                if course not in schedule:
-                    schedule[course] = []
+                # The previous course is complete once another one starts.
+                if newCourse != course:
+                    if course is not None:
+                        yield course, lectures
+
+                    course = newCourse
+                    lectures = []
 
                 courseInfo = {}
             elif courseInfo is not None and len(element) == LEN_MEETING:
-                # Get the parts of the meeting.
-                sectionID = element[INDEX_ID].text_content().strip()
-                meetingType = element[INDEX_TYPE].text_content().strip()
-                section = element[INDEX_SECTION].text_content().strip()
-                days = element[INDEX_DAYS].text_content().strip()
-                times = element[INDEX_TIMES].text_content().strip()
-                building = element[INDEX_BUILDING].text_content().strip()
-                room = element[INDEX_ROOM].text_content().strip()
-                instructor = element[INDEX_INSTR].text_content().strip()
+                # Get the parts of the meeting in a single pass over the
+                # cells, sharing the strings that repeat across meetings.
+                cells = [getText(cell) for cell in element]
+                sectionID = cells[INDEX_ID]
+                meetingType = intern(cells[INDEX_TYPE])
+                section = cells[INDEX_SECTION]
+                days = cells[INDEX_DAYS]
+                times = cells[INDEX_TIMES]
+                building = intern(cells[INDEX_BUILDING])
+                room = intern(cells[INDEX_ROOM])
+                instructor = intern(cells[INDEX_INSTR])
 
                 # If the meeting is a final, then add it to the course in its
                 # own format instead of a list, since a list is not needed.
@@ -110,11 +241,10 @@ class ClassParser(object):
                         "time": ClassTime.fromString(days + " " + times),
                         "building": building,
                         "room": room
-                    }    
+                    }
 
                     continue
 
-
                 # Otherwise, add the meeting normally.
                 meeting = {
                     "sectionID": sectionID,
@@ -137,7 +267,8 @@ class ClassParser(object):
                     courseInfo[meetingType].append(meeting)
 
         # Add any leftover course.
-        if courseInfo is not None and len(courseInfo) > 0:
-            schedule[course].append(courseInfo)
+        if course is not None:
+            if courseInfo:
+                lectures.append(courseInfo)
 
-        return schedule
+            yield course, lectures
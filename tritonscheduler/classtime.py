@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
 import re
+import threading
+
+from collections import OrderedDict
 
 # The number of minutes in an hour.
 HOUR = 60
@@ -13,6 +16,22 @@ REGEX_DAY = "([A-Z][a-z]*)"
 # The number of hours on a 12-hour clock.
 MAX_HOURS = 12
 
+# The bit used for each day of the week in a day mask.
+DAY_BITS = {"M": 1, "Tu": 2, "W": 4, "Th": 8, "F": 16, "S": 32, "Su": 64}
+
+# Cache of day strings that have already been turned into day masks.
+dayMasks = {}
+
+# The maximum number of time strings whose ClassTime is kept for reuse.
+CACHE_SIZE = 4096
+
+# Cache of time strings that have already been turned into frozen ClassTime
+# objects (or None if they are not valid), from least to most recently used.
+classTimes = OrderedDict()
+
+# Guards classTimes, since schedules may be parsed on several threads at once.
+classTimesLock = threading.Lock()
+
 # Indices for matched values from the above patterns.
 INDEX_DAYS = 1
 INDEX_START = 2
@@ -28,11 +47,15 @@ class ClassTime(object):
     comparison of various class times.
 
     :ivar days: the days this class occurs on (M, Tu, W, Th, F)
+    :ivar dayMask: the days this class occurs on as bits from DAY_BITS
     :ivar start: the start time of this class in the hh:mma/p format
     :ivar finish: the finish time of this class in the hh:mma/p format
     :ivar startTime: the numeric representation of the start time (in minutes)
     :ivar finishTime: the numberic representation of the finish time
+    :ivar frozen: whether or not the ClassTime can no longer be changed
     """
+    __slots__ = ("_days", "dayMask", "start", "finish", "startTime",
+                 "finishTime", "frozen")
 
     def __init__(self):
         """
@@ -47,6 +70,65 @@ class ClassTime(object):
         self.startTime = 0
         self.finishTime = (11 * HOUR) + 59
 
+    def __setattr__(self, name, value):
+        if getattr(self, "frozen", False):
+            raise AttributeError("a frozen ClassTime cannot be changed")
+
+        object.__setattr__(self, name, value)
+
+    def __reduce_ex__(self, protocol):
+        # A frozen ClassTime is loaded back through the cache, so loaded
+        # meetings share ClassTime objects again.
+        if getattr(self, "frozen", False):
+            return (ClassTime.fromString, (self.toString(),))
+
+        return object.__reduce_ex__(self, protocol)
+
+    def freeze(self):
+        """
+        Stops the ClassTime object from being changed, so it can be shared and
+        used as a dictionary key.
+
+        :param self: the ClassTime object
+        :returns: the ClassTime object
+        """
+        self.frozen = True
+
+        return self
+
+    @property
+    def days(self):
+        """
+        The days this class occurs on as a string such as MWF.
+        """
+        return self._days
+
+    @days.setter
+    def days(self, newDays):
+        self._days = newDays
+        self.dayMask = ClassTime.toDayMask(newDays)
+
+    @staticmethod
+    def toDayMask(days):
+        """
+        Converts a string of days into a day mask with one bit per day. The
+        result is cached since the same day strings are used repeatedly.
+
+        :param days: the days as a string such as MWF or TuTh
+        :returns: the day mask for the given days
+        """
+        mask = dayMasks.get(days)
+
+        if mask is None:
+            mask = 0
+
+            for day in re.findall(REGEX_DAY, days):
+                mask |= DAY_BITS.get(day, 0)
+
+            dayMasks[days] = mask
+
+        return mask
+
     @staticmethod
     def toMinutes(hour, minutes, period):
         """
@@ -83,21 +165,61 @@ class ClassTime(object):
         weekday followed by a start time, a dash, and a finish time. Note that
         None will be returned if the given date string is not in a valid format.
 
+        The same strings are used by many meetings, so the result is frozen
+        and the same object is returned for the same string until it is
+        pushed out of the cache of the last CACHE_SIZE strings.
+
         :param thisClass: the ClassTime class
         :param date: the string representation of the ClassTime
-        :returns: a corresponding ClassTime object if valid, None otherwise
+        :returns: a corresponding frozen ClassTime object if valid, None
+        otherwise
         """
+        with classTimesLock:
+            if date in classTimes:
+                classTimes.move_to_end(date)
+
+                return classTimes[date]
+
         match = re.fullmatch(REGEX_CLASSTIME, date.strip())
+        time = None
 
-        if not match:
-            return None
+        if match:
+            time = thisClass()
+            time.days = match.group(INDEX_DAYS)
+            time.setTimes(match.group(INDEX_START), match.group(INDEX_FINISH))
+            time.freeze()
 
-        time = thisClass()
-        time.days = match.group(INDEX_DAYS)
-        time.setTimes(match.group(INDEX_START), match.group(INDEX_FINISH))
+        with classTimesLock:
+            classTimes[date] = time
+
+            if len(classTimes) > CACHE_SIZE:
+                classTimes.popitem(last=False)
 
         return time
 
+    @classmethod
+    def fromValues(thisClass, days, start, finish, startTime, finishTime):
+        """
+        Creates a frozen ClassTime object from values that are already known,
+        such as ones that were saved earlier, without parsing any strings.
+
+        :param thisClass: the ClassTime class
+        :param days: the days the class occurs on
+        :param start: the start time in the hh:mma/p format
+        :param finish: the finish time in the hh:mma/p format
+        :param startTime: the start time in minutes
+        :param finishTime: the finish time in minutes
+        :returns: the new frozen ClassTime object
+        """
+        time = thisClass.__new__(thisClass)
+        time.days = days
+        time.start = start
+        time.finish = finish
+        time.startTime = startTime
+        time.finishTime = finishTime
+
+        return time.freeze()
+
     def setTimes(self, newStart, newFinish):
         """
         Sets the time range for the class time. The times are formatted as
@@ -209,7 +331,7 @@ class ClassTime(object):
         :returns: whether or not there is any time overlap (if any days match)
         """
         # Check day conflicts before time conflicts.
-        if not self.isOnDay(other.days):
+        if not (self.dayMask & other.dayMask):
             return False
 
         return (self.startTime <= other.finishTime and
@@ -221,14 +343,13 @@ class ClassTime(object):
         day.
 
         :param self: the ClassTime object
-        :param day: a day of the week
+        :param day: a day of the week, or a day mask
         :returns: whether or not the ClassTime occurs on the given day
         """
-        for day in re.findall(REGEX_DAY, day):
-            if self.days.find(day) > -1:
-                return True
+        if type(day) is not int:
+            day = ClassTime.toDayMask(day)
 
-        return False
+        return (self.dayMask & day) != 0
 
     def toString(self):
         """
@@ -242,6 +363,29 @@ class ClassTime(object):
         """
         return self.days + " " + self.start + "-" + self.finish
 
+    def __eq__(self, other):
+        """
+        Returns whether or not the given ClassTime object occurs on the same
+        days and at the same times as this ClassTime.
+
+        :param self: the ClassTime object
+        :param other: the other ClassTime object to compare with
+        :returns: whether or not the ClassTime objects are equal
+        """
+        if type(other) is not ClassTime:
+            return NotImplemented
+
+        return (self.dayMask == other.dayMask and
+                self.startTime == other.startTime and
+                self.finishTime == other.finishTime)
+
+    def __hash__(self):
+        # The hash of a ClassTime that can still change would go stale.
+        if not getattr(self, "frozen", False):
+            raise TypeError("only a frozen ClassTime can be hashed")
+
+        return hash((self.dayMask, self.startTime, self.finishTime))
+
     def __str__(self):
         return self.toString()
 
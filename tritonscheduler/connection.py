@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import threading
+import time
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+# The default number of connections kept alive for each host.
+POOL_SIZE = 8
+
+# The default number of seconds that priming cookies are reused for.
+PRIME_TTL = 15 * 60
+
+# The Connection shared by the whole process.
+sharedConnection = None
+
+# Guards the creation of the shared Connection.
+sharedLock = threading.Lock()
+
+def getConnection():
+    """
+    Returns the Connection shared by the whole process, creating it the first
+    time it is needed.
+
+    :returns: the shared Connection object
+    """
+    global sharedConnection
+
+    with sharedLock:
+        if sharedConnection is None:
+            sharedConnection = Connection()
+
+        return sharedConnection
+
+class Connection(object):
+    """
+    The Connection class is a thread-safe pool of keep-alive connections to
+    the Schedule of Classes. The Schedule of Classes needs a priming request
+    to set session cookies before the printable page can be loaded, so the
+    cookies from a priming request are reused until they expire and only then
+    is another priming request made.
+
+    :ivar session: the requests.Session that holds the connections and cookies
+    :ivar primeTTL: the number of seconds that priming cookies are reused for
+    :ivar expiry: per priming key, when its cookies expire
+    :ivar lock: guards priming so only one priming request is made at a time
+    """
+
+    def __init__(self, poolSize=POOL_SIZE, primeTTL=PRIME_TTL):
+        """
+        Constructor for the Connection class.
+
+        :param self: the Connection object
+        :param poolSize: the number of connections kept alive for each host
+        :param primeTTL: the number of seconds that priming cookies are reused
+        for
+        """
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.primeTTL = primeTTL
+        self.expiry = {}
+        self.lock = threading.Lock()
+
+    def prime(self, url, key):
+        """
+        Loads a page to set session cookies, unless the cookies from a
+        previous priming request with the same key are still valid.
+
+        :param self: the Connection object
+        :param url: the URL of the page that sets the cookies
+        :param key: what the cookies are valid for, such as the base URL
+        :raises: requests.RequestException
+        """
+        with self.lock:
+            if time.monotonic() < self.expiry.get(key, 0):
+                return
+
+            self.session.get(url)
+            self.expiry[key] = time.monotonic() + self.primeTTL
+
+    def invalidate(self, key):
+        """
+        Forgets the priming cookies for a key, so the next request primes
+        again.
+
+        :param self: the Connection object
+        :param key: what the cookies are valid for
+        """
+        with self.lock:
+            self.expiry.pop(key, None)
+
+    def get(self, url, **kwargs):
+        """
+        Loads a page using one of the pooled connections.
+
+        :param self: the Connection object
+        :param url: the URL of the page
+        :param kwargs: any other arguments of requests.Session.get
+        :raises: requests.RequestException
+        :returns: the requests.Response object
+        """
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+
+        :param self: the Connection object
+        """
+        self.session.close()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+import os
+import pickle
+import tempfile
+import time
+
+# The default directory that courses are cached in.
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".tritonscheduler",
+                               "courses")
+
+# The default number of seconds a cached course is used without checking if
+# it changed.
+CACHE_TTL = 24 * 60 * 60
+
+# The version of the cache entries, which is changed whenever their format
+# changes so older entries are ignored.
+CACHE_VERSION = 1
+
+class CourseCache(object):
+    """
+    The CourseCache class stores the parsed schedule data of each course of a
+    term on disk, along with the validators (ETag and Last-Modified) of the
+    response it came from. Entries that are older than the TTL are stale, and
+    can be revalidated with a conditional request instead of being loaded
+    again. Courses that were not found are cached too, so they are not
+    searched for again until they are stale.
+
+    :ivar directory: the directory the entries are stored in
+    :ivar ttl: the number of seconds an entry is fresh for
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, ttl=CACHE_TTL):
+        """
+        Constructor for the CourseCache class.
+
+        :param self: the CourseCache object
+        :param directory: the directory the entries are stored in
+        :param ttl: the number of seconds an entry is fresh for
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def getPath(self, term, course):
+        """
+        Returns the path of the file that stores the entry of a course.
+
+        :param self: the CourseCache object
+        :param term: the term code
+        :param course: the course code
+        :returns: the path of the file
+        """
+        return os.path.join(self.directory, term.upper(),
+                            course.upper().replace(" ", "_") + ".pickle")
+
+    def get(self, term, course):
+        """
+        Returns the entry of a course, which is a dictionary with the time it
+        was stored, the validators of its response, and its lectures (None if
+        the course was not found).
+
+        :param self: the CourseCache object
+        :param term: the term code
+        :param course: the course code
+        :returns: the entry, or None if the course is not cached
+        """
+        try:
+            with open(self.getPath(term, course), "rb") as source:
+                entry = pickle.load(source)
+        except Exception:
+            # Any entry that cannot be loaded is treated as not cached.
+            return None
+
+        if not isinstance(entry, dict) or \
+           entry.get("version") != CACHE_VERSION:
+            return None
+
+        return entry
+
+    def isFresh(self, entry):
+        """
+        Returns whether or not an entry can be used without checking if the
+        course changed.
+
+        :param self: the CourseCache object
+        :param entry: the entry of a course
+        :returns: True if the entry is fresh, False if it is stale
+        """
+        return time.time() - entry["time"] < self.ttl
+
+    def put(self, term, course, lectures, etag=None, lastModified=None):
+        """
+        Stores the entry of a course.
+
+        :param self: the CourseCache object
+        :param term: the term code
+        :param course: the course code
+        :param lectures: the lectures of the course, or None if it was not
+        found
+        :param etag: the ETag of the response the course came from
+        :param lastModified: the Last-Modified date of the response the course
+        came from
+        :returns: the new entry
+        """
+        entry = {
+            "version": CACHE_VERSION,
+            "time": time.time(),
+            "etag": etag,
+            "lastModified": lastModified,
+            "lectures": lectures
+        }
+
+        self.write(self.getPath(term, course), entry)
+
+        return entry
+
+    def touch(self, term, course, entry):
+        """
+        Marks an entry as fresh again after the course was found to be
+        unchanged.
+
+        :param self: the CourseCache object
+        :param term: the term code
+        :param course: the course code
+        :param entry: the entry of the course
+        """
+        entry["time"] = time.time()
+
+        self.write(self.getPath(term, course), entry)
+
+    def write(self, path, entry):
+        """
+        Writes an entry to a file. The entry is written to a temporary file
+        first, so a reader never sees a partly written entry.
+
+        :param self: the CourseCache object
+        :param path: the path of the file
+        :param entry: the entry to write
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        handle, temporary = tempfile.mkstemp(dir=directory)
+
+        try:
+            with os.fdopen(handle, "wb") as output:
+                pickle.dump(entry, output, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+
+            raise
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+
+from ranking import Ranking
+
+# The largest search space (number of possible individuals) that is solved
+# exactly instead of with the genetic algorithm.
+MAX_EXACT_SPACE = 100000
+
+# The strategies that can be chosen for finding a schedule.
+STRATEGY_EXACT = "exact"
+STRATEGY_GENETIC = "genetic"
+
+def getSearchSpace(table):
+    """
+    Returns the number of possible individuals, which is the product of the
+    number of genes of every course.
+
+    :param table: the FitnessTable of the schedule
+    :returns: the size of the search space
+    """
+    size = 1
+
+    for chromosome in table.chromosomes:
+        size *= len(chromosome)
+
+    return size
+
+def selectStrategy(table, maxSpace=MAX_EXACT_SPACE):
+    """
+    Picks whether a schedule should be found with the exact solver or with
+    the genetic algorithm, based on the size of the search space.
+
+    :param table: the FitnessTable of the schedule
+    :param maxSpace: the largest search space that is solved exactly
+    :returns: STRATEGY_EXACT or STRATEGY_GENETIC
+    """
+    if getSearchSpace(table) <= maxSpace:
+        return STRATEGY_EXACT
+
+    return STRATEGY_GENETIC
+
+class ExactSolver(object):
+    """
+    The ExactSolver class finds the individual with the highest fitness with a
+    depth-first branch-and-bound search over the courses. A branch is skipped
+    if its genes have a time conflict, or if an upper bound on the fitness it
+    could reach is not better than the best individual found so far.
+
+    Genes with time conflicts are only considered if no schedule without
+    conflicts exists, or if conflicts are allowed. In that case, the result
+    is the best schedule among all possible schedules.
+
+    More than one result can be kept, in which case a branch is only skipped
+    if it could not beat the least fit of the results found so far.
+
+    :ivar table: the FitnessTable of the schedule
+    :ivar allowConflicts: whether or not genes with time conflicts are searched
+    :ivar results: the number of the fittest distinct individuals to find
+    :ivar ranking: the Ranking of the fittest individuals found so far
+    :ivar order: the course indices in the order they are searched
+    :ivar maxPairs: per pair of courses, the highest fitness of any gene pair
+    :ivar best: the best gene indices found, in the order of the courses
+    :ivar fitness: the fitness value of the best gene indices
+    :ivar nodes: the number of partial schedules visited by the search
+    """
+
+    def __init__(self, table, allowConflicts=False, results=1):
+        """
+        Constructor for the ExactSolver class.
+
+        :param self: the ExactSolver object
+        :param table: the FitnessTable of the schedule
+        :param allowConflicts: whether or not genes with time conflicts are
+        searched
+        :param results: the number of the fittest distinct individuals to find
+        """
+        self.table = table
+        self.allowConflicts = allowConflicts
+        self.results = max(results, 1)
+        self.ranking = Ranking(self.results)
+        self.best = None
+        self.fitness = None
+        self.nodes = 0
+
+        # Courses with fewer genes are searched first so that fewer branches
+        # have to be bounded near the root.
+        courses = len(table.courses)
+        self.order = sorted(range(courses),
+                            key=lambda i: len(table.chromosomes[i]))
+        self.maxPairs = [[0] * courses for i in range(courses)]
+
+        for i in range(courses):
+            for j in range(i + 1, courses):
+                highest = max(max(row) for row in table.getPairScores(i, j))
+                self.maxPairs[i][j] = self.maxPairs[j][i] = highest
+
+    def getPair(self, course, gene, course2, gene2):
+        """
+        Returns the fitness of a pair of genes from two different courses in
+        any order.
+
+        :param self: the ExactSolver object
+        :param course: the index of the first course
+        :param gene: the index of the gene of the first course
+        :param course2: the index of the second course
+        :param gene2: the index of the gene of the second course
+        :returns: the fitness of the pair of genes
+        """
+        if course < course2:
+            return self.table.getPair(course, course2, gene, gene2)
+
+        return self.table.getPair(course2, course, gene2, gene)
+
+    def solve(self):
+        """
+        Searches for the individual with the highest fitness.
+
+        :param self: the ExactSolver object
+        :returns: the best gene indices in the order of the courses, or None
+        if a course has no genes
+        """
+        genes = [None] * len(self.order)
+        self.ranking = Ranking(self.results)
+        self.best = None
+        self.fitness = None
+        self.nodes = 0
+
+        if any(len(chromosome) == 0 for chromosome in self.table.chromosomes):
+            return None
+
+        self.search(0, genes, 0, self.allowConflicts)
+
+        # Fall back to schedules with conflicts if none without exist.
+        if not self.ranking.getRanked():
+            self.search(0, genes, 0, True)
+
+        self.best, self.fitness = self.ranking.getRanked()[0]
+
+        return self.best
+
+    def getRanked(self):
+        """
+        Returns the fittest distinct individuals found by the last search.
+
+        :param self: the ExactSolver object
+        :returns: a list of (genes, fitness) tuples from most to least fit,
+        where the genes are in the order of the courses
+        """
+        return self.ranking.getRanked()
+
+    def search(self, depth, genes, fitness, allowConflicts):
+        """
+        Tries every gene for the course at the given depth, then searches the
+        following courses for each gene that could beat the best individual.
+
+        :param self: the ExactSolver object
+        :param depth: the position of the course in the search order
+        :param genes: the gene indices chosen so far, in course order
+        :param fitness: the fitness of the genes chosen so far
+        :param allowConflicts: whether or not genes with time conflicts are
+        searched
+        """
+        self.nodes += 1
+
+        if depth == len(self.order):
+            self.ranking.add(tuple(genes), fitness, list(genes))
+
+            return
+
+        table = self.table
+        course = self.order[depth]
+        assigned = self.order[:depth]
+        remaining = self.order[depth + 1:]
+        candidates = []
+
+        # Find how much fitness each gene adds to the genes chosen so far.
+        for gene in range(len(table.chromosomes[course])):
+            if not allowConflicts and self.hasConflict(course, gene, genes,
+                                                       assigned):
+                continue
+
+            gain = table.getUnary(course, gene)
+
+            for other in assigned:
+                gain += self.getPair(course, gene, other, genes[other])
+
+            candidates.append((gain, gene))
+
+        # Try the most promising genes first so the bound tightens quickly.
+        candidates.sort(reverse=True)
+
+        for gain, gene in candidates:
+            genes[course] = gene
+
+            bound = fitness + gain + self.getBound(genes, depth + 1,
+                                                   remaining)
+
+            if not self.ranking.accepts(bound):
+                # Candidates are sorted by gain, but the bound also depends on
+                # the gene, so later candidates may still beat the results.
+                continue
+
+            self.search(depth + 1, genes, fitness + gain, allowConflicts)
+
+        genes[course] = None
+
+    def getBound(self, genes, depth, remaining):
+        """
+        Returns an upper bound on the fitness that the courses which do not
+        have a gene yet can add.
+
+        :param self: the ExactSolver object
+        :param genes: the gene indices chosen so far, in course order
+        :param depth: the number of courses that have a gene
+        :param remaining: the indices of the courses without a gene
+        :returns: the upper bound
+        """
+        table = self.table
+        assigned = self.order[:depth]
+        bound = 0
+
+        for i in range(len(remaining)):
+            course = remaining[i]
+            highest = None
+
+            # The best each remaining course can do with the chosen genes.
+            for gene in range(len(table.chromosomes[course])):
+                gain = table.getUnary(course, gene)
+
+                for other in assigned:
+                    gain += self.getPair(course, gene, other, genes[other])
+
+                if highest is None or gain > highest:
+                    highest = gain
+
+            bound += highest
+
+            # The best any pair of remaining courses can do together.
+            for j in range(i + 1, len(remaining)):
+                bound += self.maxPairs[course][remaining[j]]
+
+        return bound
+
+    def hasConflict(self, course, gene, genes, assigned):
+        """
+        Returns whether or not a gene has a time conflict with itself or with
+        any of the genes chosen so far.
+
+        :param self: the ExactSolver object
+        :param course: the index of the course of the gene
+        :param gene: the index of the gene
+        :param genes: the gene indices chosen so far, in course order
+        :param assigned: the indices of the courses that have a gene
+        :returns: True if there is a time conflict, False otherwise
+        """
+        if self.table.hasConflict(course, gene, course, gene):
+            return True
+
+        for other in assigned:
+            if self.table.hasConflict(course, gene, other, genes[other]):
+                return True
+
+        return False
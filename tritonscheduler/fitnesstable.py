@@ -0,0 +1,546 @@
+#!/usr/bin/env python
+
+from chromosome import meetingTypes
+from classtime import ClassTime
+
+# Restrictions on class times.
+TIME_EARLIEST = ClassTime.fromString("MTuWThFS 12:00a-8:00a")
+TIME_LATEST = ClassTime.fromString("MTuWThFS 4:30p-11:50p")
+TIME_LUNCH = ClassTime.fromString("MTuWThFS 12:00p-1:00p")
+
+# Maximum time (in minutes) between any two classes.
+MAX_GAP = 60 * 3
+
+# The most scores of genes remembered for a course, or of pairs of genes for
+# a pair of courses. When there are more, the remembered scores are cleared,
+# since they are cheap to add up again from the slot scores.
+MEMO_SIZE = 1 << 16
+
+def addSlot(slots, indices, time):
+    """
+    Returns the slot of a meeting time, adding it to the slots of a course
+    if no earlier meeting of the course has the same time.
+
+    :param slots: the ClassTime of each slot of the course
+    :param indices: the slot of each ClassTime of the course
+    :param time: the frozen ClassTime of the meeting
+    :returns: the index of the slot
+    """
+    slot = indices.setdefault(time, len(slots))
+
+    if slot == len(slots):
+        slots.append(time)
+
+    return slot
+
+class FitnessTable(object):
+    """
+    The FitnessTable class precomputes the fitness of meetings so that the
+    fitness of an individual is a sum of table lookups. The fitness of an
+    individual is split into a unary score for each course's gene and a
+    pairwise score for each pair of courses' genes.
+
+    Every distinct lecture or section time of a course (a slot) is scored
+    once. The pairs of slots of two courses are scored the first time a pair
+    of their genes is needed. The scores of genes and pairs of genes are added
+    up from the slot scores the first time they are needed and remembered, so
+    the cost does not depend on how many combinations of sections a course
+    has, or on courses that are never paired.
+
+    :ivar courses: the course codes in a fixed order
+    :ivar chromosomes: the Chromosome object for each course
+    :ivar slots: per course, the ClassTime of each slot
+    :ivar lectureSlots: per course and lecture, the slot of the lecture and the
+    slots of each section of each type
+    :ivar finals: per course and lecture, the final time or None
+    :ivar slotScores: per course, the fitness of each slot on its own
+    :ivar slotPairs: per pair of courses (i <= j), the fitness of each pair of
+    slots, which is empty until the pair is first needed
+    :ivar unary: per course, the remembered fitness of genes on their own,
+    up to MEMO_SIZE genes
+    :ivar pairwise: per pair of courses (i < j), the remembered fitness of
+    gene pairs, up to MEMO_SIZE pairs
+    :ivar comparisons: the number of ClassTime comparisons made by this
+    table, counted as they are made
+    """
+
+    def __init__(self, schedule, chromosomes):
+        """
+        Constructor for the FitnessTable class. The constructor scores every
+        slot.
+
+        :param self: the FitnessTable object
+        :param schedule: the schedule data that the genes refer to
+        :param chromosomes: the Chromosome object for each course
+        """
+        self.courses = []
+        self.chromosomes = []
+        self.slots = []
+        self.lectureSlots = []
+        self.finals = []
+        self.slotScores = []
+        self.slotPairs = []
+        self.unary = []
+        self.pairwise = []
+        self.comparisons = 0
+
+        self.addCourses(schedule, chromosomes)
+
+    def addCourses(self, schedule, chromosomes):
+        """
+        Adds courses after the courses of this table and scores every slot of
+        the new courses. The scores that were already found are kept, and
+        tables made by getSubTable before are not changed.
+
+        :param self: the FitnessTable object
+        :param schedule: the schedule data that the genes refer to
+        :param chromosomes: the Chromosome object for each new course, none of
+        which can already be in this table
+        """
+        start = len(self.courses)
+
+        # Find the distinct meeting times (slots) for each course.
+        slots = self.slots
+
+        for code, chromosome in chromosomes.items():
+            courseSlots = []
+            indices = {}
+            lectureSlots = []
+            finals = []
+
+            for index in range(len(schedule[code])):
+                lecture = schedule[code][index]
+                sections = []
+
+                for typeId in chromosome.sectionTypes[index]:
+                    meetingType = meetingTypes[typeId]
+                    sections.append([addSlot(courseSlots, indices,
+                                             section["time"])
+                                     for section in lecture[meetingType]])
+
+                lectureSlots.append((addSlot(courseSlots, indices,
+                                             lecture["LE"]["time"]),
+                                     sections))
+                finals.append(lecture["FI"]["time"] if "FI" in lecture
+                              else None)
+
+            self.courses.append(code)
+            self.chromosomes.append(chromosome)
+            slots.append(courseSlots)
+            self.lectureSlots.append(lectureSlots)
+            self.finals.append(finals)
+            self.slotScores.append([self.getSlotScore(time)
+                                    for time in courseSlots])
+            self.unary.append({})
+
+        count = len(self.courses)
+
+        # Pairs of slots, including slots of the same course, are filled in
+        # place when first needed so tables sharing them see the scores.
+        for i in range(start):
+            self.slotPairs[i].extend([] for j in range(start, count))
+            self.pairwise[i].extend({} for j in range(start, count))
+
+        for i in range(start, count):
+            self.slotPairs.append([None] * i +
+                                  [[] for j in range(i, count)])
+            self.pairwise.append([None] * (i + 1) +
+                                 [{} for j in range(i + 1, count)])
+
+    def getSubTable(self, courses):
+        """
+        Returns a fitness table for some of the courses of this table. The new
+        table shares the slot scores and the remembered gene scores with this
+        table, so scores found by either table are not calculated again.
+
+        :param self: the FitnessTable object
+        :param courses: the course codes to include, which must all be in this
+        table
+        :returns: the new FitnessTable object, with the courses in the same
+        relative order as in this table
+        """
+        # Keeping the relative order keeps every pair of courses stored under
+        # the lower index, so the pairwise tables can be shared as they are.
+        wanted = set(courses)
+        indices = [i for i in range(len(self.courses))
+                   if self.courses[i] in wanted]
+        table = FitnessTable.__new__(FitnessTable)
+
+        table.courses = [self.courses[i] for i in indices]
+        table.chromosomes = [self.chromosomes[i] for i in indices]
+        table.slots = [self.slots[i] for i in indices]
+        table.lectureSlots = [self.lectureSlots[i] for i in indices]
+        table.finals = [self.finals[i] for i in indices]
+        table.slotScores = [self.slotScores[i] for i in indices]
+        table.unary = [self.unary[i] for i in indices]
+        table.slotPairs = [[self.slotPairs[i][j] if j >= i else None
+                            for j in indices] for i in indices]
+        table.pairwise = [[self.pairwise[i][j] if j > i else None
+                           for j in indices] for i in indices]
+        table.comparisons = 0
+
+        return table
+
+    def getSlotPairs(self, course, course2):
+        """
+        Returns the fitness of every pair of slots of two courses, scoring
+        them the first time they are needed.
+
+        :param self: the FitnessTable object
+        :param course: the index of the first course
+        :param course2: the index of the second course, not before the first
+        :returns: a table of fitness values indexed by the slots of both
+        courses
+        """
+        pairScores = self.slotPairs[course][course2]
+
+        if not pairScores:
+            slots = self.slots[course]
+            slots2 = self.slots[course2]
+            pairScores.extend(self.getSlotPairScores(slots, slots2))
+
+        return pairScores
+
+    def getGeneSlots(self, course, gene):
+        """
+        Returns the slots used by a gene and the final time of its lecture.
+
+        :param self: the FitnessTable object
+        :param course: the index of the course
+        :param gene: the index of the gene
+        :returns: a tuple of the list of slots and the final time (or None)
+        """
+        gene = self.chromosomes[course][gene]
+        lecture, sections = self.lectureSlots[course][gene[0]]
+        used = [lecture]
+
+        for i in range(1, len(gene)):
+            used.append(sections[i - 1][gene[i]])
+
+        return used, self.finals[course][gene[0]]
+
+    def getUnary(self, course, gene):
+        """
+        Returns the fitness of a gene on its own, including the pairs of its
+        own meetings.
+
+        :param self: the FitnessTable object
+        :param course: the index of the course
+        :param gene: the index of the gene
+        :returns: the fitness of the gene
+        """
+        score = self.unary[course].get(gene)
+
+        if score is None:
+            used, final = self.getGeneSlots(course, gene)
+            slotScores = self.slotScores[course]
+            pairScores = self.getSlotPairs(course, course)
+            score = 0
+
+            for slot in used:
+                score += slotScores[slot]
+
+                for slot2 in used:
+                    score += pairScores[slot][slot2]
+
+            score += (self.getFinalPairScore(final, final)
+                      * len(used) * len(used))
+            score += self.getFinalScore(final)
+            scores = self.unary[course]
+
+            if len(scores) >= MEMO_SIZE:
+                scores.clear()
+
+            scores[gene] = score
+
+        return score
+
+    def getPair(self, course, course2, gene, gene2):
+        """
+        Returns the fitness of a pair of genes from two different courses.
+        Every score is symmetric, so the pair is counted for both orders at
+        once.
+
+        :param self: the FitnessTable object
+        :param course: the index of the first course
+        :param course2: the index of the second course, after the first
+        :param gene: the index of the gene of the first course
+        :param gene2: the index of the gene of the second course
+        :returns: the fitness of the pair of genes
+        """
+        scores = self.pairwise[course][course2]
+        key = gene * len(self.chromosomes[course2]) + gene2
+        score = scores.get(key)
+
+        if score is None:
+            used, final = self.getGeneSlots(course, gene)
+            used2, final2 = self.getGeneSlots(course2, gene2)
+            pairScores = self.getSlotPairs(course, course2)
+            score = (self.getFinalPairScore(final, final2)
+                     * len(used) * len(used2))
+
+            for slot in used:
+                for slot2 in used2:
+                    score += pairScores[slot][slot2]
+
+            score *= 2
+
+            if len(scores) >= MEMO_SIZE:
+                scores.clear()
+
+            scores[key] = score
+
+        return score
+
+    def hasConflict(self, course, gene, course2, gene2):
+        """
+        Returns whether or not any meeting of a gene overlaps with a meeting of
+        another gene. If both genes are the same, this checks whether the gene
+        overlaps with itself.
+
+        :param self: the FitnessTable object
+        :param course: the index of the first course
+        :param gene: the index of the gene of the first course
+        :param course2: the index of the second course
+        :param gene2: the index of the gene of the second course
+        :returns: True if there is a time conflict, False otherwise
+        """
+        used, final = self.getGeneSlots(course, gene)
+        used2, final2 = self.getGeneSlots(course2, gene2)
+        same = (course == course2 and gene == gene2)
+
+        # Meetings of a gene at the same time share a slot, so a meeting is
+        # only skipped by its position in the gene.
+        for position in range(len(used)):
+            time = self.slots[course][used[position]]
+
+            for position2 in range(len(used2)):
+                if same and position == position2:
+                    continue
+
+                self.comparisons += 1
+
+                if time.conflictsWith(self.slots[course2][used2[position2]]):
+                    return True
+
+        return False
+
+    def getUnaryScores(self, course):
+        """
+        Returns the fitness of every gene of a course on its own.
+
+        :param self: the FitnessTable object
+        :param course: the index of the course
+        :returns: a list of fitness values indexed by gene
+        """
+        return [self.getUnary(course, gene)
+                for gene in range(len(self.chromosomes[course]))]
+
+    def getPairScores(self, course, course2):
+        """
+        Returns the fitness of every pair of genes from two courses.
+
+        :param self: the FitnessTable object
+        :param course: the index of the first course
+        :param course2: the index of the second course, after the first
+        :returns: a table of fitness values indexed by the genes of both
+        courses
+        """
+        return [[self.getPair(course, course2, gene, gene2)
+                 for gene2 in range(len(self.chromosomes[course2]))]
+                for gene in range(len(self.chromosomes[course]))]
+
+    def getSlotScore(self, time):
+        """
+        Returns the fitness of a single meeting time, which rewards meetings
+        that are not too early, not too late, and leave time for lunch.
+
+        :param self: the FitnessTable object
+        :param time: the ClassTime of the meeting
+        :returns: the fitness of the meeting time
+        """
+        score = 0
+
+        # The time is always checked against all three restrictions.
+        self.comparisons += 3
+
+        # Check for too early class.
+        if time.isTimeAfter(TIME_EARLIEST):
+            score += 1
+
+        # Check for too late class.
+        if time.isTimeBefore(TIME_LATEST):
+            score += 1
+
+        # Check for lunch break.
+        if not time.conflictsWith(TIME_LUNCH):
+            score += 1
+
+        return score
+
+    def getSlotPairScores(self, slots, slots2):
+        """
+        Returns the fitness of every pair of meeting times between two lists
+        of meeting times.
+
+        :param self: the FitnessTable object
+        :param slots: the first list of ClassTimes
+        :param slots2: the second list of ClassTimes
+        :returns: a table of fitness values indexed by both lists
+        """
+        table = []
+
+        for time in slots:
+            scores = []
+
+            for time2 in slots2:
+                score = 0
+
+                # Check for no time conflicts.
+                if not time.conflictsWith(time2):
+                    score += 1
+
+                # Try to limit the number of classes per day.
+                if not time.isOnDay(time2.dayMask):
+                    score += 1
+
+                    # Check for large gaps throughout the day.
+                    if abs(time.startTime - time2.startTime) <= MAX_GAP:
+                        score += 1
+
+                scores.append(score)
+
+            table.append(scores)
+
+        # Each pair is checked for a conflict and for a shared day.
+        self.comparisons += 2 * len(slots) * len(slots2)
+
+        return table
+
+    def getFinalScore(self, final):
+        """
+        Returns the fitness of a final time, which rewards finals that are not
+        too early or too late.
+
+        :param self: the FitnessTable object
+        :param final: the ClassTime of the final, or None if there is none
+        :returns: the fitness of the final time
+        """
+        score = 0
+
+        if final is not None:
+            self.comparisons += 2
+
+            # Check for finals being too early.
+            if final.isTimeAfter(TIME_EARLIEST):
+                score += 1
+
+            # Check for finals being too late.
+            if final.isTimeBefore(TIME_LATEST):
+                score += 1
+
+        return score
+
+    def getFinalPairScore(self, final, final2):
+        """
+        Returns the fitness of a pair of final times, which rewards finals that
+        do not conflict and are not on the same day.
+
+        :param self: the FitnessTable object
+        :param final: the first final ClassTime, or None if there is none
+        :param final2: the second final ClassTime, or None if there is none
+        :returns: the fitness of the pair of final times
+        """
+        score = 0
+
+        if final is not None and final2 is not None:
+            self.comparisons += 1
+
+            # Check for no finals conflicts.
+            if not final.conflictsWith(final2):
+                score += 1
+                self.comparisons += 1
+
+                # Try to avoid multiple finals on one day.
+                if not final.isOnDay(final2.dayMask):
+                    score += 1
+
+        return score
+
+    def getContributions(self, genes):
+        """
+        Calculates the fitness contributed by each course's gene, which is its
+        unary score plus its pairwise scores with every other course's gene.
+
+        :param self: the FitnessTable object
+        :param genes: the index of the gene used for each course
+        :returns: a list of fitness contributions in the order of the courses
+        """
+        contributions = [self.getUnary(i, genes[i])
+                         for i in range(len(genes))]
+
+        for i in range(len(genes)):
+            for j in range(i + 1, len(genes)):
+                score = self.getPair(i, j, genes[i], genes[j])
+                contributions[i] += score
+                contributions[j] += score
+
+        return contributions
+
+    def changeGene(self, genes, contributions, course, gene):
+        """
+        Changes the gene used for a course and updates the fitness
+        contributions, only looking at the scores that involve the course.
+
+        :param self: the FitnessTable object
+        :param genes: the index of the gene used for each course, which is
+        changed in place
+        :param contributions: the fitness contributed by each course's gene,
+        which is changed in place
+        :param course: the index of the course to change
+        :param gene: the index of the new gene for the course
+        :returns: the change in the total fitness
+        """
+        old = genes[course]
+        delta = self.getUnary(course, gene) - self.getUnary(course, old)
+        contributions[course] += delta
+
+        for j in range(len(genes)):
+            if j == course:
+                continue
+
+            # Pairwise scores are only stored for the lower course index.
+            if course < j:
+                change = (self.getPair(course, j, gene, genes[j])
+                          - self.getPair(course, j, old, genes[j]))
+            else:
+                change = (self.getPair(j, course, genes[j], gene)
+                          - self.getPair(j, course, genes[j], old))
+
+            contributions[course] += change
+            contributions[j] += change
+            delta += change
+
+        genes[course] = gene
+
+        return delta
+
+    def getFitness(self, genes):
+        """
+        Calculates the fitness of a list of gene indices by adding up the
+        unary and pairwise scores.
+
+        :param self: the FitnessTable object
+        :param genes: the index of the gene used for each course
+        :returns: the fitness value of the genes
+        """
+        fitness = 0
+
+        for i in range(len(genes)):
+            gene = genes[i]
+            fitness += self.getUnary(i, gene)
+
+            for j in range(i + 1, len(genes)):
+                fitness += self.getPair(i, j, gene, genes[j])
+
+        return fitness
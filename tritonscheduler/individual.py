@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+from array import array
+
+# The array type codes used for gene indices and fitness contributions.
+TYPE_GENES = "H"
+TYPE_CONTRIBUTIONS = "i"
+
+# The array type codes that gene indices can be stored with, from smallest to
+# largest.
+TYPES_GENES = ("H", "I", "L", "Q")
+
+def getGeneType(count):
+    """
+    Returns the smallest array type code that can hold every gene index of a
+    course with the given number of genes.
+
+    :param count: the largest number of genes of any course
+    :raises: ValueError
+    :returns: the array type code
+    """
+    for typecode in TYPES_GENES:
+        if count <= 1 << (8 * array(typecode).itemsize):
+            return typecode
+
+    raise ValueError("a course has too many genes: " + str(count))
+
+class Individual(array):
+    """
+    The Individual class is a compact array holding the index of the gene
+    used for each course, in the order of the courses of the fitness table.
+    It also remembers its fitness so that, when one of its genes changes, the
+    fitness is updated from the change instead of being calculated again from
+    scratch.
+
+    :ivar fitness: the fitness value of the individual
+    :ivar contributions: the fitness contributed by each course's gene
+    """
+    __slots__ = ("fitness", "contributions")
+
+    def __new__(cls, genes, fitness=0, contributions=(), typecode=TYPE_GENES):
+        """
+        Creates an Individual object from gene indices and fitness information.
+
+        :param cls: the Individual class
+        :param genes: the index of the gene used for each course
+        :param fitness: the fitness value of the individual
+        :param contributions: the fitness contributed by each course's gene
+        :param typecode: the array type code of the gene indices, which must
+        hold the largest gene index (see getGeneType)
+        :returns: the new Individual object
+        """
+        individual = array.__new__(cls, typecode, genes)
+        individual.fitness = fitness
+        individual.contributions = array(TYPE_CONTRIBUTIONS, contributions)
+
+        return individual
+
+    def copy(self):
+        """
+        Returns a copy of the individual, including its fitness information.
+
+        :param self: the Individual object
+        :returns: the new Individual object
+        """
+        return Individual(self, self.fitness, self.contributions,
+                          self.typecode)
+
+    def __reduce_ex__(self, protocol):
+        # Arrays do not pickle the slots of subclasses, so pickle the genes
+        # and the fitness information explicitly.
+        return (Individual, (self.tolist(), self.fitness,
+                             self.contributions.tolist(), self.typecode))
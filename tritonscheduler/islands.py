@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+import os
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from algorithm import Algorithm
+from algorithm import SELECTION_ROULETTE
+from ranking import Ranking
+from runstats import COUNTER_EVALUATIONS
+from runstats import COUNTER_GENERATIONS
+
+# The default number of generations between migrations.
+MIGRATION_INTERVAL = 16
+
+# The default number of individuals that migrate from each island.
+MIGRANTS = 2
+
+# The Algorithm used by the current worker process.
+workerAlgorithm = None
+
+def initWorker(schedule):
+    """
+    Sets up a worker process by creating the Algorithm that it will use for
+    every island it evolves, so the chromosomes and fitness tables are only
+    built once per process.
+
+    :param schedule: the schedule data used as genetic information
+    """
+    global workerAlgorithm
+
+    workerAlgorithm = Algorithm(schedule)
+
+def evolveIsland(island, generations, immigrants):
+    """
+    Evolves a single island for a number of generations inside a worker
+    process. The island's population and random state are passed in and out
+    so any worker can continue any island.
+
+    :param island: the state of the island
+    :param generations: the number of generations to evolve
+    :param immigrants: individuals from another island that replace the least
+    fit individuals of this island
+    :returns: the new state of the island
+    """
+    algorithm = workerAlgorithm
+    random.setstate(island["random"])
+
+    if island["population"] is None:
+        algorithm.initiate(island["capacity"], island["crossoverRate"],
+                           island["mutateRate"], island["elitism"],
+                           island["selection"])
+        evaluations = 0
+    else:
+        algorithm.capacity = island["capacity"]
+        algorithm.crossoverRate = island["crossoverRate"]
+        algorithm.mutateRate = island["mutateRate"]
+        algorithm.elitism = island["elitism"]
+        algorithm.selection = island["selection"]
+        algorithm.population = island["population"]
+        evaluations = algorithm.evaluations
+        algorithm.immigrate(immigrants)
+
+    for i in range(generations):
+        algorithm.evolve()
+
+    population = len(algorithm.population)
+    island = dict(island)
+    island["population"] = algorithm.population
+    island["random"] = random.getstate()
+    island["fitness"] = algorithm.getHighestFitness()
+    island["mean"] = (algorithm.getTotalFitness() / population if population
+                      else 0.0)
+    island["evaluations"] += algorithm.evaluations - evaluations
+
+    return island
+
+class IslandModel(object):
+    """
+    The IslandModel class runs several independent populations (islands) of
+    the genetic algorithm in parallel processes. Every few generations, the
+    fittest individuals of each island migrate to the next island.
+
+    :ivar schedule: the schedule data used as genetic information
+    :ivar islands: the number of islands
+    :ivar interval: the number of generations between migrations
+    :ivar migrants: the number of individuals that migrate from each island
+    :ivar seed: the seed for the random number generator of the first island
+    :ivar stats: the RunStats object that records each migration, or None
+    :ivar ranking: the Ranking of the fittest distinct individuals found on
+    any island
+    :ivar fittest: the most fit individual found so far
+    :ivar fitness: the fitness value of the most fit individual
+    """
+
+    def __init__(self, schedule, islands=None, interval=MIGRATION_INTERVAL,
+                 migrants=MIGRANTS, seed=None, stats=None, results=1):
+        """
+        Constructor for the IslandModel class.
+
+        :param self: the IslandModel object
+        :param schedule: the schedule data used as genetic information
+        :param islands: the number of islands, defaults to the CPU count
+        :param interval: the number of generations between migrations
+        :param migrants: the number of individuals that migrate from each island
+        :param seed: the seed for the random number generator of the first
+        island, each other island uses the following seeds
+        :param stats: a RunStats object that records the fitness after each
+        migration and the counters of the islands, or None
+        :param results: the number of the fittest distinct individuals that
+        are kept
+        """
+        self.schedule = schedule
+        self.islands = islands or os.cpu_count() or 1
+        self.interval = interval
+        self.migrants = migrants
+        self.seed = seed
+        self.stats = stats
+        self.ranking = Ranking(max(results, 1))
+        self.fittest = None
+        self.fitness = 0
+
+    def run(self, generations, size, crossoverRate, mutateRate, elitism,
+            progress=None, selection=SELECTION_ROULETTE):
+        """
+        Evolves every island for the given number of generations, migrating
+        individuals between the islands every interval.
+
+        :param self: the IslandModel object
+        :param generations: the number of generations to evolve each island
+        :param size: the population size of each island
+        :param crossoverRate: the probability of crossover occuring
+        :param mutateRate: the probability of an mutation occuring
+        :param elitism: what percent of the fittest individuals is carried over
+        :param progress: called with the number of finished generations
+        :param selection: the strategy for selecting parents
+        :returns: the most fit individual found on any island
+        """
+        islands = []
+
+        for i in range(self.islands):
+            seed = None if self.seed is None else self.seed + i
+            islands.append({
+                "population": None,
+                "random": random.Random(seed).getstate(),
+                "capacity": size,
+                "crossoverRate": crossoverRate,
+                "mutateRate": mutateRate,
+                "elitism": elitism,
+                "selection": selection,
+                "fitness": 0,
+                "mean": 0.0,
+                "evaluations": 0
+            })
+
+        with ProcessPoolExecutor(self.islands, initializer=initWorker,
+                                 initargs=(self.schedule,)) as pool:
+            finished = 0
+
+            while finished < generations:
+                count = min(self.interval, generations - finished)
+
+                # Each island receives the fittest individuals of the island
+                # before it, forming a ring.
+                immigrants = [self.getMigrants(islands[i - 1])
+                              for i in range(len(islands))]
+                futures = [pool.submit(evolveIsland, islands[i], count,
+                                       immigrants[i])
+                           for i in range(len(islands))]
+                islands = [future.result() for future in futures]
+                finished += count
+
+                for island in islands:
+                    if (self.fittest is None or
+                        island["fitness"] > self.fitness):
+                        self.fittest = island["population"][-1]
+                        self.fitness = island["fitness"]
+
+                    self.addRanked(island)
+
+                if self.stats is not None:
+                    self.recordStats(islands, finished)
+
+                if progress is not None:
+                    progress(finished)
+
+        return self.fittest
+
+    def addRanked(self, island):
+        """
+        Adds the fittest individuals of an island to the ranking.
+
+        :param self: the IslandModel object
+        :param island: the state of the island
+        """
+        # The population is sorted from least to most fit.
+        for individual in reversed(island["population"]):
+            if not self.ranking.accepts(individual.fitness):
+                break
+
+            self.ranking.add(tuple(individual), individual.fitness,
+                             individual)
+
+    def getTopIndividuals(self):
+        """
+        Returns the fittest distinct individuals found on any island.
+
+        :param self: the IslandModel object
+        :returns: a list of (individual, fitness) tuples from most to least
+        fit
+        """
+        return self.ranking.getRanked()
+
+    def recordStats(self, islands, finished):
+        """
+        Records the fitness of every island after a migration interval in
+        the stats object, along with the counters of all of the islands.
+
+        :param self: the IslandModel object
+        :param islands: the state of each island
+        :param finished: the number of generations evolved so far
+        """
+        stats = self.stats
+        mean = sum(island["mean"] for island in islands) / len(islands)
+
+        stats.record(finished, self.fitness, mean)
+        stats.setCounter(COUNTER_EVALUATIONS,
+                         sum(island["evaluations"] for island in islands))
+        stats.setCounter(COUNTER_GENERATIONS, finished)
+
+    def getMigrants(self, island):
+        """
+        Returns the fittest individuals of an island that will migrate.
+
+        :param self: the IslandModel object
+        :param island: the state of the island
+        :returns: a list of individuals, empty if the island has no population
+        """
+        if island["population"] is None or self.migrants <= 0:
+            return []
+
+        return island["population"][-self.migrants:]
@@ -2,7 +2,16 @@
 
 from schedule import Schedule
 from classparser import ClassParserError
-from algorithm import Algorithm
+from algorithm import SELECTION_ROULETTE
+from vectoralgorithm import VectorAlgorithm
+from islands import IslandModel
+from batch import createSolver
+from runstats import COUNTER_NODES
+from runstats import PHASE_SEARCH
+from runstats import RunStats
+from coursecache import CourseCache
+from catalog import Catalog
+from time import perf_counter
 from time import sleep
 
 import pprint
@@ -16,6 +25,33 @@ CROSSOVER = 0.02
 MUTATE = 0.01
 ELITISM = 0.1
 GENERATIONS = 256
+SELECTION = SELECTION_ROULETTE
+
+# When to stop the genetic algorithm early (None to disable): after this many
+# generations without improvement, or after this many seconds.
+PLATEAU = 64
+TIME_BUDGET = None
+
+# Whether or not loaded courses are cached on disk for the next runs.
+COURSE_CACHE = True
+
+# The path of a catalog made with catalog.py that courses are read from
+# instead of the Schedule of Classes (None to use the Schedule of Classes).
+CATALOG_PATH = None
+
+# The number of the fittest distinct schedules that are printed.
+RESULTS = 3
+
+# Whether or not the NumPy version of the genetic algorithm will be used.
+VECTORIZED = False
+
+# The number of populations evolved in parallel (1 to use a single one).
+ISLANDS = 1
+
+# Where to save instrumentation of the genetic algorithm as JSON (None to
+# disable), and whether or not to print a profile of the run.
+STATS_PATH = None
+PROFILE = False
 
 def handleInput(info):
     """
@@ -73,6 +109,37 @@ def handleInput(info):
 
     return False
 
+def printRanked(algorithm, ranked):
+    """
+    Prints the fittest schedules, so a disliked schedule does not need a
+    rerun.
+
+    :param algorithm: the Algorithm used to print the schedules
+    :param ranked: a list of (individual, fitness) tuples from most to least
+    fit
+    """
+    for i in range(len(ranked)):
+        individual, fitness = ranked[i]
+
+        print("Schedule #" + str(i + 1) + " (fitness " + str(fitness) + "):")
+
+        algorithm.printFittest(individual)
+
+def saveStats(stats):
+    """
+    Saves and prints the instrumentation of a run, if it was recorded.
+
+    :param stats: the RunStats object, or None if nothing was recorded
+    """
+    if stats is None:
+        return
+
+    if STATS_PATH is not None:
+        stats.dump(STATS_PATH)
+
+    if PROFILE:
+        print(stats.getProfile())
+
 def main():
     """
     The main function of the program that turns user input into a schedule and
@@ -91,7 +158,8 @@ def main():
     print("Finding schedule data...")
 
     # Get the schedule data for the given courses and term.
-    schedule = Schedule()
+    schedule = Schedule(cache=CourseCache() if COURSE_CACHE else None,
+                        catalog=Catalog(CATALOG_PATH) if CATALOG_PATH else None)
     schedule.term = info["term"]
     schedule.courses = info["courses"]
 
@@ -110,25 +178,77 @@ def main():
 
             return
 
-    # Initiate the population.
-    algorithm = Algorithm(scheduleData)
-    algorithm.initiate(CAPACITY, CROSSOVER, MUTATE, ELITISM)
+    def printProgress(generation):
+        print("Generating... "
+              + str(int((generation / GENERATIONS) * 100)) + "%", end="\r")
+
+    # Only record instrumentation if it is wanted.
+    stats = None
 
-    # Run the algorithm through the desired number of generations.
-    generation = 0
-    highest = 0
+    if STATS_PATH is not None or PROFILE:
+        stats = RunStats(PROFILE)
 
+    algorithm, solver = createSolver(scheduleData, RESULTS, stats=stats)
 
-    while generation < GENERATIONS:
-        algorithm.evolve()
-        generation += 1
+    if solver is not None:
+        print("Searching...")
 
-        print("Generating... "
-              + str(int((generation / GENERATIONS) * 100)) + "%", end="\r")
+        if stats is not None:
+            stats.start()
+            clock = perf_counter()
+
+        solver.solve()
+
+        if stats is not None:
+            stats.stop()
+            stats.addTime(PHASE_SEARCH, perf_counter() - clock)
+            stats.setCounter(COUNTER_NODES, solver.nodes)
+            algorithm.updateCounters()
+
+        print("Done!")
+
+        printRanked(algorithm, [(algorithm.createIndividual(genes), fitness)
+                                for genes, fitness in solver.getRanked()])
+        saveStats(stats)
+
+        return
+
+    # Evolve several populations in parallel if desired.
+    if ISLANDS > 1:
+        model = IslandModel(scheduleData, ISLANDS, stats=stats,
+                            results=RESULTS)
+
+        if stats is not None:
+            stats.start()
+
+        model.run(GENERATIONS, CAPACITY, CROSSOVER, MUTATE, ELITISM,
+                  printProgress, SELECTION)
+
+        if stats is not None:
+            stats.stop()
+
+        print("\nDone!")
+
+        printRanked(algorithm, model.getTopIndividuals())
+        saveStats(stats)
+
+        return
+
+    # Initiate the population, reusing the fitness table that was built.
+    if VECTORIZED:
+        algorithm = VectorAlgorithm(scheduleData, stats=stats,
+                                    table=algorithm.table)
+
+    algorithm.initiate(CAPACITY, CROSSOVER, MUTATE, ELITISM, SELECTION)
+
+    # Run the algorithm until it stops improving or runs out of generations.
+    algorithm.run(GENERATIONS, PLATEAU, timeBudget=TIME_BUDGET,
+                  progress=printProgress, top=RESULTS)
 
     print("\nDone!")
 
-    algorithm.printFittest()
+    printRanked(algorithm, algorithm.getTopIndividuals())
+    saveStats(stats)
 
 if __name__ == "__main__":
     main()
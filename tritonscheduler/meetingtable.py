@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+import numpy
+
+from chromosome import getMeetingTypeId
+
+# The section index of a lecture meeting, which is not part of a list.
+SECTION_LECTURE = -1
+
+class MeetingTable(object):
+    """
+    The MeetingTable class holds every lecture and section meeting of some
+    schedule data as parallel NumPy arrays with one row per meeting, so
+    questions about time conflicts are answered for all meetings at once
+    instead of by calling ClassTime.conflictsWith in a loop. Meetings
+    without a time and finals are not included.
+
+    :ivar courses: the course names, indexed by course id
+    :ivar meetings: the meeting dictionary of each row
+    :ivar dayMask: the day mask of each row
+    :ivar startTime: the start time in minutes of each row
+    :ivar finishTime: the finish time in minutes of each row
+    :ivar course: the course id of each row
+    :ivar meetingType: the meeting type id (from getMeetingTypeId) of each row
+    :ivar lecture: the index of the lecture within its course of each row
+    :ivar section: the index of the section within its type of each row, or
+    SECTION_LECTURE for lecture meetings
+    """
+
+    def __init__(self, schedule):
+        """
+        Constructor for the MeetingTable class.
+
+        :param self: the MeetingTable object
+        :param schedule: a dictionary with the course name as the key and list
+        of lectures as the value, as returned by ClassParser.parse
+        """
+        self.courses = list(schedule)
+        self.meetings = []
+        columns = []
+
+        for courseId, code in enumerate(self.courses):
+            for lectureIndex, lecture in enumerate(schedule[code]):
+                for meetingType, value in lecture.items():
+                    if meetingType == "FI":
+                        continue
+
+                    typeId = getMeetingTypeId(meetingType)
+
+                    if meetingType == "LE":
+                        sections = [(SECTION_LECTURE, value)]
+                    else:
+                        sections = enumerate(value)
+
+                    for sectionIndex, meeting in sections:
+                        time = meeting["time"]
+
+                        if time is None:
+                            continue
+
+                        self.meetings.append(meeting)
+                        columns.append((time.dayMask, time.startTime,
+                                        time.finishTime, courseId, typeId,
+                                        lectureIndex, sectionIndex))
+
+        values = numpy.array(columns, dtype=numpy.int32).reshape(-1, 7)
+
+        self.dayMask = values[:, 0].astype(numpy.uint8)
+        self.startTime = values[:, 1].astype(numpy.int16)
+        self.finishTime = values[:, 2].astype(numpy.int16)
+        self.course = values[:, 3].copy()
+        self.meetingType = values[:, 4].astype(numpy.int16)
+        self.lecture = values[:, 5].copy()
+        self.section = values[:, 6].copy()
+
+    def __len__(self):
+        return len(self.meetings)
+
+    def getRows(self, course=None, meetingType=None, lecture=None):
+        """
+        Returns the rows of the meetings that match every given condition.
+
+        :param self: the MeetingTable object
+        :param course: the course name
+        :param meetingType: the meeting type, such as LE or DI
+        :param lecture: the index of the lecture within its course
+        :returns: an array of row numbers
+        """
+        selected = numpy.ones(len(self), dtype=bool)
+
+        if course is not None:
+            selected &= self.course == self.courses.index(course)
+
+        if meetingType is not None:
+            selected &= self.meetingType == getMeetingTypeId(meetingType)
+
+        if lecture is not None:
+            selected &= self.lecture == lecture
+
+        return numpy.flatnonzero(selected)
+
+    def getConflicts(self, time):
+        """
+        Finds every meeting that overlaps with a time, the same way as
+        ClassTime.conflictsWith.
+
+        :param self: the MeetingTable object
+        :param time: the ClassTime to compare with
+        :returns: an array of booleans with one value per row
+        """
+        return (((self.dayMask & time.dayMask) != 0) &
+                (self.startTime <= time.finishTime) &
+                (self.finishTime >= time.startTime))
+
+    def getRowConflicts(self, row):
+        """
+        Finds every meeting that overlaps with the meeting of a row.
+
+        :param self: the MeetingTable object
+        :param row: the row number
+        :returns: an array of booleans with one value per row
+        """
+        return (((self.dayMask & self.dayMask[row]) != 0) &
+                (self.startTime <= self.finishTime[row]) &
+                (self.finishTime >= self.startTime[row]))
+
+    def getConflictMatrix(self, rows=None, rows2=None):
+        """
+        Finds which meetings overlap between two sets of rows.
+
+        :param self: the MeetingTable object
+        :param rows: the row numbers of the first set, or None for all rows
+        :param rows2: the row numbers of the second set, or None for the first
+        set
+        :returns: a two-dimensional array of booleans indexed by both sets
+        """
+        if rows is None:
+            rows = slice(None)
+
+        if rows2 is None:
+            rows2 = rows
+
+        dayMask = self.dayMask[rows][:, numpy.newaxis]
+        startTime = self.startTime[rows][:, numpy.newaxis]
+        finishTime = self.finishTime[rows][:, numpy.newaxis]
+
+        return (((dayMask & self.dayMask[rows2]) != 0) &
+                (startTime <= self.finishTime[rows2]) &
+                (finishTime >= self.startTime[rows2]))
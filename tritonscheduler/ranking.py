@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+from heapq import heappush
+from heapq import heapreplace
+
+class Ranking(object):
+    """
+    The Ranking class remembers the fittest distinct individuals seen so far,
+    up to a fixed number of them. Individuals are told apart by their keys, so
+    an individual that is seen again in a later generation is only kept once.
+    The least fit individual is kept at the top of a min-heap so that it can
+    be replaced quickly.
+
+    :ivar capacity: the maximum number of individuals to remember
+    :ivar heap: a min-heap of (fitness, order, key, individual) tuples
+    :ivar keys: the keys of the remembered individuals
+    :ivar order: the number of individuals added, which breaks ties so the
+    earliest individual with a fitness value ranks first
+    """
+
+    def __init__(self, capacity):
+        """
+        Constructor for the Ranking class.
+
+        :param self: the Ranking object
+        :param capacity: the maximum number of individuals to remember
+        """
+        self.capacity = capacity
+        self.heap = []
+        self.keys = set()
+        self.order = 0
+
+    def accepts(self, fitness):
+        """
+        Returns whether or not an individual with the given fitness would be
+        remembered if it is not remembered already.
+
+        :param self: the Ranking object
+        :param fitness: the fitness value of the individual
+        :returns: True if the individual would be remembered, False otherwise
+        """
+        if len(self.heap) < self.capacity:
+            return self.capacity > 0
+
+        return fitness > self.heap[0][0]
+
+    def add(self, key, fitness, individual):
+        """
+        Remembers an individual, replacing the least fit individual if the
+        ranking is full. The individual should not be changed afterwards.
+
+        :param self: the Ranking object
+        :param key: the hashable key of the individual
+        :param fitness: the fitness value of the individual
+        :param individual: the individual to remember
+        :returns: True if the individual was remembered, False otherwise
+        """
+        if key in self.keys or not self.accepts(fitness):
+            return False
+
+        # Negate the order so that earlier individuals win ties.
+        entry = (fitness, -self.order, key, individual)
+        self.order += 1
+        self.keys.add(key)
+
+        if len(self.heap) < self.capacity:
+            heappush(self.heap, entry)
+        else:
+            self.keys.discard(heapreplace(self.heap, entry)[2])
+
+        return True
+
+    def getRanked(self):
+        """
+        Returns the remembered individuals from most to least fit.
+
+        :param self: the Ranking object
+        :returns: a list of (individual, fitness) tuples
+        """
+        return [(individual, fitness) for fitness, _, _, individual
+                in sorted(self.heap, reverse=True)]
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+import cProfile
+import io
+import json
+import pstats
+
+# The phases of a generation that are timed.
+PHASE_TABLE = "table"
+PHASE_SELECTION = "selection"
+PHASE_CROSSOVER = "crossover"
+PHASE_MUTATION = "mutation"
+PHASE_FITNESS = "fitness"
+
+# The phase of an exact search, which is timed as a whole.
+PHASE_SEARCH = "search"
+
+# The names of the counters that are recorded.
+COUNTER_EVALUATIONS = "evaluations"
+COUNTER_COMPARISONS = "comparisons"
+COUNTER_GENERATIONS = "generations"
+COUNTER_NODES = "nodes"
+
+class RunStats(object):
+    """
+    The RunStats class collects instrumentation for runs of the genetic
+    algorithm: how long each phase of a generation takes, counters such as
+    the number of fitness evaluations, and the best and mean fitness of every
+    generation. An algorithm only records anything if it is given a RunStats
+    object, so there is no cost when instrumentation is not wanted.
+
+    :ivar timings: the total number of seconds spent in each phase
+    :ivar calls: the number of times each phase was timed
+    :ivar counters: the value of each counter
+    :ivar trace: a (generation, best, mean) tuple for every generation
+    :ivar profiler: the cProfile.Profile object, or None if not profiling
+    """
+
+    def __init__(self, profile=False):
+        """
+        Constructor for the RunStats class.
+
+        :param self: the RunStats object
+        :param profile: whether or not runs are profiled with cProfile
+        """
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+        self.trace = []
+        self.profiler = cProfile.Profile() if profile else None
+
+    def addTime(self, phase, seconds):
+        """
+        Adds time spent in a phase.
+
+        :param self: the RunStats object
+        :param phase: the name of the phase
+        :param seconds: the number of seconds spent in the phase
+        """
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+    def setCounter(self, name, value):
+        """
+        Sets the value of a counter.
+
+        :param self: the RunStats object
+        :param name: the name of the counter
+        :param value: the new value of the counter
+        """
+        self.counters[name] = value
+
+    def addCounter(self, name, amount=1):
+        """
+        Adds to the value of a counter.
+
+        :param self: the RunStats object
+        :param name: the name of the counter
+        :param amount: how much to add to the counter
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, generation, best, mean):
+        """
+        Records the fitness of a generation.
+
+        :param self: the RunStats object
+        :param generation: the number of the generation
+        :param best: the highest fitness value of the generation
+        :param mean: the mean fitness value of the generation
+        """
+        self.trace.append((generation, best, mean))
+
+    def start(self):
+        """
+        Starts profiling a run if profiling is enabled.
+
+        :param self: the RunStats object
+        """
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        """
+        Stops profiling a run if profiling is enabled.
+
+        :param self: the RunStats object
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def getProfile(self, sort="cumulative", limit=20):
+        """
+        Returns the profile of the profiled runs as text.
+
+        :param self: the RunStats object
+        :param sort: the pstats key to sort the functions by
+        :param limit: the number of functions to include
+        :returns: the profile as text, or None if not profiling
+        """
+        if self.profiler is None:
+            return None
+
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort) \
+                                                  .print_stats(limit)
+
+        return output.getvalue()
+
+    def getMeanTime(self, phase):
+        """
+        Returns the mean number of seconds spent in a phase each time it was
+        timed.
+
+        :param self: the RunStats object
+        :param phase: the name of the phase
+        :returns: the mean number of seconds, or 0 if it was never timed
+        """
+        calls = self.calls.get(phase, 0)
+
+        if calls == 0:
+            return 0.0
+
+        return self.timings[phase] / calls
+
+    def toDict(self):
+        """
+        Returns the statistics as a dictionary that can be stored as JSON.
+
+        :param self: the RunStats object
+        :returns: the statistics as a dictionary
+        """
+        return {
+            "timings": dict(self.timings),
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+            "trace": [list(entry) for entry in self.trace]
+        }
+
+    def dump(self, path):
+        """
+        Saves the statistics to a JSON file.
+
+        :param self: the RunStats object
+        :param path: the path of the file
+        """
+        with open(path, "w") as output:
+            json.dump(self.toDict(), output, indent=2, sort_keys=True)
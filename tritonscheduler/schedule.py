@@ -1,6 +1,10 @@
 #!/usr/bin/env python
 
 from classparser import ClassParser
+from classparser import ClassParserError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from connection import getConnection
 
 import re
 import requests
@@ -17,12 +21,28 @@ BASE_URL_PRINT = "https://act.ucsd.edu/scheduleOfClasses/scheduleOfClasses" \
 REGEX_TERM = "([A-Z][0-9A-Z])(\d\d)"
 REGEX_COURSE = "([A-Z][A-Z][A-Z]*[A-Z]*\s\w+)"
 
+# The tabs of the Schedule of Classes for searching by course and by subject.
+TAB_COURSES = "tabs-crs"
+TAB_SUBJECTS = "tabs-sub"
+
 # The URL encoded new line.
 NEW_LINE = "%0D%0A"
 
 # Two letter term codes used by the Schedule of Classes.
 VALID_TERMS = set(["FA", "WI", "SU", "SP", "SA", "S3", "S2", "S1"])
 
+# The default maximum number of courses requested by a single URL.
+SHARD_SIZE = 8
+
+# The default maximum number of shards that are fetched at once.
+MAX_WORKERS = 4
+
+# The number of bytes of a response that are parsed at a time.
+CHUNK_SIZE = 65536
+
+# The number of times a page is requested, priming again before each retry.
+FETCH_ATTEMPTS = 2
+
 class ScheduleError(Exception):
     """
     A type of exception that is raised by the Schedule class.
@@ -37,8 +57,45 @@ class Schedule(object):
 
     :ivar courses: a list of course codes for desired courses
     :ivar term: which term to search in (two uppercase letters and 2 digit year)
+    :ivar baseURL: the URL for loading the normal Schedule of Classes
+    :ivar baseURLPrint: the URL for the printable Schedule of Classes
+    :ivar shardSize: the maximum number of courses requested by a single URL
+    :ivar workers: the maximum number of shards that are fetched at once
+    :ivar connection: the Connection used to load the Schedule of Classes
+    :ivar cache: the CourseCache of previously loaded courses, or None
+    :ivar catalog: the Catalog that courses are read from instead of the
+    Schedule of Classes, or None
     """
 
+    def __init__(self, baseURL=BASE_URL, baseURLPrint=BASE_URL_PRINT,
+                 shardSize=SHARD_SIZE, workers=MAX_WORKERS, connection=None,
+                 cache=None, catalog=None):
+        """
+        Constructor for the Schedule class.
+
+        :param self: the schedule object
+        :param baseURL: the URL for loading the normal Schedule of Classes
+        :param baseURLPrint: the URL for the printable Schedule of Classes
+        :param shardSize: the maximum number of courses requested by a single
+        URL
+        :param workers: the maximum number of shards that are fetched at once
+        :param connection: the Connection used to load the Schedule of
+        Classes, defaults to the one shared by the whole process
+        :param cache: the CourseCache of previously loaded courses, or None to
+        always load every course
+        :param catalog: the Catalog that courses are read from instead of the
+        Schedule of Classes, or None
+        """
+        self.courses = None
+        self.term = None
+        self.baseURL = baseURL
+        self.baseURLPrint = baseURLPrint
+        self.shardSize = shardSize
+        self.workers = workers
+        self.connection = connection or getConnection()
+        self.cache = cache
+        self.catalog = catalog
+
     @staticmethod
     def validateTerm(newTerm):
         """
@@ -70,7 +127,8 @@ class Schedule(object):
 
         return match is not None
 
-    def getScheduleURL(self, forPrinting = False):
+    def getScheduleURL(self, forPrinting = False, courses = None,
+                       bySubject = False):
         """
         Creates a URL that searches for the specified courses at the given term
         using the UCSD Schedule of Classes. This will return an empty string if
@@ -78,26 +136,295 @@ class Schedule(object):
 
         :param self: the schedule object
         :param forPrinting: whether or not the print URL is needed
+        :param courses: the courses to search for instead of all of the
+        desired courses
+        :param bySubject: whether or not the courses are subject codes, such
+        as CSE, to search for every course of
         :raises: ScheduleError
         :returns: the URL as a string if successful, empty string otherwise
         """
-        if not self.courses:
+        if courses is None:
+            courses = self.courses
+
+        if not courses:
             raise ScheduleError("no course list provided")
 
         if not self.term:
             raise ScheduleError("no term provided")
 
-        return ((BASE_URL_PRINT if forPrinting else BASE_URL)
-                + "&selectedTerm=" + self.term
-                + "&courses=" + NEW_LINE.join(self.courses).replace(" ", "+"))
+        url = self.baseURLPrint if forPrinting else self.baseURL
+
+        if bySubject:
+            return (url.replace(TAB_COURSES, TAB_SUBJECTS)
+                    + "&selectedTerm=" + self.term
+                    + "".join("&selectedSubjects=" + subject
+                              for subject in courses))
+
+        return (url + "&selectedTerm=" + self.term
+                + "&courses=" + NEW_LINE.join(courses).replace(" ", "+"))
+
+    def getShards(self, courses = None):
+        """
+        Splits the desired courses into lists of at most shardSize courses,
+        without repeating any course.
+
+        :param self: the schedule object
+        :param courses: the courses to split instead of all of the desired
+        courses
+        :returns: a list of lists of course codes
+        """
+        if courses is None:
+            courses = self.courses
+
+        courses = list(dict.fromkeys(courses))
+        size = max(self.shardSize, 1)
+
+        return [courses[i:i + size] for i in range(0, len(courses), size)]
+
+    def fetch(self, courses, headers = None, stream = False,
+              bySubject = False):
+        """
+        Loads the printable Schedule of Classes result for some of the desired
+        courses.
+
+        :param self: the schedule object
+        :param courses: the course codes to load
+        :param headers: extra HTTP headers for the request
+        :param stream: whether or not the body is left to be read in chunks
+        :param bySubject: whether or not the courses are subject codes
+        :raises: requests.RequestException
+        :returns: the requests.Response object
+        """
+        primeURL = self.getScheduleURL(False, courses, bySubject)
+        printURL = self.getScheduleURL(True, courses, bySubject)
+
+        for attempt in range(FETCH_ATTEMPTS):
+            # Set the session cookies if they are not set already, then get
+            # the Schedule of Classes result.
+            self.connection.prime(primeURL, self.baseURL)
+            result = None
+
+            # Raise an exception if the request failed.
+            try:
+                result = self.connection.get(printURL, headers=headers,
+                                             stream=stream)
+                result.raise_for_status()
+
+                return result
+            except BaseException as exception:
+                if result is not None:
+                    result.close()
+
+                if (not isinstance(exception, requests.RequestException) or
+                    attempt == FETCH_ATTEMPTS - 1):
+                    raise
+
+            # The cookies may have expired before they were expected to, so
+            # prime again before trying once more.
+            self.connection.invalidate(self.baseURL)
+
+    @staticmethod
+    def parseResult(result):
+        """
+        Parses the body of a Schedule of Classes result while it is still
+        being downloaded, so only a small part of the page is in memory at
+        once.
+
+        :param result: the requests.Response object, loaded with streaming
+        :raises: ClassParserError, requests.RequestException
+        :returns: a dictionary with the course name as the key and list of
+        course objects as the value
+        """
+        schedule = {}
+
+        try:
+            for course, lectures in ClassParser().parseStream(
+                    result.iter_content(CHUNK_SIZE)):
+                schedule.setdefault(course, []).extend(lectures)
+        finally:
+            result.close()
+
+        return schedule
+
+    def retrieveShard(self, courses, bySubject = False):
+        """
+        Loads and parses the Schedule of Classes result for some of the
+        desired courses.
+
+        :param self: the schedule object
+        :param courses: the course codes to load
+        :param bySubject: whether or not the courses are subject codes
+        :raises: ClassParserError, requests.RequestException
+        :returns: a dictionary with the course name as the key and list of
+        course objects as the value
+        """
+        return Schedule.parseResult(self.fetch(courses, stream=True,
+                                               bySubject=bySubject))
+
+    def retrieveShards(self, courses, bySubject = False, parsed = None):
+        """
+        Loads and parses the Schedule of Classes results for the given
+        courses. The courses are split into shards that are fetched at once
+        and merged.
+
+        :param self: the schedule object
+        :param courses: the course codes to load
+        :param bySubject: whether or not the courses are subject codes, such
+        as CSE, to load every course of
+        :param parsed: a list that the course codes of each shard whose page
+        was parsed are added to, if given
+        :raises: ClassParserError, requests.RequestException
+        :returns: a dictionary with the course name as the key and list of
+        course objects as the value
+        """
+        shards = self.getShards(courses)
+
+        if parsed is None:
+            parsed = []
+
+        if len(shards) == 1:
+            schedule = self.retrieveShard(shards[0], bySubject)
+            parsed.extend(shards[0])
+
+            return schedule
+
+        schedule = {}
+        error = None
+
+        # Fetch the shards at once, and parse each one as soon as it arrives.
+        with ThreadPoolExecutor(min(max(self.workers, 1),
+                                    len(shards))) as pool:
+            futures = {pool.submit(self.retrieveShard, shard, bySubject):
+                       shard for shard in shards}
+
+            for future in as_completed(futures):
+                try:
+                    schedule.update(future.result())
+                    parsed.extend(futures[future])
+                except ClassParserError as exception:
+                    # A shard may not have any of its courses, which is only
+                    # an error if no shard has any.
+                    error = exception
+
+        if not schedule and error is not None:
+            raise error
+
+        return schedule
+
+    def revalidate(self, course, entry):
+        """
+        Checks whether a stale cached course changed with a conditional
+        request if it has validators, and loads it again if it did.
+
+        :param self: the schedule object
+        :param course: the course code
+        :param entry: the stale cache entry of the course
+        :raises: requests.RequestException
+        :returns: the lectures of the course, or None if it was not found
+        """
+        headers = {}
+
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+
+        if entry["lastModified"]:
+            headers["If-Modified-Since"] = entry["lastModified"]
+
+        result = self.fetch([course], headers, True)
+
+        if result.status_code == 304:
+            result.close()
+            self.cache.touch(self.term, course, entry)
+
+            return entry["lectures"]
+
+        try:
+            lectures = Schedule.parseResult(result).get(course)
+        except ClassParserError:
+            lectures = None
+
+        self.cache.put(self.term, course, lectures,
+                       result.headers.get("ETag"),
+                       result.headers.get("Last-Modified"))
+
+        return lectures
+
+    def retrieveCached(self):
+        """
+        Finds the desired courses using the cache. Fresh courses come from the
+        cache, stale courses are revalidated one at a time so the validators
+        describe a single course (falling back to the stale entry if that
+        request fails), and courses that are not cached are loaded in shards.
+
+        :param self: the schedule object
+        :raises: ClassParserError, requests.RequestException
+        :returns: a dictionary with the course name as the key and list of
+        course objects as the value
+        """
+        schedule = {}
+        stale = {}
+        missing = []
+
+        for course in dict.fromkeys(self.courses):
+            entry = self.cache.get(self.term, course)
+
+            if entry is None:
+                missing.append(course)
+            elif self.cache.isFresh(entry):
+                if entry["lectures"] is not None:
+                    schedule[course] = entry["lectures"]
+            else:
+                stale[course] = entry
+
+        if stale:
+            with ThreadPoolExecutor(min(max(self.workers, 1),
+                                        len(stale))) as pool:
+                futures = {course: pool.submit(self.revalidate, course, entry)
+                           for course, entry in stale.items()}
+
+                for course, future in futures.items():
+                    try:
+                        lectures = future.result()
+                    except requests.RequestException:
+                        # A stale course is better than failing the whole
+                        # lookup when it cannot be revalidated.
+                        lectures = stale[course]["lectures"]
+
+                    if lectures is not None:
+                        schedule[course] = lectures
+
+        if missing:
+            parsed = []
+
+            try:
+                found = self.retrieveShards(missing, parsed=parsed)
+            except ClassParserError:
+                found = {}
+
+            # Validators of a shard do not describe a single course, so these
+            # courses get validators when they are first revalidated. A course
+            # is only cached as missing if the page of its shard was parsed,
+            # since a shard that failed to parse says nothing about it.
+            for course in parsed:
+                self.cache.put(self.term, course, found.get(course))
+
+            schedule.update(found)
+
+        if not schedule:
+            raise ClassParserError("none of the courses were found")
+
+        return schedule
 
     def retrieve(self):
         """
         Finds all of the available, matching courses (with their corresponding
-        lectures and sections) for the given term.
+        lectures and sections) for the given term. The courses are split into
+        shards that are fetched at once and merged. If there is a catalog, the
+        courses are read from it instead. If there is a cache, only courses
+        that are not cached or stale are loaded.
 
         :param self: the schedule object
-        :raises: ScheduleError
+        :raises: ScheduleError, ClassParserError
         :returns: a dictionary with the course name as the key and list of
         course objects as the value
         """
@@ -110,19 +437,15 @@ class Schedule(object):
         if not self.term or not Schedule.validateTerm(self.term):
             raise ScheduleError("invalid term provided")
 
-        # Get the Schedule of Classes result.
-        session = requests.Session()
-        session.get(self.getScheduleURL(False))
-
-        result = session.get(self.getScheduleURL(True))
+        if self.catalog is not None:
+            schedule = self.catalog.getCourses(self.term, self.courses)
 
-        # Close the connection.
-        session.close()
+            if not schedule:
+                raise ClassParserError("none of the courses were found")
 
-        # Raise an exception if the request failed.
-        result.raise_for_status()
+            return schedule
 
-        parser = ClassParser()
-        parser.load(result.content)
+        if self.cache is not None:
+            return self.retrieveCached()
 
-        return parser.parse()
+        return self.retrieveShards(self.courses)
@@ -0,0 +1,669 @@
+#!/usr/bin/env python
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+
+import snapshot
+
+from concurrent.futures import ProcessPoolExecutor
+from batch import PREFERENCES
+from batch import addCourses
+from batch import getTermSolver
+from batch import initWorker
+from batch import validatePreferences
+from catalog import Catalog
+from ranking import Ranking
+from schedule import Schedule
+
+# The default address the service listens on.
+HOST = "127.0.0.1"
+PORT = 8080
+
+# The maximum number of requests waiting to be solved before new requests are
+# turned away.
+QUEUE_SIZE = 64
+
+# The number of generations evolved by a worker before progress is reported.
+CHUNK_GENERATIONS = 16
+
+# The extension of the snapshot file of each term.
+SNAPSHOT_EXTENSION = ".snapshot"
+
+# The largest request body that is accepted, in bytes.
+MAX_BODY = 65536
+
+# The reason phrases of the HTTP status codes that are sent.
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    503: "Service Unavailable"
+}
+
+# The state of each request being solved by the current worker process.
+workerJobs = {}
+
+def startJob(jobId, term, schedule, courses, options, generations):
+    """
+    Starts solving a request in a worker process. The state of the request
+    stays in the worker until it is solved or stopped, so only its progress
+    is sent back after each chunk of generations.
+
+    :param jobId: the id of the request
+    :param term: the term code
+    :param schedule: the schedule data of the courses of the request that
+    were not sent to this worker before
+    :param courses: the course codes of the request
+    :param options: the preferences of the request merged with the defaults
+    :param generations: the number of generations to evolve
+    :returns: the progress of the request, with the results once it is done
+    """
+    addCourses(term, schedule)
+
+    algorithm, solver = getTermSolver(term, courses, options["results"])
+
+    if solver is not None:
+        progress = {"generation": 0, "highest": 0, "done": True,
+                    "results": []}
+
+        if solver.solve() is not None:
+            progress["highest"] = solver.fitness
+            progress["results"] = [(algorithm.toDict(genes), fitness)
+                                   for genes, fitness in solver.getRanked()]
+
+        return progress
+
+    random.seed(options["seed"])
+    algorithm.initiate(options["capacity"], options["crossoverRate"],
+                       options["mutateRate"], options["elitism"],
+                       options["selection"])
+    algorithm.ranking = Ranking(options["results"])
+    algorithm.updateRanking()
+
+    workerJobs[jobId] = {
+        "algorithm": algorithm,
+        "options": options,
+        "random": random.getstate(),
+        "generation": 0,
+        "highest": algorithm.getHighestFitness(),
+        "stale": 0
+    }
+
+    return solveChunk(jobId, generations)
+
+def solveChunk(jobId, generations):
+    """
+    Continues solving a request in a worker process for a number of
+    generations.
+
+    :param jobId: the id of the request
+    :param generations: the number of generations to evolve
+    :returns: the progress of the request, with the results once it is done
+    """
+    state = workerJobs[jobId]
+    algorithm = state["algorithm"]
+    options = state["options"]
+    done = False
+
+    # Other requests may use this worker between chunks.
+    random.setstate(state["random"])
+
+    try:
+        for i in range(generations):
+            if (state["generation"] >= options["generations"] or
+                (options["plateau"] is not None and
+                 state["stale"] >= options["plateau"])):
+                break
+
+            algorithm.evolve()
+            algorithm.updateRanking()
+            state["generation"] += 1
+
+            if algorithm.getHighestFitness() > state["highest"]:
+                state["highest"] = algorithm.getHighestFitness()
+                state["stale"] = 0
+            else:
+                state["stale"] += 1
+
+        done = (state["generation"] >= options["generations"] or
+                (options["plateau"] is not None and
+                 state["stale"] >= options["plateau"]))
+    except BaseException:
+        stopJob(jobId)
+        raise
+
+    state["random"] = random.getstate()
+    progress = {"generation": state["generation"],
+                "highest": state["highest"], "done": done, "results": None}
+
+    if done:
+        stopJob(jobId)
+        progress["results"] = [(algorithm.toDict(individual), fitness)
+                               for individual, fitness
+                               in algorithm.ranking.getRanked()]
+
+    return progress
+
+def stopJob(jobId):
+    """
+    Forgets the state of a request in a worker process.
+
+    :param jobId: the id of the request
+    """
+    workerJobs.pop(jobId, None)
+
+class Job(object):
+    """
+    The Job class is a request that is waiting to be solved or being solved
+    by the service.
+
+    :ivar term: the term code
+    :ivar courses: the course codes
+    :ivar options: the preferences of the request merged with the defaults
+    :ivar messages: the progress and result messages for the client
+    :ivar cancelled: whether or not the client has gone away
+    """
+
+    def __init__(self, term, courses, options):
+        """
+        Constructor for the Job class.
+
+        :param self: the Job object
+        :param term: the term code
+        :param courses: the course codes
+        :param options: the preferences of the request merged with the
+        defaults
+        """
+        self.term = term
+        self.courses = courses
+        self.options = options
+        self.messages = asyncio.Queue()
+        self.cancelled = False
+
+class ScheduleService(object):
+    """
+    The ScheduleService class is a long-running HTTP service that finds
+    schedules. Requests are queued with a bounded queue and solved in a pool
+    of worker processes a few generations at a time, and the progress and the
+    final schedules are streamed back as newline delimited JSON. A request
+    stops being solved as soon as its client disconnects.
+
+    The schedule data of every course that has been requested stays in memory
+    between requests, as do the fitness tables in each worker process. Each
+    worker process is only sent the courses it does not have yet, and keeps
+    the state of the request it is solving between chunks. With a snapshot
+    directory, the schedule data is also kept between runs of the service.
+
+    A request is a POST to /schedule with a JSON object that has a "term", a
+    list of "courses" and optional "preferences", which override the default
+    PREFERENCES of the batch module.
+
+    :ivar workers: the number of worker processes
+    :ivar queueSize: the maximum number of waiting requests
+    :ivar chunk: the number of generations between progress messages
+    :ivar snapshots: the directory of the snapshot of each term, or None
+    :ivar catalog: the Catalog that courses are read from, or None
+    :ivar schedules: the schedule data of each term that has been retrieved
+    :ivar queue: the requests waiting to be solved
+    :ivar pools: a pool of a single worker process for each dispatcher
+    :ivar server: the asyncio server
+    :ivar dispatchers: the tasks that take requests from the queue
+    """
+
+    def __init__(self, workers=None, queueSize=QUEUE_SIZE,
+                 chunk=CHUNK_GENERATIONS, snapshots=None, catalog=None):
+        """
+        Constructor for the ScheduleService class.
+
+        :param self: the ScheduleService object
+        :param workers: the number of worker processes, defaults to the CPU
+        count
+        :param queueSize: the maximum number of waiting requests
+        :param chunk: the number of generations between progress messages
+        :param snapshots: the directory that the schedule data of each term is
+        loaded from when starting and saved to when stopping, or None
+        :param catalog: the Catalog that courses are read from instead of the
+        Schedule of Classes, or None
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queueSize = queueSize
+        self.chunk = chunk
+        self.snapshots = snapshots
+        self.catalog = catalog
+        self.schedules = {}
+        self.queue = None
+        self.pools = []
+        self.server = None
+        self.dispatchers = []
+
+    async def start(self, host=HOST, port=PORT):
+        """
+        Starts the worker processes and starts listening for requests.
+
+        :param self: the ScheduleService object
+        :param host: the address to listen on
+        :param port: the port to listen on, or 0 for any free port
+        :returns: the port the service listens on
+        """
+        self.queue = asyncio.Queue(self.queueSize)
+
+        if self.snapshots:
+            self.loadSnapshots()
+
+        # Forked workers would inherit open client sockets and keep them from
+        # closing, so start the workers from a fresh interpreter instead.
+        context = multiprocessing.get_context("spawn")
+        self.pools = [ProcessPoolExecutor(1, context, initWorker, ({},))
+                      for i in range(self.workers)]
+
+        # Solve as many requests at once as there are workers, each with its
+        # own worker so the state of a request stays in one process.
+        self.dispatchers = [asyncio.ensure_future(self.dispatch(pool))
+                            for pool in self.pools]
+        self.server = await asyncio.start_server(self.handle, host, port)
+
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops listening for requests and stops the worker processes.
+
+        :param self: the ScheduleService object
+        """
+        self.server.close()
+        await self.server.wait_closed()
+
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+
+        for pool in self.pools:
+            pool.shutdown()
+
+        if self.snapshots:
+            self.saveSnapshots()
+
+    def loadSnapshots(self):
+        """
+        Loads the schedule data of each term from the snapshot directory.
+        Snapshots that cannot be read are skipped, since the courses can
+        still be retrieved again.
+
+        :param self: the ScheduleService object
+        """
+        try:
+            names = os.listdir(self.snapshots)
+        except OSError:
+            return
+
+        for name in names:
+            term, extension = os.path.splitext(name)
+
+            if extension != SNAPSHOT_EXTENSION:
+                continue
+
+            try:
+                self.schedules[term] = snapshot.load(
+                    os.path.join(self.snapshots, name))
+            except (OSError, snapshot.SnapshotError):
+                pass
+
+    def saveSnapshots(self):
+        """
+        Saves the schedule data of each term to the snapshot directory.
+
+        :param self: the ScheduleService object
+        """
+        os.makedirs(self.snapshots, exist_ok=True)
+
+        for term, schedule in self.schedules.items():
+            if schedule:
+                snapshot.save(schedule, os.path.join(
+                    self.snapshots, term + SNAPSHOT_EXTENSION))
+
+    async def handle(self, reader, writer):
+        """
+        Handles a connection from a client, which sends a single request.
+
+        :param self: the ScheduleService object
+        :param reader: the stream reader of the connection
+        :param writer: the stream writer of the connection
+        """
+        try:
+            try:
+                method, path, body = await ScheduleService.readRequest(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                await ScheduleService.writeResponse(writer, 400,
+                                                    {"error": "bad request"})
+
+                return
+
+            if method == "GET" and path == "/health":
+                await ScheduleService.writeResponse(writer, 200, {
+                    "queued": self.queue.qsize(),
+                    "workers": self.workers,
+                    "terms": {term: len(schedule) for term, schedule
+                              in self.schedules.items()}
+                })
+            elif method == "POST" and path == "/schedule":
+                await self.handleSchedule(reader, writer, body)
+            else:
+                await ScheduleService.writeResponse(writer, 404,
+                                                    {"error": "not found"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handleSchedule(self, reader, writer, body):
+        """
+        Queues a schedule request and streams its messages to the client
+        until it is solved or the client disconnects.
+
+        :param self: the ScheduleService object
+        :param reader: the stream reader of the connection
+        :param writer: the stream writer of the connection
+        :param body: the body of the request
+        """
+        try:
+            job = ScheduleService.parseJob(body)
+        except ValueError as error:
+            await ScheduleService.writeResponse(writer, 400,
+                                                {"error": str(error)})
+
+            return
+
+        # Turn requests away instead of letting the queue grow forever.
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            await ScheduleService.writeResponse(writer, 503,
+                                                {"error": "too many requests"})
+
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\n"
+                     b"Connection: close\r\n\r\n")
+
+        # The client sends nothing else, so reaching the end of the stream
+        # means it has disconnected.
+        closed = asyncio.ensure_future(reader.read())
+
+        try:
+            while True:
+                message = asyncio.ensure_future(job.messages.get())
+                done, pending = await asyncio.wait(
+                    (message, closed), return_when=asyncio.FIRST_COMPLETED)
+
+                if message not in done:
+                    message.cancel()
+                    job.cancelled = True
+
+                    break
+
+                message = message.result()
+                ScheduleService.writeChunk(writer,
+                                           (json.dumps(message) + "\n")
+                                           .encode("utf-8"))
+                await writer.drain()
+
+                if message["type"] != "progress":
+                    ScheduleService.writeChunk(writer, b"")
+                    await writer.drain()
+
+                    break
+        except ConnectionError:
+            job.cancelled = True
+        finally:
+            closed.cancel()
+
+    async def dispatch(self, pool):
+        """
+        Takes requests from the queue and solves them, one at a time.
+
+        :param self: the ScheduleService object
+        :param pool: the pool of the worker process that solves the requests
+        """
+        # The course codes of each term that the worker already has.
+        sent = {}
+
+        while True:
+            job = await self.queue.get()
+
+            try:
+                if not job.cancelled:
+                    await self.solve(job, pool, sent)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                # Keep the dispatcher alive for the following requests.
+                job.messages.put_nowait({"type": "error",
+                                         "error": str(error)})
+            finally:
+                self.queue.task_done()
+
+    async def solve(self, job, pool, sent):
+        """
+        Solves a request in a worker process, a chunk of generations at a
+        time, and sends a progress message after every chunk.
+
+        :param self: the ScheduleService object
+        :param job: the Job object of the request
+        :param pool: the pool of the worker process that solves the request
+        :param sent: the course codes of each term that the worker already
+        has, which is updated
+        """
+        loop = asyncio.get_running_loop()
+        schedule = await self.getSchedule(job.term, job.courses)
+        missing = [course for course in job.courses if course not in schedule]
+
+        if missing:
+            job.messages.put_nowait({"type": "error",
+                                     "error": "courses not found",
+                                     "courses": missing})
+
+            return
+
+        known = sent.setdefault(job.term, set())
+        added = {course: schedule[course] for course in job.courses
+                 if course not in known}
+        progress = await loop.run_in_executor(pool, startJob, id(job),
+                                              job.term, added, job.courses,
+                                              job.options, self.chunk)
+        known.update(added)
+
+        while True:
+            job.messages.put_nowait({"type": "progress",
+                                     "generation": progress["generation"],
+                                     "fitness": progress["highest"]})
+
+            if progress["done"]:
+                break
+
+            if job.cancelled:
+                await loop.run_in_executor(pool, stopJob, id(job))
+
+                return
+
+            progress = await loop.run_in_executor(pool, solveChunk, id(job),
+                                                  self.chunk)
+
+        job.messages.put_nowait({
+            "type": "result",
+            "schedules": [{"schedule": result, "fitness": fitness}
+                          for result, fitness in progress["results"]]
+        })
+
+    async def getSchedule(self, term, courses):
+        """
+        Returns the schedule data of a term, retrieving the given courses
+        first if they have not been retrieved before.
+
+        :param self: the ScheduleService object
+        :param term: the term code
+        :param courses: the course codes that are needed
+        :raises: ScheduleError, ClassParserError
+        :returns: the schedule data of every course of the term retrieved so
+        far
+        """
+        schedule = self.schedules.setdefault(term, {})
+        missing = [course for course in courses if course not in schedule]
+
+        if missing:
+            retriever = Schedule(catalog=self.catalog)
+            retriever.term = term
+            retriever.courses = missing
+
+            # Retrieving blocks, so do it outside of the event loop.
+            loop = asyncio.get_running_loop()
+            schedule.update(await loop.run_in_executor(None,
+                                                       retriever.retrieve))
+
+        return schedule
+
+    @staticmethod
+    def parseJob(body):
+        """
+        Turns the body of a schedule request into a job.
+
+        :param body: the body of the request
+        :raises: ValueError
+        :returns: the Job object
+        """
+        try:
+            request = json.loads(body.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise ValueError("the body is not valid UTF-8")
+
+        if not isinstance(request, dict):
+            raise ValueError("the body is not a JSON object")
+
+        term = request.get("term")
+        courses = request.get("courses")
+        preferences = request.get("preferences") or {}
+
+        if not isinstance(term, str) or not Schedule.validateTerm(term):
+            raise ValueError("invalid term provided")
+
+        if (not isinstance(courses, list) or not courses or
+            not all(isinstance(course, str) and
+                    Schedule.validateCourse(course) for course in courses)):
+            raise ValueError("invalid course list provided")
+
+        validatePreferences(preferences)
+
+        options = dict(PREFERENCES)
+        options.update(preferences)
+
+        return Job(term.upper(), [course.upper() for course in courses],
+                   options)
+
+    @staticmethod
+    async def readRequest(reader):
+        """
+        Reads an HTTP request from a client.
+
+        :param reader: the stream reader of the connection
+        :raises: ValueError, IncompleteReadError
+        :returns: a tuple of the method, the path and the body
+        """
+        line = await reader.readline()
+        method, path, version = line.decode("latin-1").split()
+        headers = {}
+
+        while True:
+            line = await reader.readline()
+
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+
+        if length < 0 or length > MAX_BODY:
+            raise ValueError("invalid content length")
+
+        return method, path, await reader.readexactly(length)
+
+    @staticmethod
+    async def writeResponse(writer, status, content):
+        """
+        Writes a whole JSON response to a client.
+
+        :param writer: the stream writer of the connection
+        :param status: the HTTP status code
+        :param content: the object to send as JSON
+        """
+        body = json.dumps(content).encode("utf-8")
+
+        writer.write(("HTTP/1.1 " + str(status) + " " + STATUS_TEXT[status]
+                      + "\r\nContent-Type: application/json"
+                      + "\r\nContent-Length: " + str(len(body))
+                      + "\r\nConnection: close\r\n\r\n").encode("latin-1")
+                     + body)
+        await writer.drain()
+
+    @staticmethod
+    def writeChunk(writer, data):
+        """
+        Writes a chunk of a response with chunked transfer encoding. An empty
+        chunk ends the response.
+
+        :param writer: the stream writer of the connection
+        :param data: the bytes of the chunk
+        """
+        writer.write(format(len(data), "x").encode("latin-1") + b"\r\n"
+                     + data + b"\r\n")
+
+async def serve(host, port, workers, snapshots=None, catalog=None):
+    """
+    Runs the service until it is interrupted.
+
+    :param host: the address to listen on
+    :param port: the port to listen on
+    :param workers: the number of worker processes
+    :param snapshots: the directory of the snapshot of each term, or None
+    :param catalog: the path of the catalog that courses are read from, or
+    None
+    """
+    service = ScheduleService(workers, snapshots=snapshots,
+                              catalog=Catalog(catalog) if catalog else None)
+    port = await service.start(host, port)
+
+    print("Listening on " + host + ":" + str(port))
+
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+def main():
+    """
+    Starts the service with the address and number of workers given on the
+    command line.
+    """
+    parser = argparse.ArgumentParser(description="Finds schedules over HTTP.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--snapshots", default=None)
+    parser.add_argument("--catalog", default=None)
+    arguments = parser.parse_args()
+
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.workers,
+                          arguments.snapshots, arguments.catalog))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+import os
+import struct
+import sys
+import tempfile
+
+from array import array
+from classtime import ClassTime
+
+# The bytes every snapshot starts with.
+SNAPSHOT_MAGIC = b"TSCH"
+
+# The version of the snapshot format, which is changed whenever the format
+# changes so older snapshots are rejected.
+SNAPSHOT_VERSION = 1
+
+# The header: magic, version, number of strings, number of bytes of string
+# data and number of integers.
+HEADER = struct.Struct("<4sHIII")
+
+# The array type codes used for string lengths and integers.
+TYPE_LENGTHS = "I"
+TYPE_INTS = "i"
+
+# The integer used for a missing string or time.
+NONE = -1
+
+# The kinds of entries of a lecture.
+KIND_MEETING = 0
+KIND_SECTIONS = 1
+KIND_FINAL = 2
+
+class SnapshotError(Exception):
+    """
+    An exception that is raised when a snapshot cannot be read.
+    """
+    pass
+
+def dumps(schedule):
+    """
+    Turns schedule data in the format of ClassParser.parse into a snapshot.
+    Every distinct string is stored once, every ClassTime is stored as
+    integers, and everything else is stored as a flat list of integers.
+
+    :param schedule: a dictionary with the course name as the key and list of
+    lectures as the value
+    :returns: the snapshot as bytes
+    """
+    strings = {}
+    times = {}
+    timeValues = []
+    body = []
+
+    def string(value):
+        if value is None:
+            return NONE
+
+        index = strings.get(value)
+
+        if index is None:
+            index = strings[value] = len(strings)
+
+        return index
+
+    def time(value):
+        if value is None:
+            return NONE
+
+        key = (value.days, value.start, value.finish, value.startTime,
+               value.finishTime)
+        index = times.get(key)
+
+        if index is None:
+            index = times[key] = len(times)
+            timeValues.extend((string(value.days), string(value.start),
+                               string(value.finish), value.startTime,
+                               value.finishTime))
+
+        return index
+
+    def meeting(value):
+        body.extend((string(value["sectionID"]), time(value["time"]),
+                     string(value["building"]), string(value["room"]),
+                     string(value["instructor"])))
+
+    body.append(len(schedule))
+
+    for course, lectures in schedule.items():
+        body.extend((string(course), len(lectures)))
+
+        for lecture in lectures:
+            body.append(len(lecture))
+
+            # Keep the order of the meeting types, since it decides the order
+            # of the genes of a course.
+            for meetingType, value in lecture.items():
+                body.append(string(meetingType))
+
+                if meetingType == "FI":
+                    body.extend((KIND_FINAL, string(value["date"]),
+                                 time(value["time"]),
+                                 string(value["building"]),
+                                 string(value["room"])))
+                elif meetingType == "LE":
+                    body.append(KIND_MEETING)
+                    meeting(value)
+                else:
+                    body.extend((KIND_SECTIONS, len(value)))
+
+                    for section in value:
+                        meeting(section)
+
+    ints = array(TYPE_INTS, [len(times)])
+    ints.extend(timeValues)
+    ints.extend(body)
+
+    text = list(strings)
+    lengths = array(TYPE_LENGTHS, [len(value) for value in text])
+    blob = "".join(text).encode("utf-8")
+
+    if sys.byteorder != "little":
+        lengths.byteswap()
+        ints.byteswap()
+
+    return (HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(text),
+                        len(blob), len(ints))
+            + lengths.tobytes() + blob + ints.tobytes())
+
+def loads(data):
+    """
+    Turns a snapshot back into schedule data in the format of
+    ClassParser.parse. Strings are interned, and meetings with the same time
+    share a single ClassTime object.
+
+    :param data: the snapshot as bytes
+    :raises: SnapshotError
+    :returns: a dictionary with the course name as the key and list of
+    lectures as the value
+    """
+    if len(data) < HEADER.size:
+        raise SnapshotError("the snapshot is too short")
+
+    magic, version, stringCount, blobSize, intCount = \
+        HEADER.unpack_from(data)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("the data is not a snapshot")
+
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError("unsupported snapshot version " + str(version))
+
+    # Read the string lengths, the strings and the integers.
+    offset = HEADER.size
+    lengths = array(TYPE_LENGTHS)
+    ints = array(TYPE_INTS)
+    end = offset + stringCount * lengths.itemsize + blobSize \
+          + intCount * ints.itemsize
+
+    if len(data) != end:
+        raise SnapshotError("the snapshot has the wrong size")
+
+    # Any error while decoding means the snapshot is corrupt.
+    try:
+        return decode(data, offset, stringCount, blobSize)
+    except (IndexError, ValueError, TypeError, KeyError) as exception:
+        raise SnapshotError("the snapshot is corrupt: " + str(exception))
+
+def decode(data, offset, stringCount, blobSize):
+    """
+    Decodes the string table, the times and the courses of a snapshot whose
+    header was already checked.
+
+    :param data: the snapshot as bytes
+    :param offset: where the string lengths start
+    :param stringCount: the number of strings
+    :param blobSize: the number of bytes of string data
+    :raises: IndexError, ValueError, TypeError, KeyError
+    :returns: a dictionary with the course name as the key and list of
+    lectures as the value
+    """
+    lengths = array(TYPE_LENGTHS)
+    ints = array(TYPE_INTS)
+    lengths.frombytes(data[offset:offset + stringCount * lengths.itemsize])
+    offset += stringCount * lengths.itemsize
+    blob = data[offset:offset + blobSize].decode("utf-8")
+    offset += blobSize
+    ints.frombytes(data[offset:])
+
+    if sys.byteorder != "little":
+        lengths.byteswap()
+        ints.byteswap()
+
+    strings = [None]
+    position = 0
+    ints = ints.tolist()
+
+    # Every integer is a count, a kind, a time in minutes or an index, and
+    # only an index can be negative, when it is NONE.
+    if ints and min(ints) < NONE:
+        raise ValueError("the snapshot has a negative integer")
+
+    for length in lengths:
+        strings.append(sys.intern(blob[position:position + length]))
+        position += length
+
+    if position != len(blob):
+        raise ValueError("the string lengths do not match the string data")
+
+    def count(index):
+        if ints[index] < 0:
+            raise ValueError("the snapshot has a negative count")
+
+        return ints[index]
+
+    # Create each distinct ClassTime once. None is at the start of the
+    # strings and times, so an index is looked up at one past itself and
+    # NONE turns into None, while any index past the end is an IndexError.
+    times = [None]
+    index = 1
+
+    for i in range(count(0)):
+        days, start, finish, startTime, finishTime = ints[index:index + 5]
+        times.append(ClassTime.fromValues(strings[days + 1],
+                                          strings[start + 1],
+                                          strings[finish + 1], startTime,
+                                          finishTime))
+        index += 5
+
+    def meeting(index):
+        sectionID, time, building, room, instructor = ints[index:index + 5]
+
+        return {
+            "sectionID": strings[sectionID + 1],
+            "time": times[time + 1],
+            "building": strings[building + 1],
+            "room": strings[room + 1],
+            "instructor": strings[instructor + 1]
+        }
+
+    schedule = {}
+    courseCount = count(index)
+    index += 1
+
+    for i in range(courseCount):
+        course = strings[ints[index] + 1]
+
+        if course is None:
+            raise ValueError("a course has no name")
+
+        lectures = schedule[course] = []
+        lectureCount = count(index + 1)
+        index += 2
+
+        for j in range(lectureCount):
+            lecture = {}
+            entryCount = count(index)
+            index += 1
+
+            for k in range(entryCount):
+                meetingType = strings[ints[index] + 1]
+                kind = ints[index + 1]
+                index += 2
+
+                if meetingType is None:
+                    raise ValueError("an entry has no meeting type")
+
+                if kind == KIND_FINAL:
+                    lecture[meetingType] = {
+                        "date": strings[ints[index] + 1],
+                        "time": times[ints[index + 1] + 1],
+                        "building": strings[ints[index + 2] + 1],
+                        "room": strings[ints[index + 3] + 1]
+                    }
+                    index += 4
+                elif kind == KIND_MEETING:
+                    lecture[meetingType] = meeting(index)
+                    index += 5
+                elif kind == KIND_SECTIONS:
+                    sections = lecture[meetingType] = []
+                    sectionCount = count(index)
+                    index += 1
+
+                    for l in range(sectionCount):
+                        sections.append(meeting(index))
+                        index += 5
+                else:
+                    raise ValueError("unknown entry kind " + str(kind))
+
+            lectures.append(lecture)
+
+    if index != len(ints):
+        raise ValueError("the snapshot has data after the last course")
+
+    return schedule
+
+def save(schedule, path):
+    """
+    Saves schedule data to a snapshot file.
+
+    :param schedule: a dictionary with the course name as the key and list of
+    lectures as the value
+    :param path: the path of the file
+    """
+    data = dumps(schedule)
+    directory = os.path.dirname(path) or "."
+    handle, temporary = tempfile.mkstemp(dir=directory)
+
+    # Write to a temporary file first, so a reader never sees a partly
+    # written snapshot.
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(data)
+
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+
+        raise
+
+def load(path):
+    """
+    Loads schedule data from a snapshot file.
+
+    :param path: the path of the file
+    :raises: SnapshotError, OSError
+    :returns: a dictionary with the course name as the key and list of
+    lectures as the value
+    """
+    with open(path, "rb") as source:
+        return loads(source.read())
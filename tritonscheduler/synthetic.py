@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+import random
+
+from classtime import ClassTime
+from classtime import HOUR
+
+# The day strings used for generated meetings.
+DAYS = ["MWF", "TuTh", "MW", "M", "Tu", "W", "Th", "F"]
+
+# The day strings used for generated finals.
+DAYS_FINAL = ["M", "Tu", "W", "Th", "F", "S"]
+
+# The range of start times (in minutes) for generated meetings.
+TIME_FIRST = 8 * HOUR
+TIME_LAST = 20 * HOUR
+
+# The lengths (in minutes) of generated meetings and finals.
+LENGTHS = [50, 80, 110]
+LENGTH_FINAL = 179
+
+# The default number of sections of each type for every lecture.
+SECTIONS = {"DI": 3, "LA": 2}
+
+# Parts of the printable Schedule of Classes page.
+HTML_HEADER = "<html><body><table>"
+HTML_FOOTER = "</table></body></html>"
+HTML_DEPARTMENT = "<tr><td><h2>Department {0} ({0} )</h2></td></tr>"
+HTML_COURSE = "<tr><td class=\"crsheader\"></td>" \
+              "<td class=\"crsheader\">{0}</td>" \
+              "<td class=\"crsheader\">Course {0}</td>" \
+              "<td class=\"crsheader\">( 4 Units)</td></tr>"
+HTML_MEETING = "<tr class=\"sectxt\"><td></td><td>{0}</td><td>{1}</td>" \
+               "<td>{2}</td><td>{3}</td><td>{4}</td><td>{5}</td>" \
+               "<td>{6}</td><td>{7}</td></tr>"
+
+def formatTime(minutes):
+    """
+    Formats a number of minutes within the day in the hh:mma/p format used by
+    the Schedule of Classes.
+
+    :param minutes: the number of minutes within the day
+    :returns: the formatted time
+    """
+    hours, minutes = divmod(minutes, HOUR)
+    period = "a" if hours < 12 else "p"
+    hours %= 12
+
+    return str(hours or 12) + ":" + str(minutes).zfill(2) + period
+
+def generateTimes(generator, days, length):
+    """
+    Returns a random days string and time range string for a meeting.
+
+    :param generator: the random number generator
+    :param days: the day strings to pick from
+    :param length: the length of the meeting in minutes
+    :returns: a tuple of the days and the times such as ("MWF", "9:00a-9:50a")
+    """
+    start = generator.randrange(TIME_FIRST, TIME_LAST, 30)
+
+    return (generator.choice(days),
+            formatTime(start) + "-" + formatTime(start + length))
+
+def generateCourses(courses=6, lectures=3, sections=SECTIONS, finals=True,
+                    seed=None):
+    """
+    Generates the rows of a Schedule of Classes page for random courses. Every
+    course belongs to its own department, and every lecture has the given
+    number of sections of each type.
+
+    :param courses: the number of courses
+    :param lectures: the number of lectures for each course
+    :param sections: the number of sections of each meeting type per lecture
+    :param finals: whether or not each lecture has a final
+    :param seed: the seed for the random number generator
+    :returns: a list of (department, number, lectures) tuples, where each
+    lecture is a list of (id, type, section, days, times, building, room,
+    instructor) rows
+    """
+    generator = random.Random(seed)
+    sectionID = 100000
+    result = []
+
+    for course in range(courses):
+        department = "D" + chr(ord("A") + course // 26 % 26) + \
+                     chr(ord("A") + course % 26)
+        lectureRows = []
+
+        for lecture in range(lectures):
+            rows = []
+            letter = chr(ord("A") + lecture % 26)
+            instructor = "Instructor, " + letter + str(course)
+            days, times = generateTimes(generator, DAYS,
+                                        generator.choice(LENGTHS))
+            rows.append(("", "LE", letter + "00", days, times, "CENTR",
+                         str(100 + lecture), instructor))
+
+            for meetingType, count in sections.items():
+                for section in range(count):
+                    sectionID += 1
+                    days, times = generateTimes(generator, DAYS, 50)
+                    rows.append((str(sectionID), meetingType,
+                                 letter + str(section + 1).zfill(2), days,
+                                 times, "WLH", str(2000 + section),
+                                 instructor))
+
+            if finals:
+                days, times = generateTimes(generator, DAYS_FINAL,
+                                            LENGTH_FINAL)
+                rows.append(("", "FI", "12/10/2016", days, times, "TBA", "TBA",
+                             ""))
+
+            lectureRows.append(rows)
+
+        result.append((department, str(course + 1), lectureRows))
+
+    return result
+
+def generateSchedule(courses=6, lectures=3, sections=SECTIONS, finals=True,
+                     seed=None):
+    """
+    Generates random schedule data in the same format as ClassParser.parse.
+
+    :param courses: the number of courses
+    :param lectures: the number of lectures for each course
+    :param sections: the number of sections of each meeting type per lecture
+    :param finals: whether or not each lecture has a final
+    :param seed: the seed for the random number generator
+    :returns: a dictionary with the course name as the key and list of
+    lectures as the value
+    """
+    schedule = {}
+
+    for department, number, lectures in generateCourses(courses, lectures,
+                                                        sections, finals,
+                                                        seed):
+        courseInfo = []
+
+        for rows in lectures:
+            lecture = {}
+
+            for (sectionID, meetingType, section, days, times, building, room,
+                 instructor) in rows:
+                time = ClassTime.fromString(days + " " + times)
+
+                if meetingType == "FI":
+                    lecture["FI"] = {"date": section, "time": time,
+                                     "building": building, "room": room}
+
+                    continue
+
+                meeting = {"sectionID": sectionID, "time": time,
+                           "building": building, "room": room,
+                           "instructor": instructor}
+
+                if meetingType == "LE":
+                    lecture["LE"] = meeting
+                else:
+                    lecture.setdefault(meetingType, []).append(meeting)
+
+            courseInfo.append(lecture)
+
+        schedule[department + " " + number] = courseInfo
+
+    return schedule
+
+def generateHTML(courses=6, lectures=3, sections=SECTIONS, finals=True,
+                 seed=None):
+    """
+    Generates a printable Schedule of Classes page for random courses, which
+    ClassParser can load and parse.
+
+    :param courses: the number of courses
+    :param lectures: the number of lectures for each course
+    :param sections: the number of sections of each meeting type per lecture
+    :param finals: whether or not each lecture has a final
+    :param seed: the seed for the random number generator
+    :returns: the HTML page as a string
+    """
+    return formatHTML(generateCourses(courses, lectures, sections, finals,
+                                      seed))
+
+def formatHTML(courses):
+    """
+    Formats courses from generateCourses as a printable Schedule of Classes
+    page.
+
+    :param courses: a list of (department, number, lectures) tuples
+    :returns: the HTML page as a string
+    """
+    parts = [HTML_HEADER]
+
+    for department, number, lectures in courses:
+        parts.append(HTML_DEPARTMENT.format(department))
+
+        for rows in lectures:
+            parts.append(HTML_COURSE.format(number))
+
+            for row in rows:
+                parts.append(HTML_MEETING.format(*row))
+
+    parts.append(HTML_FOOTER)
+
+    return "".join(parts)
+
+def describe(value):
+    """
+    Converts schedule data into plain values that can be compared, with each
+    ClassTime turned into a string.
+
+    :param value: the schedule data, or any part of it
+    :returns: the same data with strings in place of ClassTime objects
+    """
+    if isinstance(value, dict):
+        return {key: describe(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [describe(item) for item in value]
+
+    return value if isinstance(value, str) or value is None else str(value)
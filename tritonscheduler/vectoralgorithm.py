@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+import numpy
+
+from algorithm import Algorithm
+from algorithm import SELECTION_ROULETTE
+from algorithm import SELECTION_SUS
+from algorithm import SELECTION_TOURNAMENT
+from algorithm import TOURNAMENT_SIZE
+from runstats import PHASE_SELECTION
+from runstats import PHASE_CROSSOVER
+from runstats import PHASE_MUTATION
+from runstats import PHASE_FITNESS
+
+class VectorAlgorithm(Algorithm):
+    """
+    The VectorAlgorithm class performs the same genetic algorithm as the
+    Algorithm class, but works on the whole population at once with NumPy.
+    The population is an array with one row per individual and one column per
+    course, where each value is the index of the gene used for the course.
+
+    :ivar random: the NumPy random number generator
+    :ivar geneCounts: the number of genes for each course
+    :ivar unary: per course, an array of the fitness of each gene on its own
+    :ivar pairwise: per pair of courses (i < j), an array of gene pair fitness
+    """
+
+    def __init__(self, schedule, seed=None, stats=None, table=None):
+        """
+        Constructor for the VectorAlgorithm class. The fitness of every gene
+        and pair of genes is turned into arrays so they can be indexed by a
+        whole column of the population at once.
+
+        :param self: the VectorAlgorithm object
+        :param schedule: schedule data that will be used as genetic information
+        :param seed: the seed for the random number generator
+        :param stats: the RunStats object to record instrumentation in, or
+        None to not record anything
+        :param table: an already built FitnessTable for the courses of the
+        schedule, which is shared instead of building a new one
+        """
+        super(VectorAlgorithm, self).__init__(schedule, stats, table)
+
+        table = self.table
+        self.random = numpy.random.default_rng(seed)
+        self.geneCounts = numpy.array([len(self.chromosomes[code])
+                                       for code in table.courses])
+        courses = range(len(table.courses))
+        self.unary = [numpy.array(table.getUnaryScores(i), dtype=numpy.int64)
+                      for i in courses]
+        self.pairwise = [[numpy.array(table.getPairScores(i, j),
+                                      dtype=numpy.int64) if j > i else None
+                          for j in courses] for i in courses]
+
+    def getPopulationFitness(self, population):
+        """
+        Calculates the fitness of every individual in a population by
+        gathering the precomputed scores for each column and pair of columns.
+
+        :param self: the VectorAlgorithm object
+        :param population: the array of gene indices for each individual
+        :returns: an array of fitness values, one for each individual
+        """
+        fitness = numpy.zeros(len(population), dtype=numpy.int64)
+        courses = len(self.unary)
+
+        for i in range(courses):
+            column = population[:, i]
+            row = self.pairwise[i]
+            fitness += self.unary[i][column]
+
+            for j in range(i + 1, courses):
+                fitness += row[j][column, population[:, j]]
+
+        return fitness
+
+    def initiate(self, size, crossoverRate, mutateRate, elitism,
+                 selection=SELECTION_ROULETTE, tournamentSize=TOURNAMENT_SIZE):
+        """
+        Creates an initial, random population so the genetic algorithm has a
+        base to start from.
+
+        :param self: the VectorAlgorithm object
+        :param size: the population size
+        :param crossoverRate: the probability of crossover occuring
+        :param mutateRate: the probability of an mutation occuring
+        :param elitism: what percent of the fittest individuals is carried over
+        :param selection: the strategy for selecting parents
+        :param tournamentSize: the number of individuals competing in a
+        tournament selection
+        """
+        self.capacity = size
+        self.crossoverRate = crossoverRate
+        self.mutateRate = mutateRate
+        self.elitism = elitism
+        self.selection = selection
+        self.tournamentSize = tournamentSize
+        self.evaluations = 0
+        self.population = self.getRandomGenes(size)
+
+        # Get fitness information for the current generation.
+        self.calculateFitness()
+
+    def getRandomGenes(self, size):
+        """
+        Returns an array of uniformly random gene indices for the given number
+        of individuals.
+
+        :param self: the VectorAlgorithm object
+        :param size: the number of individuals
+        :returns: an array with one row of gene indices per individual
+        """
+        values = self.random.random((size, len(self.geneCounts)))
+
+        return (values * self.geneCounts).astype(numpy.intp)
+
+    def calculateFitness(self):
+        """
+        Sorts the current population by fitness (least to greatest) and then
+        calculates the sum of the fitness values for the population.
+
+        :param self: the VectorAlgorithm object
+        """
+        self.evaluations += len(self.population)
+        fitness = self.getPopulationFitness(self.population)
+        order = numpy.argsort(fitness, kind="stable")
+
+        self.population = self.population[order]
+        self.fitness = fitness[order]
+        self.cumulative = numpy.cumsum(self.fitness)
+        self.fitnessSum = float(self.cumulative[-1] if len(self.cumulative)
+                                else 0)
+
+    def evolve(self):
+        """
+        Creates the next generation by keeping the fittest individuals and
+        filling the rest with mutated offspring of selected parents.
+
+        :param self: the VectorAlgorithm object
+        """
+        elites = int(self.capacity * self.elitism)
+        offspring = self.capacity - elites
+        clock = self.startTiming()
+
+        # Select parents using the selection strategy.
+        parents1 = self.select(offspring)
+        parents2 = self.select(offspring)
+        clock = self.addTiming(PHASE_SELECTION, clock)
+
+        children = self.crossover(parents1, parents2)
+        clock = self.addTiming(PHASE_CROSSOVER, clock)
+
+        self.mutate(children)
+        clock = self.addTiming(PHASE_MUTATION, clock)
+
+        # Keep the most fit individuals for the next generation.
+        self.population = numpy.concatenate(
+            (self.population[len(self.population) - elites:], children))
+
+        # Get fitness information for the current generation.
+        self.calculateFitness()
+        self.addTiming(PHASE_FITNESS, clock)
+
+    def select(self, count):
+        """
+        Picks individuals from the population using the selection strategy.
+
+        :param self: the VectorAlgorithm object
+        :param count: the number of individuals to pick
+        :returns: an array of the gene indices of the picked individuals
+        """
+        last = len(self.population) - 1
+
+        if count <= 0 or last < 0:
+            return self.population[:0]
+
+        if self.selection == SELECTION_TOURNAMENT:
+            # The population is sorted by fitness, so the highest index wins.
+            indices = self.random.integers(0, last + 1,
+                                           (count, self.tournamentSize))
+            indices = indices.max(axis=1)
+        elif self.fitnessSum <= 0:
+            indices = self.random.integers(0, last + 1, count)
+        else:
+            if self.selection == SELECTION_SUS:
+                # Evenly spaced pointers from a single random offset.
+                step = self.fitnessSum / count
+                pointers = (self.random.random() + numpy.arange(count)) * step
+            else:
+                pointers = self.random.random(count) * self.fitnessSum
+
+            indices = numpy.searchsorted(self.cumulative, pointers,
+                                         side="right")
+            indices = numpy.minimum(indices, last)
+
+            if self.selection == SELECTION_SUS:
+                self.random.shuffle(indices)
+
+        return self.population[indices]
+
+    def crossover(self, parents1, parents2):
+        """
+        Creates children by taking each course's gene from the second parent
+        with the crossover probability, and from the first parent otherwise.
+
+        :param self: the VectorAlgorithm object
+        :param parents1: the array of first parents
+        :param parents2: the array of second parents
+        :returns: the array of children
+        """
+        crossed = self.random.random(parents1.shape) <= self.crossoverRate
+
+        return numpy.where(crossed, parents2, parents1)
+
+    def mutate(self, individuals):
+        """
+        Replaces random genes of the given individuals with random genes from
+        the same course to provide some additional genetic diversity.
+
+        :param self: the VectorAlgorithm object
+        :param individuals: the array of individuals, which is changed in place
+        """
+        mutated = self.random.random(individuals.shape) <= self.mutateRate
+        individuals[mutated] = self.getRandomGenes(len(individuals))[mutated]
+
+    def getHighestFitness(self):
+        """
+        Returns the fitness value of the most fit individual in the population.
+        """
+        if len(self.fitness) > 0:
+            return int(self.fitness[-1])
+
+        return 0
+
+    def getIndividual(self, genes):
+        """
+        Converts a row of gene indices into an individual in the same format
+        as the Algorithm class.
+
+        :param self: the VectorAlgorithm object
+        :param genes: the index of the gene used for each course
+        :returns: the Individual object
+        """
+        return self.createIndividual([int(gene) for gene in genes])
+
+    def copyIndividual(self, individual):
+        """
+        Converts a row of the population into an individual in the same format
+        as the Algorithm class.
+
+        :param self: the VectorAlgorithm object
+        :param individual: the row of gene indices of the individual
+        :returns: the new Individual object
+        """
+        return self.getIndividual(individual)
+
+    def getFittest(self):
+        """
+        Returns the most fit individual in the population.
+        """
+        return self.getIndividual(self.population[-1])